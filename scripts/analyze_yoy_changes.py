@@ -4,23 +4,22 @@ Analyze year-over-year changes in Scott County and Iowa state data.
 Shows annual changes and growth rates for key metrics.
 """
 
-import glob
+import sys
 from pathlib import Path
 
 import pandas as pd
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 DATA_DIR = PROJECT_ROOT / "data" / "raw"
 
+from scripts import data_lake
+
 
 def load_historical_data(pattern: str) -> pd.DataFrame:
-    """Load the most recent historical file matching the pattern."""
-    files = glob.glob(str(DATA_DIR / pattern))
-    if not files:
-        return None
-    latest_file = max(files)
-    return pd.read_csv(latest_file)
+    """Load the historical table (or most recent file) matching the pattern."""
+    return data_lake.load_latest(pattern, DATA_DIR)
 
 
 def analyze_education_yoy(df: pd.DataFrame, location_name: str):
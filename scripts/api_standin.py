@@ -0,0 +1,652 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Census and Socrata APIs, for offline benchmarking.
+
+Serves the endpoints the fetch scripts use:
+
+    /data/<year>/<dataset>?get=...&for=...&in=...   Census queries
+    /data/<year>/<dataset>/variables.json           Census variable metadata
+    /resource/<dataset id>.json                     Socrata (SODA) queries
+    /api/views/<dataset id>.json                    Socrata dataset metadata
+    /api/views/<dataset id>/rows.csv                Socrata bulk CSV export
+
+A request is answered from a recorded fixture when one matches it (path,
+query parameters other than the API key, and Socrata host). Anything else
+is synthesized deterministically, so runs are reproducible without any
+fixtures. With --record, misses are fetched from the real API instead and
+saved as fixtures for later replay.
+
+Each request can be given a fixed delay plus jitter, and a share of
+requests can fail with HTTP 503 (or --error-status), so fetchers can be
+benchmarked under realistic conditions.
+
+Successful responses carry an ETag derived from the body; a request whose
+If-None-Match matches it is answered with 304 Not Modified and no body, as
+conditional requests are on the real APIs (see http_validators.py).
+
+Point the fetchers at it with:
+
+    CENSUS_API_BASE_URL=http://127.0.0.1:8765/data
+    SOCRATA_BASE_URL=http://127.0.0.1:8765
+
+Usage:
+    python scripts/api_standin.py --port 8765 --latency 0.05 --error-rate 0.02
+    python scripts/api_standin.py --fixtures data/cache/standin --record
+"""
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.utils import DATA_DIR
+
+FIXTURES_DIR = DATA_DIR / "cache" / "standin"
+CENSUS_UPSTREAM = "https://api.census.gov"
+
+# Query parameters that carry credentials, not part of a request's identity
+CREDENTIAL_PARAMS = {"key", "$$app_token"}
+
+# Tables the synthetic variables.json describes (every code the fetchers use)
+SYNTHETIC_TABLES = [
+    "B01001", "B01002", "B01003", "B02001", "B03001", "B03003", "B15002",
+    "B15003", "B17001", "B19001", "B19013", "B19025", "B19301", "B23025",
+    "B25001", "B25002", "B25003", "B25024", "B25064", "B25077", "C24030",
+]  # fmt: skip
+SYNTHETIC_TABLE_SIZE = 60
+
+# State FIPS codes served for state:* and nationwide county:* queries
+SYNTHETIC_STATES = [
+    "01", "02", "04", "05", "06", "08", "09", "10", "11", "12", "13", "15",
+    "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27",
+    "28", "29", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39",
+    "40", "41", "42", "44", "45", "46", "47", "48", "49", "50", "51", "53",
+    "54", "55", "56", "72",
+]  # fmt: skip
+
+# Rows in every synthetic Socrata dataset
+SOCRATA_ROWS = 20000
+SOCRATA_CATEGORIES = ["alpha", "beta", "gamma", "delta", "epsilon"]
+SOCRATA_COLUMNS = {
+    "id": "number",
+    "category": "text",
+    "value": "number",
+    "count": "number",
+    "date": "calendar_date",
+    "flag": "checkbox",
+}
+
+# System field timestamps: row i is created SOCRATA_EPOCH + i seconds, and
+# the n-th edit (see StandinServer.touch_socrata) lands at EDIT_EPOCH + n
+SOCRATA_EPOCH = datetime(2024, 1, 1)
+EDIT_EPOCH = datetime(2025, 1, 1)
+
+# Comparisons understood in $where, e.g. ":updated_at >= '2025-01-01'"
+WHERE_CLAUSE = re.compile(
+    r"\s*([:\w]+)\s*(>=|<=|!=|=|>|<)\s*('(?:[^']|'')*'|-?[\d.]+)\s*"
+)
+
+
+def stable_number(*parts: str, modulo: int = 100000) -> int:
+    """Return a deterministic number for a combination of strings."""
+    return zlib.crc32("|".join(parts).encode("utf-8")) % modulo
+
+
+def counties_in(state: str) -> int:
+    """Number of synthetic counties in a state (Iowa has its real 99)."""
+    return 99 if state == "19" else 40 + (int(state) * 7) % 60
+
+
+def expand_geography(for_geo: str, in_geo: str) -> Tuple[List[str], List[List[str]]]:
+    """
+    Resolve Census for/in clauses to geography columns and rows of IDs.
+
+    Returns:
+        Tuple of (geography column names, one list of IDs per area)
+    """
+    level, _, wanted = for_geo.partition(":")
+    parents = dict(
+        clause.split(":", 1) for clause in in_geo.replace("+", " ").split() if clause
+    )
+
+    if level == "us":
+        return ["us"], [["1"]]
+
+    states = [parents["state"]] if "state" in parents else SYNTHETIC_STATES
+    if level == "state":
+        ids = SYNTHETIC_STATES if wanted == "*" else wanted.split(",")
+        return ["state"], [[state] for state in ids]
+
+    if level == "county":
+        rows = []
+        for state in states:
+            ids = (
+                [f"{i * 2 + 1:03d}" for i in range(counties_in(state))]
+                if wanted == "*"
+                else wanted.split(",")
+            )
+            rows.extend([state, county] for county in ids)
+        return ["state", "county"], rows
+
+    if level == "tract":
+        rows = []
+        for state in states:
+            counties = (
+                [parents["county"]]
+                if "county" in parents
+                else [f"{i * 2 + 1:03d}" for i in range(counties_in(state))]
+            )
+            for county in counties:
+                ids = (
+                    [f"{i * 100 + 100:06d}" for i in range(10)]
+                    if wanted == "*"
+                    else wanted.split(",")
+                )
+                rows.extend([state, county, tract] for tract in ids)
+        return ["state", "county", "tract"], rows
+
+    raise ValueError(f"unknown geography level: {level}")
+
+
+def synthetic_census(year: str, params: Dict[str, str]) -> List[List[str]]:
+    """Build a Census-style response (header row, then one row per area)."""
+    variables = []
+    for item in params["get"].split(","):
+        group = re.fullmatch(r"group\((\w+)\)", item)
+        if group:
+            table = group.group(1)
+            codes = [f"{table}_{i:03d}" for i in range(1, SYNTHETIC_TABLE_SIZE + 1)]
+            variables += [f"{code}E" for code in codes] + [f"{code}M" for code in codes]
+            variables += ["GEO_ID", "NAME"]
+        else:
+            variables.append(item)
+
+    geo_columns, areas = expand_geography(params["for"], params.get("in", ""))
+
+    rows = [[*variables, *geo_columns]]
+    for ids in areas:
+        area = "".join(ids)
+        values = []
+        for code in variables:
+            if code == "NAME":
+                values.append(f"Area {area}")
+            elif code == "GEO_ID":
+                values.append(f"0000000US{area}")
+            else:
+                values.append(str(stable_number(code, area, year)))
+        rows.append([*values, *ids])
+    return rows
+
+
+def synthetic_variables() -> Dict:
+    """Build a variables.json payload covering SYNTHETIC_TABLES."""
+    variables = {
+        "NAME": {"label": "Geographic Area Name", "concept": ""},
+        "GEO_ID": {"label": "Geography", "concept": ""},
+    }
+    for table in SYNTHETIC_TABLES:
+        for i in range(1, SYNTHETIC_TABLE_SIZE + 1):
+            for suffix, kind in (("E", "Estimate"), ("M", "Margin of Error")):
+                variables[f"{table}_{i:03d}{suffix}"] = {
+                    "label": f"{kind}!!Total:!!Line {i}",
+                    "concept": f"SYNTHETIC TABLE {table}",
+                }
+    return {"variables": variables}
+
+
+def socrata_timestamp(moment: datetime) -> str:
+    """Format a system-field timestamp the way Socrata does."""
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def synthetic_socrata_row(dataset_id: str, i: int, revision: int = 0) -> Dict[str, str]:
+    """
+    Build row ``i`` of a synthetic Socrata dataset, system fields included.
+
+    A row with ``revision`` > 0 has been edited: its value changes and its
+    ``:updated_at`` moves to the time of that edit.
+    """
+    day = date(2020, 1, 1) + timedelta(days=i % 1500)
+    created = socrata_timestamp(SOCRATA_EPOCH + timedelta(seconds=i))
+    value = stable_number(dataset_id, str(i), *([str(revision)] if revision else []))
+    return {
+        ":id": f"row-{i:07d}",
+        ":created_at": created,
+        ":updated_at": (
+            socrata_timestamp(EDIT_EPOCH + timedelta(seconds=revision))
+            if revision
+            else created
+        ),
+        "id": str(i),
+        "category": SOCRATA_CATEGORIES[i % len(SOCRATA_CATEGORIES)],
+        "value": f"{value / 100:.2f}",
+        "count": str(stable_number(dataset_id, str(i), "count", modulo=1000)),
+        "date": f"{day.isoformat()}T00:00:00.000",
+        "flag": "true" if i % 3 == 0 else "false",
+    }
+
+
+def parse_where(where: str) -> Callable[[Dict[str, str]], bool]:
+    """
+    Turn a simple SoQL ``$where`` into a row predicate.
+
+    Supports comparisons of a field with a quoted string or a number,
+    joined with AND. Numbers compare numerically, everything else as text.
+    """
+    tests = []
+    for clause in re.split(r"\s+and\s+", where.strip(), flags=re.IGNORECASE):
+        match = WHERE_CLAUSE.fullmatch(clause)
+        if not match:
+            raise ValueError(f"unsupported $where clause: {clause}")
+        field, op, literal = match.groups()
+        quoted = literal.startswith("'")
+        value = literal[1:-1].replace("''", "'") if quoted else float(literal)
+        tests.append((field, op, value))
+
+    def compare(left, op: str, right) -> bool:
+        return {
+            "=": left == right,
+            "!=": left != right,
+            ">": left > right,
+            ">=": left >= right,
+            "<": left < right,
+            "<=": left <= right,
+        }[op]
+
+    def predicate(row: Dict[str, str]) -> bool:
+        for field, op, value in tests:
+            cell = row.get(field)
+            if cell is None:
+                return False
+            if isinstance(value, float):
+                try:
+                    cell = float(cell)
+                except ValueError:
+                    return False
+            if not compare(cell, op, value):
+                return False
+        return True
+
+    return predicate
+
+
+def synthetic_socrata_metadata(dataset_id: str) -> Dict:
+    """Build the /api/views metadata of a synthetic Socrata dataset."""
+    return {
+        "id": dataset_id,
+        "name": f"Synthetic dataset {dataset_id}",
+        "columns": [
+            {"fieldName": name, "name": name.title(), "dataTypeName": kind}
+            for name, kind in SOCRATA_COLUMNS.items()
+        ],
+    }
+
+
+def synthetic_socrata_export(
+    dataset_id: str,
+    total_rows: int = SOCRATA_ROWS,
+    edits: Optional[Dict[int, int]] = None,
+) -> str:
+    """
+    Build the rows.csv export of a synthetic Socrata dataset.
+
+    Like Socrata's export, the header uses the columns' display names,
+    dates are written as "MM/DD/YYYY hh:mm:ss AM" and system fields are
+    left out.
+    """
+    edits = edits or {}
+    out = io.StringIO()
+    writer = csv.writer(out, lineterminator="\n")
+    writer.writerow([name.title() for name in SOCRATA_COLUMNS])
+    for i in range(total_rows):
+        row = synthetic_socrata_row(dataset_id, i, edits.get(i, 0))
+        year, month, day = row["date"][:10].split("-")
+        row["date"] = f"{month}/{day}/{year} 12:00:00 AM"
+        writer.writerow([row[name] for name in SOCRATA_COLUMNS])
+    return out.getvalue()
+
+
+def synthetic_socrata(
+    dataset_id: str,
+    params: Dict[str, str],
+    total_rows: int = SOCRATA_ROWS,
+    edits: Optional[Dict[int, int]] = None,
+) -> List[Dict[str, str]]:
+    """
+    Answer a SODA query with $where, $offset, $limit and $select applied.
+
+    System fields (``:id``, ``:created_at``, ``:updated_at``) are only
+    returned when ``$$exclude_system_fields=false``, as on Socrata.
+    """
+    edits = edits or {}
+    limit = int(params.get("$limit", 1000))
+    offset = int(params.get("$offset", 0))
+
+    def row(i: int) -> Dict[str, str]:
+        return synthetic_socrata_row(dataset_id, i, edits.get(i, 0))
+
+    if "$where" in params:
+        matches = parse_where(params["$where"])
+        rows = [r for r in map(row, range(total_rows)) if matches(r)]
+        rows = rows[offset : offset + limit]
+    else:
+        rows = [row(i) for i in range(offset, min(total_rows, offset + limit))]
+
+    if params.get("$$exclude_system_fields", "true").lower() != "false":
+        rows = [{k: v for k, v in r.items() if not k.startswith(":")} for r in rows]
+
+    if "$select" in params:
+        columns = [col.strip() for col in params["$select"].split(",")]
+        rows = [{col: r[col] for col in columns if col in r} for r in rows]
+    return rows
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the stand-in's settings and statistics."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        host: str = "127.0.0.1",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        fixtures: Optional[Path] = None,
+        record: bool = False,
+        socrata_rows: int = SOCRATA_ROWS,
+        seed: int = 0,
+    ):
+        super().__init__((host, port), StandinHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.fixtures = Path(fixtures) if fixtures else None
+        self.record = record
+        self.socrata_rows = socrata_rows
+
+        # Edited Socrata rows: dataset id -> {row index: edit number}
+        self.socrata_edits: Dict[str, Dict[int, int]] = {}
+        self._edit_count = 0
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+        # (kind, status, seconds) per request
+        self.log: List[Tuple[str, int, float]] = []
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandinServer":
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and release the port."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StandinServer":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def draw(self) -> Tuple[float, bool]:
+        """Pick this request's delay and whether it fails."""
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+        return delay, fail
+
+    def touch_socrata(self, dataset_id: str, rows: Iterable[int]) -> None:
+        """Edit rows of a synthetic dataset, as if updated upstream now."""
+        with self._lock:
+            self._edit_count += 1
+            edits = self.socrata_edits.setdefault(dataset_id, {})
+            for i in rows:
+                edits[i] = self._edit_count
+
+    def record_request(self, kind: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self.log.append((kind, status, seconds))
+
+    def reset_log(self) -> None:
+        with self._lock:
+            self.log.clear()
+
+    def fixture_path(self, path: str, params: Dict[str, str], host: str) -> Path:
+        """Return the fixture file for a request."""
+        identity = {k: v for k, v in params.items() if k not in CREDENTIAL_PARAMS}
+        request = json.dumps([host, path, sorted(identity.items())])
+        digest = hashlib.sha256(request.encode("utf-8")).hexdigest()
+        return self.fixtures / f"{digest[:16]}.json"
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Answers one request from fixtures, upstream or synthetic data."""
+
+    server: StandinServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        started = time.perf_counter()
+        parts = urlsplit(self.path)
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        kind = "census" if parts.path.startswith("/data/") else "socrata"
+
+        delay, fail = self.server.draw()
+        time.sleep(delay)
+
+        if fail:
+            status, body = self.server.error_status, b"Service Unavailable"
+            content_type = "text/plain"
+        else:
+            try:
+                status, content_type, body = self.respond(parts.path, params)
+            except Exception as e:
+                status, content_type, body = 400, "text/plain", str(e).encode()
+
+        headers = {"Content-Type": content_type}
+        if status == 200:
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                status, body = 304, b""
+
+        # Logged before replying, so a client that has its response can
+        # count on the request being in the log
+        self.server.record_request(kind, status, time.perf_counter() - started)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def respond(self, path: str, params: Dict[str, str]) -> Tuple[int, str, bytes]:
+        """Return (status, content type, body) for a request."""
+        host = self.headers.get("X-Socrata-Host", "")
+        fixture = None
+        if self.server.fixtures is not None:
+            fixture = self.server.fixture_path(path, params, host)
+            if fixture.exists():
+                entry = json.loads(fixture.read_text(encoding="utf-8"))
+                return entry["status"], entry["content_type"], entry["body"].encode()
+
+        if self.server.record and fixture is not None:
+            return self.record(path, params, host, fixture)
+
+        export = re.fullmatch(r"/api/views/([\w-]+)/rows\.csv", path)
+        if export:
+            dataset_id = export.group(1)
+            body = synthetic_socrata_export(
+                dataset_id,
+                self.server.socrata_rows,
+                self.server.socrata_edits.get(dataset_id),
+            )
+            return 200, "text/csv", body.encode()
+
+        return (
+            200,
+            "application/json",
+            json.dumps(self.synthesize(path, params)).encode(),
+        )
+
+    def synthesize(self, path: str, params: Dict[str, str]):
+        """Build a synthetic response body for a Census or Socrata path."""
+        socrata = re.fullmatch(r"/resource/([\w-]+)\.json", path)
+        if socrata:
+            dataset_id = socrata.group(1)
+            return synthetic_socrata(
+                dataset_id,
+                params,
+                self.server.socrata_rows,
+                self.server.socrata_edits.get(dataset_id),
+            )
+
+        views = re.fullmatch(r"/api/views/([\w-]+)\.json", path)
+        if views:
+            return synthetic_socrata_metadata(views.group(1))
+
+        census = re.fullmatch(r"/data/(\d{4})/([\w/]+?)(/variables\.json)?", path)
+        if not census:
+            raise ValueError(f"unsupported path: {path}")
+        if census.group(3):
+            return synthetic_variables()
+        return synthetic_census(census.group(1), params)
+
+    def record(
+        self, path: str, params: Dict[str, str], host: str, fixture: Path
+    ) -> Tuple[int, str, bytes]:
+        """Fetch a request from the real API and save it as a fixture."""
+        upstream = f"https://{host}" if host else CENSUS_UPSTREAM
+        headers = {}
+        if "X-App-Token" in self.headers:
+            headers["X-App-Token"] = self.headers["X-App-Token"]
+        response = requests.get(
+            f"{upstream}{path}?{urlencode(params)}", headers=headers, timeout=60
+        )
+        content_type = response.headers.get("Content-Type", "application/json")
+
+        if response.ok:
+            fixture.parent.mkdir(parents=True, exist_ok=True)
+            fixture.write_text(
+                json.dumps(
+                    {
+                        "request": [host, path, params],
+                        "status": response.status_code,
+                        "content_type": content_type,
+                        "body": response.text,
+                    }
+                ),
+                encoding="utf-8",
+            )
+        return response.status_code, content_type, response.content
+
+
+def main():
+    """Run the stand-in until interrupted."""
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the Census and Socrata APIs"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Seconds added to every request"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="Extra random delay, up to N seconds"
+    )
+    parser.add_argument(
+        "--error-rate",
+        type=float,
+        default=0.0,
+        help="Share of requests answered with an error (0-1)",
+    )
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--fixtures",
+        type=Path,
+        default=FIXTURES_DIR,
+        help="Recorded responses to replay (default: data/cache/standin)",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        help="Fetch unknown requests from the real APIs and save them as fixtures",
+    )
+    parser.add_argument(
+        "--socrata-rows",
+        type=int,
+        default=SOCRATA_ROWS,
+        help=f"Rows in each synthetic Socrata dataset (default: {SOCRATA_ROWS:,})",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = StandinServer(
+        port=args.port,
+        host=args.host,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        fixtures=args.fixtures,
+        record=args.record,
+        socrata_rows=args.socrata_rows,
+        seed=args.seed,
+    )
+
+    print("=" * 80)
+    print("CENSUS / SOCRATA STAND-IN")
+    print("=" * 80)
+    print(f"Listening on {server.url}")
+    print(f"Latency: {args.latency * 1000:.0f}ms + up to {args.jitter * 1000:.0f}ms")
+    print(f"Error rate: {args.error_rate:.0%} (HTTP {args.error_status})")
+    print(f"Fixtures: {args.fixtures}{' (recording)' if args.record else ''}")
+    print("\nPoint the fetchers here with:")
+    print(f"  export CENSUS_API_BASE_URL={server.url}/data")
+    print(f"  export SOCRATA_BASE_URL={server.url}")
+    print("\nPress Ctrl-C to stop")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n✓ Served {len(server.log):,} requests")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
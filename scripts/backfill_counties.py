@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Backfill historical Census data for every US county.
+
+Builds on the historical county fetch: each request asks for ``county:*``,
+either nationally (one request per year) or per state, with every dataset
+packed into the same request. Each response is written straight to its own
+partition file and dropped, so memory stays bounded by the number of
+requests in flight, not by the total number of rows:
+
+    data/raw/counties/dataset=<name>/year=<year>/part-<us|state FIPS>.csv
+
+Partitions already on disk are skipped, so an interrupted backfill picks up
+where it stopped.
+
+Usage:
+    python scripts/backfill_counties.py
+    python scripts/backfill_counties.py --by-state --concurrency 8
+    python scripts/backfill_counties.py --dataset income --start-year 2015
+    python scripts/backfill_counties.py --states 19 17 --refresh
+    python scripts/backfill_counties.py --deadline 600
+"""
+
+import argparse
+import sys
+import time
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_async import run_concurrently
+from scripts.census_client import get_census_client
+from scripts.circuit_breaker import Deadline
+from scripts.fetch_manifest import GEOGRAPHY_COLUMNS, write_csv_atomic
+from scripts.fetch_scott_county_historical import (
+    AVAILABLE_YEARS,
+    CENSUS_DATASETS,
+    calculate_metrics,
+    fetch_year_datasets,
+    tidy_counties_table,
+)
+
+OUTPUT_DIR = PROJECT_ROOT / "data" / "raw" / "counties"
+
+# National requests are written as a single part
+NATIONAL = "us"
+
+# States, DC and Puerto Rico
+STATE_FIPS_CODES = [
+    "01", "02", "04", "05", "06", "08", "09", "10", "11", "12", "13", "15",
+    "16", "17", "18", "19", "20", "21", "22", "23", "24", "25", "26", "27",
+    "28", "29", "30", "31", "32", "33", "34", "35", "36", "37", "38", "39",
+    "40", "41", "42", "44", "45", "46", "47", "48", "49", "50", "51", "53",
+    "54", "55", "56", "72",
+]  # fmt: skip
+
+
+def partition_path(root: Path, dataset_name: str, year: int, part: str) -> Path:
+    """Return the file holding one dataset, year and part."""
+    return Path(root) / f"dataset={dataset_name}" / f"year={year}" / f"part-{part}.csv"
+
+
+def plan_backfill(
+    dataset_names: Sequence[str],
+    years: Sequence[int],
+    parts: Sequence[str],
+    root: Path = OUTPUT_DIR,
+    refresh: bool = False,
+) -> Dict[Tuple[int, str], List[str]]:
+    """
+    Work out which requests the backfill still needs.
+
+    Returns:
+        Mapping of (year, part) to the dataset names not yet written for
+        it; requests with every partition on disk are left out
+    """
+    plan = {}
+    for year in years:
+        for part in parts:
+            names = [
+                name
+                for name in dataset_names
+                if refresh or not partition_path(root, name, year, part).exists()
+            ]
+            if names:
+                plan[(year, part)] = names
+    return plan
+
+
+def backfill_part(
+    dataset_names: Sequence[str], year: int, part: str, root: Path = OUTPUT_DIR
+) -> Optional[int]:
+    """
+    Fetch every county for one year and part, and write each dataset.
+
+    Returns:
+        Number of rows written, or None if the request failed
+    """
+    in_geo = None if part == NATIONAL else f"state:{part}"
+    frames = fetch_year_datasets(dataset_names, year, "county:*", in_geo)
+    if frames is None:
+        return None
+
+    rows = 0
+    for name, df in frames.items():
+        df = tidy_counties_table(calculate_metrics(df, name))
+        write_csv_atomic(df, partition_path(root, name, year, part))
+        rows += len(df)
+    return rows
+
+
+def run_backfill(
+    plan: Dict[Tuple[int, str], List[str]],
+    root: Path = OUTPUT_DIR,
+    concurrency: int = 4,
+) -> Dict[str, object]:
+    """
+    Run the planned requests, writing partitions as responses arrive.
+
+    Only row counts are kept in memory; each response is written and
+    dropped by the worker that fetched it.
+
+    Returns:
+        Summary with the number of requests, rows written and failed
+        (year, part) pairs
+    """
+    calls = {
+        key: partial(backfill_part, names, key[0], key[1], root)
+        for key, names in plan.items()
+    }
+
+    get_census_client().ensure_pool_size(concurrency)
+    results = run_concurrently(calls, concurrency=concurrency)
+
+    failed = sorted(key for key, rows in results.items() if not isinstance(rows, int))
+    rows = sum(count for count in results.values() if isinstance(count, int))
+    return {"requests": len(calls), "rows": rows, "failed": failed}
+
+
+def iter_partitions(
+    dataset_name: str, root: Path = OUTPUT_DIR
+) -> Iterator[pd.DataFrame]:
+    """Yield a backfilled dataset one partition at a time, in year order."""
+    for path in sorted(Path(root).glob(f"dataset={dataset_name}/year=*/part-*.csv")):
+        yield pd.read_csv(path, dtype={col: str for col in GEOGRAPHY_COLUMNS})
+
+
+def main():
+    """Main execution."""
+    parser = argparse.ArgumentParser(
+        description="Backfill historical Census data for every US county"
+    )
+    parser.add_argument(
+        "--dataset",
+        choices=list(CENSUS_DATASETS.keys()) + ["all"],
+        default="all",
+        help="Specific dataset to backfill (default: all)",
+    )
+    parser.add_argument("--start-year", type=int, default=min(AVAILABLE_YEARS))
+    parser.add_argument("--end-year", type=int, default=max(AVAILABLE_YEARS))
+    parser.add_argument(
+        "--by-state",
+        action="store_true",
+        help="One request per state and year instead of one national request",
+    )
+    parser.add_argument(
+        "--states",
+        nargs="+",
+        help="Only these state FIPS codes (implies --by-state)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of concurrent requests (default: 4)",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=OUTPUT_DIR,
+        help=f"Output directory (default: {OUTPUT_DIR.relative_to(PROJECT_ROOT)})",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Rewrite existing partitions and bypass the response cache",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Stop sending requests N seconds into the run (default: no limit)",
+    )
+    args = parser.parse_args()
+
+    dataset_names = list(CENSUS_DATASETS) if args.dataset == "all" else [args.dataset]
+    years = list(range(args.start_year, args.end_year + 1))
+    if args.states:
+        parts = [state.zfill(2) for state in args.states]
+    elif args.by_state:
+        parts = STATE_FIPS_CODES
+    else:
+        parts = [NATIONAL]
+
+    get_census_client().refresh = args.refresh
+    if args.deadline:
+        get_census_client().deadline = Deadline(args.deadline)
+
+    print("=" * 80)
+    print("NATIONAL COUNTY BACKFILL - CENSUS ACS 5-YEAR")
+    print("=" * 80)
+    print(f"Datasets: {', '.join(dataset_names)}")
+    print(f"Years: {years[0]}-{years[-1]}")
+    print(f"Scope: {'national' if parts == [NATIONAL] else f'{len(parts)} state(s)'}")
+    print(f"Output: {args.output}")
+
+    plan = plan_backfill(dataset_names, years, parts, args.output, args.refresh)
+    if not plan:
+        print("\n✓ Every partition is already on disk - nothing to fetch")
+        return
+
+    print(f"\n📥 {len(plan)} requests to send ({args.concurrency} at a time)...")
+    started = time.perf_counter()
+    try:
+        summary = run_backfill(plan, args.output, args.concurrency)
+    except KeyboardInterrupt:
+        print("\n\n⚠ Interrupted - written partitions are kept; re-run to resume")
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n{'=' * 80}")
+    print("✅ BACKFILL COMPLETE" if not summary["failed"] else "⚠ BACKFILL INCOMPLETE")
+    print(f"{'=' * 80}")
+    print(f"  ⏱️  {elapsed:.1f}s for {summary['requests']} requests")
+    print(f"  📄 {summary['rows']:,} rows written")
+    print(f"  🌐 Census API: {get_census_client().describe_usage()}")
+    if summary["failed"]:
+        failed = ", ".join(f"{year}/{part}" for year, part in summary["failed"])
+        print(f"  ❌ Failed: {failed}")
+        print("     Re-run to retry; completed partitions are skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Benchmark the fetchers against the local API stand-in.
+
+Starts api_standin.py in-process and runs each fetcher in its concurrency
+and caching modes against it. Every run gets its own client, response
+cache and rate limiter. Nothing touches the real APIs, so results are
+reproducible and only reflect the ingestion code, the injected latency and
+the injected errors.
+
+Reported per scenario: wall time, requests the server saw, throughput,
+server-side p50/p95 latency and error responses.
+
+Usage:
+    python scripts/benchmark_fetchers.py
+    python scripts/benchmark_fetchers.py --latency 0.1 --error-rate 0.05
+    python scripts/benchmark_fetchers.py --concurrency 16 --rate 50
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts import fetch_comparison_counties as comparison
+from scripts import fetch_data_gov
+from scripts import fetch_scott_county_historical as historical
+from scripts.api_standin import StandinServer
+from scripts.census_cache import ResponseCache
+from scripts.census_client import CensusClient, set_census_client
+from scripts.census_metadata import MetadataStore
+from scripts.rate_limiter import KEYED_BURST, KEYED_RATE, TokenBucket
+from scripts.socrata_client import PAGE_SIZE
+
+HISTORICAL_YEARS = (2009, 2021)
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Return the ``share`` percentile of values (0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(share * len(ordered)))]
+
+
+def install_client(server: StandinServer, cache_dir: Path, args) -> CensusClient:
+    """Make a fresh shared Census client aimed at the stand-in."""
+    client = CensusClient(
+        api_key="0" * 40,
+        base_url=f"{server.url}/data",
+        cache=ResponseCache(cache_dir / "responses") if cache_dir else None,
+        metadata=MetadataStore(cache_dir / "metadata") if cache_dir else None,
+        limiter=TokenBucket(args.rate, max(KEYED_BURST, args.rate)),
+    )
+    set_census_client(client)
+    return client
+
+
+def run_scenario(
+    server: StandinServer, name: str, run: Callable[[], object]
+) -> Dict[str, object]:
+    """Time one scenario and collect the server's view of it."""
+    server.reset_log()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    elapsed = time.perf_counter() - started
+
+    log = list(server.log)
+    latencies = [seconds for _, _, seconds in log]
+    return {
+        "scenario": name,
+        "seconds": elapsed,
+        "requests": len(log),
+        "throughput": len(log) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "errors": sum(status >= 400 for _, status, _ in log),
+    }
+
+
+def census_scenarios(server: StandinServer, work_dir: Path, args) -> List[Dict]:
+    """Historical and comparison fetchers in their concurrency/caching modes."""
+    datasets = list(historical.CENSUS_DATASETS)
+    start, end = HISTORICAL_YEARS
+    results = []
+
+    for concurrency in (1, args.concurrency):
+        cache_dir = work_dir / f"historical-c{concurrency}"
+        install_client(server, cache_dir, args)
+        fetch = lambda: historical.fetch_historical_datasets(  # noqa: E731
+            datasets, start, end, concurrency
+        )
+        results.append(
+            run_scenario(server, f"historical concurrency={concurrency} cold", fetch)
+        )
+        results.append(
+            run_scenario(server, f"historical concurrency={concurrency} warm", fetch)
+        )
+
+    install_client(server, None, args)
+    results.append(
+        run_scenario(
+            server,
+            "historical per-dataset serial (no cache)",
+            lambda: [
+                historical.fetch_historical_datasets([name], start, end)
+                for name in datasets
+            ],
+        )
+    )
+
+    install_client(server, work_dir / "comparison", args)
+    results.append(
+        run_scenario(
+            server,
+            "comparison counties cold",
+            lambda: comparison.fetch_counties_data(comparison.COUNTIES),
+        )
+    )
+    return results
+
+
+def socrata_scenarios(server: StandinServer, work_dir: Path, args) -> List[Dict]:
+    """Socrata dataset download: JSON pages vs bulk CSV export, in memory and to disk."""
+    os.environ["SOCRATA_BASE_URL"] = server.url
+    results = []
+    for export in (False, True):
+        source = "export" if export else "json"
+        results.append(
+            run_scenario(
+                server,
+                f"socrata fetch_dataset {source} limit={args.socrata_limit:,}",
+                lambda: fetch_data_gov.fetch_dataset(
+                    "bench-0001",
+                    args.socrata_limit,
+                    "data.example.gov",
+                    export=export,
+                ),
+            )
+        )
+        results.append(
+            run_scenario(
+                server,
+                f"socrata download_dataset {source} limit={args.socrata_limit:,}",
+                lambda: fetch_data_gov.download_dataset(
+                    "bench-0001",
+                    args.socrata_limit,
+                    "data.example.gov",
+                    work_dir / "socrata",
+                    args.page_size,
+                    export=export,
+                ),
+            )
+        )
+    # Same export again: answered 304 Not Modified, the previous file is reused
+    results.append(
+        run_scenario(
+            server,
+            "socrata download_dataset export unchanged",
+            lambda: fetch_data_gov.download_dataset(
+                "bench-0001",
+                args.socrata_limit,
+                "data.example.gov",
+                work_dir / "socrata",
+                args.page_size,
+            ),
+        )
+    )
+    results.append(
+        run_scenario(
+            server,
+            f"socrata download_dataset json workers={args.concurrency}",
+            lambda: fetch_data_gov.download_dataset(
+                "bench-0001",
+                args.socrata_limit,
+                "data.example.gov",
+                work_dir / "socrata",
+                args.page_size,
+                args.concurrency,
+                export=False,
+            ),
+        )
+    )
+    return results
+
+
+def print_results(results: List[Dict]) -> None:
+    """Print the benchmark table."""
+    print(f"\n{'=' * 104}")
+    print(
+        f"{'Scenario':<48}{'Time':>9}{'Requests':>10}{'Req/s':>9}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'Errors':>8}"
+    )
+    print(f"{'-' * 104}")
+    for row in results:
+        print(
+            f"{row['scenario']:<48}{row['seconds']:>8.2f}s{row['requests']:>10}"
+            f"{row['throughput']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}"
+            f"{row['errors']:>8}"
+        )
+    print(f"{'=' * 104}")
+
+
+def main():
+    """Main execution."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the fetchers against the local API stand-in"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="Server delay per request (s)"
+    )
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Concurrency for the concurrent scenarios (default: 8)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=KEYED_RATE,
+        help=f"Client token-bucket rate, requests/s (default: {KEYED_RATE:g})",
+    )
+    parser.add_argument("--socrata-limit", type=int, default=20000)
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=PAGE_SIZE,
+        help=f"Socrata records per page (default: {PAGE_SIZE:,})",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print("FETCHER BENCHMARK (local stand-in)")
+    print("=" * 80)
+    print(f"Latency: {args.latency * 1000:.0f}ms + up to {args.jitter * 1000:.0f}ms")
+    print(f"Error rate: {args.error_rate:.0%}")
+    print(f"Client rate limit: {args.rate:g} req/s")
+
+    with (
+        StandinServer(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            socrata_rows=args.socrata_limit,
+            seed=args.seed,
+        ) as server,
+        tempfile.TemporaryDirectory() as tmp,
+    ):
+        print(f"Stand-in: {server.url}")
+        results = census_scenarios(server, Path(tmp), args)
+        results += socrata_scenarios(server, Path(tmp), args)
+        set_census_client(None)
+
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
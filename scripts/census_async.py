@@ -0,0 +1,100 @@
+"""
+Asyncio fetch engine for Census API requests.
+
+Runs many blocking client calls at once on worker threads, with a semaphore
+bounding how many are in flight. Request pacing is left to the Census
+client's token bucket (see rate_limiter.py), which adapts to throttling; an
+optional fixed rate limit can still space out call starts here.
+
+Usage:
+    from functools import partial
+    from scripts.census_async import run_concurrently
+
+    calls = {year: partial(fetch_year_datasets, names, year) for year in years}
+    results = run_concurrently(calls, concurrency=8)
+
+    # Or hand each result to a callback as soon as it arrives, so only the
+    # calls in flight are ever held in memory
+    failures = run_concurrently(calls, concurrency=8, on_result=write_part)
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, Optional
+
+ResultCallback = Callable[[Hashable, Any], None]
+
+DEFAULT_CONCURRENCY = 8
+
+
+class AsyncRateLimiter:
+    """Space request starts at least ``1 / rate`` seconds apart."""
+
+    def __init__(self, rate: float):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1.0 / rate
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until the next request slot is free."""
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            now = loop.time()
+            wait = self._next_start - now
+            if wait > 0:
+                await asyncio.sleep(wait)
+                now = loop.time()
+            self._next_start = max(now, self._next_start) + self.interval
+
+
+async def gather_limited(
+    calls: Dict[Hashable, Callable[[], Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: Optional[float] = None,
+    on_result: Optional[ResultCallback] = None,
+) -> Dict[Hashable, Any]:
+    """
+    Run blocking calls concurrently under a concurrency cap.
+
+    Args:
+        calls: Mapping of result key to a zero-argument blocking callable
+        concurrency: Maximum number of calls in flight at once
+        rate: Optional maximum call starts per second across all calls
+        on_result: Optional callback given ``(key, result)`` as each call
+            succeeds. Callbacks run one at a time on the event loop, so they
+            can safely share a writer. The result is then dropped rather
+            than kept for the returned mapping.
+
+    Returns:
+        Mapping of the same keys to each call's return value (None when
+        ``on_result`` consumed it), or to the exception it raised
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    limiter = AsyncRateLimiter(rate) if rate else None
+
+    async def run_one(key: Hashable) -> Any:
+        async with semaphore:
+            if limiter:
+                await limiter.acquire()
+            result = await asyncio.to_thread(calls[key])
+        if on_result is None:
+            return result
+        on_result(key, result)
+        return None
+
+    keys = list(calls)
+    results = await asyncio.gather(
+        *(run_one(key) for key in keys), return_exceptions=True
+    )
+    return dict(zip(keys, results))
+
+
+def run_concurrently(
+    calls: Dict[Hashable, Callable[[], Any]],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate: Optional[float] = None,
+    on_result: Optional[ResultCallback] = None,
+) -> Dict[Hashable, Any]:
+    """Synchronous entry point for gather_limited()."""
+    return asyncio.run(gather_limited(calls, concurrency, rate, on_result))
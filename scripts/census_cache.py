@@ -0,0 +1,145 @@
+"""
+Persistent on-disk cache for Census API responses.
+
+Responses are stored content-addressed: the file name is a hash of the
+request (endpoint, year, variables, geography), so the same request always
+maps to the same file no matter which script made it. Published ACS
+vintages never change, so their entries never expire; vintages that may
+still be revised are kept for a configurable TTL.
+
+Entries also keep the response's ETag / Last-Modified validators. Once an
+entry's TTL has passed, the client revalidates it with a conditional
+request (see http_validators.py); a ``304 Not Modified`` renews the entry
+without downloading the rows again.
+
+Usage:
+    from scripts.census_cache import ResponseCache
+
+    cache = ResponseCache()
+    rows = cache.get(key)
+    if rows is None:
+        rows = fetch(...)
+        cache.put(key, rows)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from scripts.utils import DATA_DIR
+
+CACHE_DIR = DATA_DIR / "cache" / "census"
+
+# How long responses for not-yet-final vintages stay fresh
+DEFAULT_TTL_HOURS = float(os.getenv("CENSUS_CACHE_TTL_HOURS", "24"))
+
+
+def is_published_vintage(year: int, today: Optional[date] = None) -> bool:
+    """
+    Return True if an ACS 5-year vintage is final and will not change.
+
+    The 5-year estimates for year Y are released in December of Y + 1, so
+    anything older than last year is settled.
+    """
+    today = today or date.today()
+    return year < today.year - 1
+
+
+def make_key(
+    endpoint: str, year: int, variables: List[str], for_geo: str, in_geo: Optional[str]
+) -> Dict[str, Any]:
+    """Build the cache key for a Census request."""
+    return {
+        "endpoint": endpoint,
+        "year": year,
+        "variables": list(variables),
+        "for": for_geo,
+        "in": in_geo or "",
+    }
+
+
+class ResponseCache:
+    """Content-addressed JSON cache of Census API rows."""
+
+    def __init__(
+        self,
+        directory: Path = CACHE_DIR,
+        ttl_hours: float = DEFAULT_TTL_HOURS,
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def path_for(self, key: Dict[str, Any]) -> Path:
+        """Return the file that stores the response for ``key``."""
+        digest = hashlib.sha256(
+            json.dumps(key, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return self.directory / digest[:2] / f"{digest}.json"
+
+    def _read(self, key: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the stored entry for ``key``, fresh or not."""
+        path = self.path_for(key)
+        if not path.exists():
+            return None
+
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: Dict[str, Any]) -> Optional[List[List[str]]]:
+        """Return cached rows for ``key``, or None if missing or stale."""
+        entry = self._read(key)
+        if entry is None:
+            return None
+
+        if not is_published_vintage(key["year"]):
+            if time.time() - entry["fetched_at"] > self.ttl_seconds:
+                return None
+
+        return entry["rows"]
+
+    def validators(self, key: Dict[str, Any]) -> Dict[str, str]:
+        """Return the ETag / Last-Modified stored with ``key``, even if stale."""
+        entry = self._read(key)
+        return (entry or {}).get("validators", {})
+
+    def revalidate(self, key: Dict[str, Any]) -> Optional[List[List[str]]]:
+        """
+        Renew a stale entry the server reported as not modified.
+
+        Returns:
+            The entry's rows, or None if it has gone missing
+        """
+        entry = self._read(key)
+        if entry is None:
+            return None
+        self.put(key, entry["rows"], entry.get("validators"))
+        return entry["rows"]
+
+    def put(
+        self,
+        key: Dict[str, Any],
+        rows: List[List[str]],
+        validators: Optional[Dict[str, str]] = None,
+    ) -> Path:
+        """Store rows (and their response's validators) for ``key``; atomic."""
+        path = self.path_for(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {"key": key, "fetched_at": time.time(), "rows": rows}
+        if validators:
+            entry["validators"] = validators
+
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_name, path)
+
+        return path
@@ -0,0 +1,628 @@
+"""
+Shared client for the US Census Bureau API.
+
+Every Census fetch script goes through one pooled ``requests.Session`` so
+repeated calls reuse keep-alive TLS connections instead of opening a new one
+per request. The client also owns the ``CENSUS_API_KEY`` lookup: the key is
+read (and the missing-key notice printed) once per process.
+
+The shared client keeps an on-disk response cache (see census_cache.py), so
+re-running an ingestion only goes to the network for data that is new or
+may still change. Once a cached response's TTL has passed it is revalidated
+with a conditional request on its ETag / Last-Modified (see
+http_validators.py): a ``304 Not Modified`` counts as a cache hit and
+renews the entry without downloading it again. Set ``client.refresh = True``
+to bypass cached responses.
+
+Requests are paced by a token bucket sized to whether an API key is present
+(see rate_limiter.py). HTTP 429/5xx responses and connection errors are
+retried with exponential backoff, and the bucket slows down until responses
+succeed again.
+
+A per-host circuit breaker (see circuit_breaker.py) stops sending requests
+after repeated consecutive failures, so a degraded API costs seconds rather
+than a full timeout per call. Setting ``client.deadline`` to a Deadline caps
+every request's timeout and backoff to the time left in the run.
+
+Variable codes are checked against an offline index of each vintage's
+``variables.json`` (see census_metadata.py). Codes a vintage does not serve
+are left out of the request and come back as empty columns, so one
+unavailable code no longer fails the whole year.
+
+Whole ACS tables can be fetched with ``get=group(B15003)`` (get_group and
+get_tables). The raw group response is what gets cached, and projection to
+the wanted columns happens locally, so keeping an extra column from a table
+costs no extra request.
+
+Usage:
+    from scripts.census_client import get_census_client
+
+    client = get_census_client()
+    df = client.get_dataframe(
+        2021, ["NAME", "B01003_001E"], "county:163", "state:19"
+    )
+"""
+
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from scripts.census_cache import ResponseCache, make_key
+from scripts.census_metadata import MetadataStore, VariableIndex, compact_variables
+from scripts.circuit_breaker import CircuitBreaker, Deadline, DeadlineExceeded
+from scripts.http_validators import (
+    NOT_MODIFIED,
+    conditional_headers,
+    response_validators,
+)
+from scripts.rate_limiter import TokenBucket, census_rate_limiter
+
+# Load environment variables
+load_dotenv()
+
+# Override to point every client at another server, e.g. the local stand-in
+# (see api_standin.py): CENSUS_API_BASE_URL=http://127.0.0.1:8765/data
+BASE_URL = os.getenv("CENSUS_API_BASE_URL", "https://api.census.gov/data")
+DEFAULT_DATASET = "acs/acs5"
+DEFAULT_TIMEOUT = 30
+
+# Connections kept alive per host (the Census API is a single host)
+POOL_SIZE = 10
+
+# The API rejects requests with more than 50 variables (NAME included)
+MAX_VARIABLES = 50
+
+# Transient failures are retried with exponential backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0  # seconds
+BACKOFF_MAX = 30.0
+
+
+class CensusAPIError(requests.exceptions.RequestException):
+    """Raised when the Census API answers with something other than JSON rows."""
+
+
+def lookup_api_key() -> Optional[str]:
+    """Read CENSUS_API_KEY from the environment, ignoring malformed keys."""
+    api_key = os.getenv("CENSUS_API_KEY")
+
+    if not api_key:
+        print("\nℹ️  No Census API key found (optional - will work without it)")
+        print("   Get one at: https://api.census.gov/data/key_signup.html")
+        print("   for higher rate limits\n")
+        return None
+
+    # Census keys are 40 characters; anything much shorter is a paste error
+    if len(api_key) < 30:
+        print("\n⚠️  Census API key looks invalid (too short)")
+        print("   Proceeding without key...\n")
+        return None
+
+    return api_key
+
+
+def pack_variables(variables: Sequence[str], capacity: int = MAX_VARIABLES):
+    """
+    Split variable codes into as few requests as the variable limit allows.
+
+    Duplicate codes are requested once. Order is preserved, so codes from
+    the same dataset group stay next to each other.
+
+    Returns:
+        List of code lists, each at most ``capacity`` long
+    """
+    codes = list(dict.fromkeys(variables))
+    return [codes[i : i + capacity] for i in range(0, len(codes), capacity)]
+
+
+def table_of(code: str) -> str:
+    """Return the table a variable code belongs to (B15003_022E -> B15003)."""
+    return code.split("_", 1)[0]
+
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Seconds to wait before retry ``attempt`` (0-based), with jitter."""
+    if retry_after and retry_after.isdigit():
+        return min(BACKOFF_MAX, float(retry_after))
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt)
+    return delay + random.uniform(0, BACKOFF_BASE)
+
+
+class CensusClient:
+    """Pooled, keep-alive HTTP client for ``api.census.gov``."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = BASE_URL,
+        pool_size: int = POOL_SIZE,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[TokenBucket] = None,
+        max_retries: int = MAX_RETRIES,
+        metadata: Optional[MetadataStore] = None,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.api_key = api_key if api_key is not None else lookup_api_key()
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.refresh = False
+        self.limiter = limiter or census_rate_limiter(self.api_key)
+        self.max_retries = max_retries
+
+        # Fail fast once a host keeps failing, and within the run's deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.deadline: Optional[Deadline] = None
+
+        # Variable indexes by endpoint; None marks metadata that failed to load
+        self.metadata = metadata
+        self._indexes: Dict[str, Optional[VariableIndex]] = {}
+        self._metadata_lock = threading.Lock()
+
+        # Request accounting, for run summaries
+        self.network_calls = 0
+        self.cache_hits = 0
+        self.not_modified = 0
+        self._stats_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.pool_size = 0
+        self.ensure_pool_size(pool_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type=None, exc_value=None, traceback=None):
+        self.close()
+
+    def ensure_pool_size(self, size: int) -> None:
+        """Grow the connection pool so ``size`` concurrent calls share it."""
+        if size <= self.pool_size:
+            return
+        adapter = HTTPAdapter(pool_connections=size, pool_maxsize=size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.pool_size = size
+
+    def describe_usage(self) -> str:
+        """Summarise how many requests hit the network versus the cache."""
+        usage = f"{self.network_calls} network calls, {self.cache_hits} cache hits"
+        if self.not_modified:
+            usage += f" ({self.not_modified} revalidated as not modified)"
+        open_hosts = self.breaker.open_hosts()
+        if open_hosts:
+            usage += f" (circuit open: {', '.join(open_hosts)})"
+        return usage
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self.session.close()
+
+    def endpoint(self, year: int, dataset: str = DEFAULT_DATASET) -> str:
+        """Return the API endpoint URL for a dataset vintage."""
+        return f"{self.base_url}/{year}/{dataset}"
+
+    def get(
+        self,
+        year: int,
+        variables: List[str],
+        for_geo: str,
+        in_geo: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> List[List[str]]:
+        """
+        Fetch raw rows from the Census API.
+
+        Args:
+            year: Dataset vintage (e.g. 2021)
+            variables: Variable codes for the ``get`` clause (may include NAME)
+            for_geo: Geography clause, e.g. ``county:163`` or ``state:*``
+            in_geo: Optional parent geography, e.g. ``state:19``
+            dataset: Dataset path below the year (default: ACS 5-year)
+            timeout: Request timeout in seconds
+
+        Returns:
+            List of rows; the first row holds the column headers
+
+        Raises:
+            requests.exceptions.RequestException: On HTTP or API errors
+        """
+        key = make_key(self.endpoint(year, dataset), year, variables, for_geo, in_geo)
+        validators = None
+        if self.cache is not None and not self.refresh:
+            rows = self.cache.get(key)
+            if rows is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                return rows
+            # A stale entry is revalidated rather than downloaded again
+            validators = self.cache.validators(key)
+
+        params = {"get": ",".join(variables), "for": for_geo}
+        if in_geo:
+            params["in"] = in_geo
+        if self.api_key:
+            params["key"] = self.api_key
+
+        response = self._send(
+            self.endpoint(year, dataset),
+            params,
+            timeout,
+            conditional_headers(validators),
+        )
+        if validators and response.status_code == NOT_MODIFIED:
+            rows = self.cache.revalidate(key)
+            if rows is not None:
+                with self._stats_lock:
+                    self.cache_hits += 1
+                    self.not_modified += 1
+                return rows
+            response = self._send(self.endpoint(year, dataset), params, timeout)
+
+        # The API reports bad keys and similar problems as an HTML page
+        if response.text.lstrip().startswith("<"):
+            raise CensusAPIError(
+                f"Census API returned HTML instead of data for {year}",
+                response=response,
+            )
+
+        rows = response.json()
+        if self.cache is not None:
+            self.cache.put(key, rows, response_validators(response))
+        return rows
+
+    def _send(
+        self,
+        url: str,
+        params: Dict,
+        timeout: float,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> requests.Response:
+        """
+        Send a GET under the rate limiter, retrying transient failures.
+
+        ``headers`` are sent with the request, e.g. the conditional headers
+        of a stored response; a ``304 Not Modified`` is returned as is.
+
+        Raises:
+            CircuitOpenError: If the host's circuit is open
+            DeadlineExceeded: If the run's deadline passes before a response
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.max_retries + 1):
+            self.breaker.before_call(host)
+            request_timeout = (
+                self.deadline.timeout(timeout) if self.deadline else timeout
+            )
+            self.limiter.acquire()
+            with self._stats_lock:
+                self.network_calls += 1
+
+            retry_after = None
+            request = {"params": params, "timeout": request_timeout}
+            if headers:
+                request["headers"] = headers
+            try:
+                response = self.session.get(url, **request)
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ):
+                self.breaker.record_failure(host)
+                if attempt == self.max_retries or self.breaker.is_open(host):
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success(host)
+                    break
+                self.breaker.record_failure(host)
+                if attempt == self.max_retries or self.breaker.is_open(host):
+                    break
+                retry_after = response.headers.get("Retry-After")
+
+            self.limiter.on_throttle()
+            delay = backoff_delay(attempt, retry_after)
+            if self.deadline and delay >= self.deadline.remaining():
+                raise DeadlineExceeded(
+                    f"run deadline of {self.deadline.seconds:g}s exceeded"
+                )
+            time.sleep(delay)
+
+        response.raise_for_status()
+        self.limiter.on_success()
+        return response
+
+    def variable_index(
+        self, year: int, dataset: str = DEFAULT_DATASET
+    ) -> Optional[VariableIndex]:
+        """
+        Return the variable index for a vintage, downloading it on first use.
+
+        Returns None when the client has no metadata store or the metadata
+        cannot be loaded; callers then send their codes unchecked.
+        """
+        if self.metadata is None:
+            return None
+
+        endpoint = self.endpoint(year, dataset)
+        with self._metadata_lock:
+            if endpoint not in self._indexes:
+                index = self.metadata.load(endpoint)
+                if index is None or self.metadata.is_stale(index, year):
+                    index = self._download_index(endpoint, index, year, dataset)
+                self._indexes[endpoint] = index
+            return self._indexes[endpoint]
+
+    def _download_index(
+        self,
+        endpoint: str,
+        stored: Optional[VariableIndex],
+        year: int,
+        dataset: str,
+    ) -> Optional[VariableIndex]:
+        """
+        Download a vintage's ``variables.json`` into the metadata store.
+
+        A stored index is revalidated with a conditional request, and kept
+        (also when the API cannot be reached) unless the file has changed.
+        """
+        headers = conditional_headers(stored.validators) if stored else {}
+        try:
+            response = self._send(
+                f"{endpoint}/variables.json", {}, DEFAULT_TIMEOUT, headers
+            )
+            if response.status_code == NOT_MODIFIED and stored is not None:
+                with self._stats_lock:
+                    self.not_modified += 1
+                return self.metadata.save(endpoint, stored.variables, stored.validators)
+            variables = compact_variables(response.json())
+            return self.metadata.save(
+                endpoint, variables, response_validators(response)
+            )
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"⚠️  No variable metadata for {year} {dataset}: {e}")
+            return stored
+
+    def check_variables(
+        self, year: int, variables: Sequence[str], dataset: str = DEFAULT_DATASET
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Split variable codes into those a vintage serves and those it lacks.
+
+        Without metadata every code is treated as known.
+        """
+        index = self.variable_index(year, dataset)
+        if index is None:
+            return list(variables), []
+        return index.split(variables)
+
+    def get_dataframe(
+        self,
+        year: int,
+        variables: List[str],
+        for_geo: str,
+        in_geo: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> pd.DataFrame:
+        """Fetch rows from the Census API as a DataFrame (values left as text)."""
+        data = self.get(year, variables, for_geo, in_geo, dataset, timeout)
+        return pd.DataFrame(data[1:], columns=data[0])
+
+    def get_merged(
+        self,
+        year: int,
+        variables: Sequence[str],
+        for_geo: str,
+        in_geo: Optional[str] = None,
+        extra: Sequence[str] = ("NAME",),
+        dataset: str = DEFAULT_DATASET,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> pd.DataFrame:
+        """
+        Fetch any number of variables in as few requests as the limit allows.
+
+        Variables are packed into batches of up to MAX_VARIABLES (counting
+        ``extra`` columns such as NAME, which every batch repeats) and the
+        batches are joined back together on their geography columns. Codes
+        the vintage does not serve are not requested; their columns are
+        returned empty.
+
+        Returns:
+            DataFrame ordered as ``extra``, ``variables``, geography columns
+        """
+        codes = list(dict.fromkeys(variables))
+        known, missing = self.check_variables(year, codes, dataset)
+        if missing:
+            print(
+                f"    ⚠️  {year}: skipping {len(missing)} code(s) not in this "
+                f"vintage: {', '.join(missing)}"
+            )
+        batches = pack_variables(known, MAX_VARIABLES - len(extra)) or [[]]
+
+        merged = None
+        for batch in batches:
+            df = self.get_dataframe(
+                year, [*extra, *batch], for_geo, in_geo, dataset, timeout
+            )
+            if merged is None:
+                merged = df
+            else:
+                keys = [col for col in df.columns if col not in batch]
+                merged = merged.merge(df, on=keys, how="outer")
+
+        for code in missing:
+            merged[code] = None
+
+        geography = [col for col in merged.columns if col not in (*extra, *codes)]
+        return merged[[*extra, *codes, *geography]]
+
+    def get_packed(
+        self,
+        year: int,
+        groups: Dict[str, Sequence[str]],
+        for_geo: str,
+        in_geo: Optional[str] = None,
+        extra: Sequence[str] = ("NAME",),
+        dataset: str = DEFAULT_DATASET,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Fetch several dataset groups together and split them back apart.
+
+        Instead of one request per group, every group's codes are packed
+        into the fewest requests the variable limit allows.
+
+        A group none of whose codes the vintage serves (e.g. B15003 before
+        2012) is left out of the result rather than returned as rows of
+        nulls, so callers see that dataset as missing for the year. Groups
+        with at least one served code keep their missing codes as empty
+        columns.
+
+        Args:
+            groups: Mapping of dataset name to its variable codes
+
+        Returns:
+            Mapping of dataset name to a DataFrame shaped like a separate
+            request for just that group (``extra``, its codes, geography)
+        """
+        codes = [code for group in groups.values() for code in group]
+        _, missing = self.check_variables(year, codes, dataset)
+        unserved = [
+            name for name, group in groups.items() if set(group) <= set(missing)
+        ]
+        if unserved:
+            print(
+                f"    ⚠️  {year}: none of the codes of {', '.join(unserved)} "
+                f"are in this vintage"
+            )
+            groups = {name: groups[name] for name in groups if name not in unserved}
+            if not groups:
+                return {}
+            codes = [code for group in groups.values() for code in group]
+
+        merged = self.get_merged(year, codes, for_geo, in_geo, extra, dataset, timeout)
+        geography = [col for col in merged.columns if col not in (*extra, *codes)]
+
+        return {
+            name: merged[[*extra, *dict.fromkeys(group), *geography]].copy()
+            for name, group in groups.items()
+        }
+
+    def get_group(
+        self,
+        year: int,
+        table: str,
+        for_geo: str,
+        in_geo: Optional[str] = None,
+        columns: Optional[Sequence[str]] = None,
+        dataset: str = DEFAULT_DATASET,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> pd.DataFrame:
+        """
+        Fetch a whole table with ``get=group(TABLE)``.
+
+        The full group response (estimates, margins of error and their
+        annotations) is cached; ``columns`` only projects it locally.
+
+        Args:
+            table: Table ID, e.g. "B15003"
+            columns: Optional variable codes to keep; columns the table does
+                not have come back empty
+
+        Returns:
+            Every column of the group, or NAME, ``columns`` and the
+            geography columns when ``columns`` is given
+        """
+        rows = self.get(year, [f"group({table})"], for_geo, in_geo, dataset, timeout)
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        if columns is None:
+            return df
+
+        codes = list(dict.fromkeys(columns))
+        for code in codes:
+            if code not in df.columns:
+                df[code] = None
+        geography = [
+            col
+            for col in df.columns
+            if not col.startswith(f"{table}_") and col not in ("NAME", "GEO_ID")
+        ]
+        return df[["NAME", *codes, *geography]]
+
+    def get_tables(
+        self,
+        year: int,
+        variables: Sequence[str],
+        for_geo: str,
+        in_geo: Optional[str] = None,
+        dataset: str = DEFAULT_DATASET,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> pd.DataFrame:
+        """
+        Fetch variables with one ``group()`` request per table they belong to.
+
+        Suited to variable lists that cover most of a few tables: the URL
+        stays short whatever the number of codes, and the cached groups can
+        serve other columns of the same tables later.
+
+        Returns:
+            DataFrame ordered as NAME, ``variables``, geography columns,
+            like get_merged()
+        """
+        codes = list(dict.fromkeys(variables))
+        by_table: Dict[str, List[str]] = {}
+        for code in codes:
+            by_table.setdefault(table_of(code), []).append(code)
+
+        merged = None
+        for table, table_codes in by_table.items():
+            df = self.get_group(
+                year, table, for_geo, in_geo, table_codes, dataset, timeout
+            )
+            if merged is None:
+                merged = df
+            else:
+                keys = [col for col in df.columns if col not in table_codes]
+                merged = merged.merge(df, on=keys, how="outer")
+
+        geography = [col for col in merged.columns if col not in ("NAME", *codes)]
+        return merged[["NAME", *codes, *geography]]
+
+
+_client: Optional[CensusClient] = None
+_client_lock = threading.Lock()
+
+
+def get_census_client() -> CensusClient:
+    """Return the process-wide shared CensusClient, creating it on first use."""
+    global _client
+
+    with _client_lock:
+        if _client is None:
+            _client = CensusClient(cache=ResponseCache(), metadata=MetadataStore())
+        return _client
+
+
+def set_census_client(client: Optional[CensusClient]) -> None:
+    """
+    Replace the shared client, e.g. with one aimed at a stand-in server.
+
+    The previous client is closed. Passing None makes the next
+    get_census_client() call build a default client again.
+    """
+    global _client
+
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
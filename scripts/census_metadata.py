@@ -0,0 +1,209 @@
+"""
+Offline index of Census variable metadata.
+
+Each ACS vintage publishes ``variables.json`` listing every variable code it
+serves. The full file is tens of megabytes, so only code, label and concept
+are kept, gzip-compressed, under data/cache/census/metadata. Fetch scripts
+check their codes against the index before sending anything, so a code that
+does not exist in one vintage is dropped from that year's request instead of
+failing the whole year.
+
+Indexes of published vintages are kept for good. Those of vintages that may
+still be revised are revalidated once the response cache's TTL has passed,
+with a conditional request on the stored ETag / Last-Modified (see
+http_validators.py), so an unchanged ``variables.json`` is not downloaded
+again.
+
+Usage:
+    python scripts/census_metadata.py 2021 "bachelor"
+    python scripts/census_metadata.py 2009 B15003_022E B15002_015E
+
+    from scripts.census_client import get_census_client
+
+    known, missing = get_census_client().check_variables(2009, codes)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_cache import DEFAULT_TTL_HOURS, is_published_vintage
+from scripts.utils import DATA_DIR
+
+METADATA_DIR = DATA_DIR / "cache" / "census" / "metadata"
+
+
+def compact_variables(payload: Dict) -> Dict[str, List[str]]:
+    """Reduce a ``variables.json`` payload to {code: [label, concept]}."""
+    return {
+        code: [info.get("label", ""), info.get("concept", "")]
+        for code, info in payload.get("variables", {}).items()
+    }
+
+
+class VariableIndex:
+    """Variable codes served by one vintage of one dataset."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        variables: Dict[str, List[str]],
+        validators: Optional[Dict[str, str]] = None,
+        fetched_at: Optional[float] = None,
+    ):
+        self.endpoint = endpoint
+        self.variables = variables
+        # ETag / Last-Modified of the variables.json it was built from
+        self.validators = validators or {}
+        self.fetched_at = fetched_at
+
+    def __contains__(self, code: str) -> bool:
+        # group(...) requests are validated by the API itself
+        return code in self.variables or code.startswith("group(")
+
+    def __len__(self) -> int:
+        return len(self.variables)
+
+    def label(self, code: str) -> Optional[str]:
+        """Return the label of a variable code, or None if it is unknown."""
+        entry = self.variables.get(code)
+        return entry[0] if entry else None
+
+    def split(self, codes: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """Split codes into those this vintage serves and those it does not."""
+        known, missing = [], []
+        for code in codes:
+            (known if code in self else missing).append(code)
+        return known, missing
+
+    def search(self, pattern: str) -> List[Tuple[str, str, str]]:
+        """
+        Find variables whose code, label or concept matches a pattern.
+
+        Args:
+            pattern: Case-insensitive regular expression
+
+        Returns:
+            Sorted list of (code, label, concept) tuples
+        """
+        regex = re.compile(pattern, re.IGNORECASE)
+        return sorted(
+            (code, label, concept)
+            for code, (label, concept) in self.variables.items()
+            if regex.search(code) or regex.search(label) or regex.search(concept)
+        )
+
+
+class MetadataStore:
+    """On-disk store of compact variable indexes, one file per endpoint."""
+
+    def __init__(
+        self, directory: Path = METADATA_DIR, ttl_hours: float = DEFAULT_TTL_HOURS
+    ):
+        self.directory = Path(directory)
+        self.ttl_seconds = ttl_hours * 3600
+
+    def path_for(self, endpoint: str) -> Path:
+        """Return the file that stores the index for ``endpoint``."""
+        digest = hashlib.sha256(endpoint.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest[:16]}.json.gz"
+
+    def load(self, endpoint: str) -> Optional[VariableIndex]:
+        """Return the stored index for ``endpoint``, or None if missing."""
+        path = self.path_for(endpoint)
+        if not path.exists():
+            return None
+
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        return VariableIndex(
+            entry["endpoint"],
+            entry["variables"],
+            entry.get("validators"),
+            entry.get("fetched_at"),
+        )
+
+    def is_stale(self, index: VariableIndex, year: int) -> bool:
+        """Return True if a stored index should be revalidated with the API."""
+        if is_published_vintage(year):
+            return False
+        return time.time() - (index.fetched_at or 0) > self.ttl_seconds
+
+    def save(
+        self,
+        endpoint: str,
+        variables: Dict[str, List[str]],
+        validators: Optional[Dict[str, str]] = None,
+    ) -> VariableIndex:
+        """Store an index for ``endpoint``; the write is atomic."""
+        path = self.path_for(endpoint)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        entry = {
+            "endpoint": endpoint,
+            "variables": variables,
+            "validators": validators or {},
+            "fetched_at": time.time(),
+        }
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        os.close(fd)
+        with gzip.open(tmp_name, "wt", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_name, path)
+
+        return VariableIndex(endpoint, variables, validators, entry["fetched_at"])
+
+
+def main():
+    """Look up variable codes or search labels in a vintage's index."""
+    from scripts.census_client import get_census_client
+
+    parser = argparse.ArgumentParser(
+        description="Search or check Census variable codes for an ACS vintage"
+    )
+    parser.add_argument("year", type=int, help="ACS vintage, e.g. 2021")
+    parser.add_argument(
+        "terms",
+        nargs="+",
+        help="Variable codes to check, or a pattern to search labels for",
+    )
+    parser.add_argument("--dataset", default="acs/acs5", help="Dataset path")
+    args = parser.parse_args()
+
+    index = get_census_client().variable_index(args.year, args.dataset)
+    if index is None:
+        sys.exit(1)
+
+    print(f"📚 {index.endpoint}: {len(index):,} variables")
+
+    if all(re.fullmatch(r"[A-Z]\d{5}[A-Z]?_\d{3}[A-Z]+", term) for term in args.terms):
+        for code in args.terms:
+            label = index.label(code)
+            print(f"  {'✓' if label else '✗'} {code}  {label or 'not in this vintage'}")
+        return
+
+    matches = index.search(" ".join(args.terms))
+    for code, label, concept in matches[:50]:
+        print(f"  {code:<14} {label}  [{concept}]")
+    if len(matches) > 50:
+        print(f"  ... {len(matches) - 50} more")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,15 +11,20 @@ The Census Bureau has data at different geographic levels:
 This script checks what's available for Scott County.
 """
 
-import os
+import sys
 from pathlib import Path
 
-import requests
 from dotenv import load_dotenv
 
 # Load environment
 load_dotenv()
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_client import get_census_client
+
 STATE_FIPS = "19"  # Iowa
 COUNTY_FIPS = "163"  # Scott County
 
@@ -35,19 +40,9 @@ def check_places_in_county():
     print("CHECKING PLACES (CITIES/TOWNS) IN SCOTT COUNTY, IOWA")
     print("=" * 80)
 
-    # Get all places in Iowa
-    url = (
-        f"https://api.census.gov/data/2021/acs/acs5"
-        f"?get=NAME"
-        f"&for=place:*"
-        f"&in=state:{STATE_FIPS}"
-    )
-
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        data = response.json()
+        # Get all places in Iowa
+        data = get_census_client().get(2021, ["NAME"], "place:*", f"state:{STATE_FIPS}")
         places = [row[0] for row in data[1:]]
 
         print(f"\nFound {len(places)} places in Iowa")
@@ -100,19 +95,14 @@ def check_tracts_in_county():
     print("CHECKING CENSUS TRACTS IN SCOTT COUNTY")
     print("=" * 80)
 
-    # Get tracts in Scott County
-    url = (
-        f"https://api.census.gov/data/2021/acs/acs5"
-        f"?get=NAME,B01003_001E"  # Include population
-        f"&for=tract:*"
-        f"&in=state:{STATE_FIPS}%20county:{COUNTY_FIPS}"
-    )
-
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        data = response.json()
+        # Get tracts in Scott County (with population)
+        data = get_census_client().get(
+            2021,
+            ["NAME", "B01003_001E"],
+            "tract:*",
+            f"state:{STATE_FIPS} county:{COUNTY_FIPS}",
+        )
         tracts = data[1:]
 
         print(f"\n✓ Found {len(tracts)} census tracts in Scott County")
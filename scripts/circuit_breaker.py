@@ -0,0 +1,137 @@
+"""
+Per-host circuit breaker and whole-run deadline for API fetch loops.
+
+When an API is down, every request would otherwise wait out its full
+timeout and retries before failing. The breaker counts consecutive failed
+attempts per host. Once ``threshold`` is reached, the circuit opens and
+further calls to that host fail at once with CircuitOpenError. After
+``cooldown`` seconds a single probe request is let through: success closes
+the circuit, failure opens it for another cooldown.
+
+A Deadline bounds a whole run. Each request's timeout is cut to the time
+left, and once it is spent requests fail with DeadlineExceeded instead of
+being sent.
+
+Both errors subclass the ``requests`` exceptions, so fetch loops that
+already handle RequestException mark the remaining calls as failed without
+any changes.
+
+Usage:
+    from scripts.circuit_breaker import CircuitBreaker, Deadline
+
+    breaker = CircuitBreaker(threshold=5, cooldown=60)
+    breaker.before_call("api.census.gov")    # raises CircuitOpenError if open
+    breaker.record_failure("api.census.gov")
+    breaker.record_success("api.census.gov")
+
+    deadline = Deadline(300)
+    timeout = deadline.timeout(30)          # min(30, seconds left)
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+# Consecutive failed attempts before a host's circuit opens
+FAILURE_THRESHOLD = 5
+
+# Seconds an open circuit waits before letting a probe request through
+COOLDOWN = 60.0
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised instead of sending a request once the run's deadline has passed."""
+
+
+class CircuitBreaker:
+    """Thread-safe consecutive-failure breaker, tracked per host."""
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN):
+        if threshold < 1:
+            raise ValueError("threshold must be at least 1")
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures: Dict[str, int] = {}
+        self._opened_at: Dict[str, float] = {}
+        self._probing: Dict[str, bool] = {}
+        self._lock = threading.Lock()
+
+    def is_open(self, host: str) -> bool:
+        """Return True while calls to ``host`` are being refused."""
+        with self._lock:
+            return host in self._opened_at
+
+    def open_hosts(self):
+        """Return the hosts whose circuit is currently open."""
+        with self._lock:
+            return sorted(self._opened_at)
+
+    def before_call(self, host: str) -> None:
+        """
+        Allow a call to ``host`` or refuse it.
+
+        Raises:
+            CircuitOpenError: If the circuit is open and no probe is due
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(host)
+            if opened_at is None:
+                return
+
+            waited = time.monotonic() - opened_at
+            if waited >= self.cooldown and not self._probing.get(host):
+                self._probing[host] = True
+                return
+
+        raise CircuitOpenError(
+            f"circuit open for {host} after {self.threshold} consecutive failures"
+        )
+
+    def record_success(self, host: str) -> None:
+        """Close the circuit and reset the failure count for ``host``."""
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened_at.pop(host, None)
+            self._probing.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        """Count a failed attempt; open the circuit at the threshold."""
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures >= self.threshold or self._probing.get(host):
+                self._opened_at[host] = time.monotonic()
+                self._probing[host] = False
+
+
+class Deadline:
+    """Fixed point in time by which a whole run must finish."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, default: Optional[float]) -> float:
+        """
+        Cut a request timeout to the time left before the deadline.
+
+        Raises:
+            DeadlineExceeded: If no time is left
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"run deadline of {self.seconds:g}s exceeded")
+        return remaining if default is None else min(default, remaining)
@@ -5,23 +5,22 @@ Shows how Scott County performs relative to the state across education,
 income, demographics, housing, and employment metrics.
 """
 
-import glob
+import sys
 from pathlib import Path
 
 import pandas as pd
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 DATA_DIR = PROJECT_ROOT / "data" / "raw"
 
+from scripts import data_lake
+
 
 def load_latest_data(pattern: str) -> pd.DataFrame:
-    """Load the most recent file matching the pattern."""
-    files = glob.glob(str(DATA_DIR / pattern))
-    if not files:
-        return None
-    latest_file = max(files)
-    return pd.read_csv(latest_file)
+    """Load the table (or most recent file) matching the pattern."""
+    return data_lake.load_latest(pattern, DATA_DIR)
 
 
 def compare_education(county_df: pd.DataFrame, state_df: pd.DataFrame):
@@ -2,21 +2,21 @@
 Simple comparison script that works with actual column names.
 """
 
-import glob
+import sys
 from pathlib import Path
 
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 DATA_DIR = PROJECT_ROOT / "data" / "raw"
 
+from scripts import data_lake
+
 
 def load_latest(pattern):
-    """Load most recent file matching pattern."""
-    files = glob.glob(str(DATA_DIR / pattern))
-    if not files:
-        return None
-    return pd.read_csv(max(files))
+    """Load the table (or most recent file) matching pattern."""
+    return data_lake.load_latest(pattern, DATA_DIR)
 
 
 def main():
@@ -0,0 +1,396 @@
+"""
+Columnar data lake of typed, compressed Parquet tables.
+
+The fetch scripts used to write a new ``<name>_<YYYYmmdd_HHMMSS>.csv`` into
+data/raw on every run, and each reader re-parsed the text and re-inferred
+its types. Tables in the lake are zstd-compressed Parquet, keep their
+dtypes, and are partitioned by source, dataset and year (Hive-style, so
+DuckDB, pyarrow and pandas can read them as they are):
+
+    data/lake/source=<source>/dataset=<name>/year=<year>/part-<id>.parquet
+    data/lake/source=<source>/dataset=<name>/_manifest.json
+
+Rows without a year go to the ``year=__HIVE_DEFAULT_PARTITION__`` partition.
+Tables whose ``year`` column is just another field (Socrata datasets, where
+it may hold text such as "2019-2020") are written with ``by_year=False`` and
+keep all their rows in that one partition.
+
+Writes are atomic commits. New part files are written under fresh names,
+then the table's manifest is replaced in a single rename; only then are the
+superseded files deleted. Readers go through the manifest, so they see
+either the previous version of the table or the new one, never a mix.
+By default a write replaces the years present in the new rows and keeps the
+others, so appending a new ACS year touches one partition.
+
+Tables are named after the files they replace, without the timestamp
+(``scott_county_iowa_income_historical``), so loaders can still look a
+dataset up by its old data/raw file pattern (load_latest).
+
+Usage:
+    from scripts.data_lake import LakeTable, load_latest, read_table, write_table
+
+    write_table(df, "census", "iowa_state_income_historical")
+    df = read_table("census", "iowa_state_income_historical", years=[2020, 2021])
+    df = load_latest("iowa_state_income_historical_*.csv")
+"""
+
+import fnmatch
+import glob
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.utils import DATA_DIR
+
+LAKE_DIR = DATA_DIR / "lake"
+RAW_DIR = DATA_DIR / "raw"
+
+MANIFEST_FILE = "_manifest.json"
+
+# Files being downloaded into a table, before they are committed
+STAGING_DIR = "_downloads"
+COMPRESSION = "zstd"
+
+# Partition of rows without a year (the Hive / pyarrow convention)
+DEFAULT_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# Write modes: replace only the years written, or the whole table
+REPLACE_YEARS = "replace_years"
+OVERWRITE = "overwrite"
+
+# Stand-in for the timestamp of the data/raw files a table replaces
+LEGACY_TIMESTAMP = "00000000_000000"
+
+# Serializes commits to the same table between threads
+_commit_lock = threading.Lock()
+
+
+def arrow_table(df: pd.DataFrame) -> pa.Table:
+    """
+    Convert a DataFrame to Arrow, keeping its dtypes.
+
+    Object columns holding a mix of types (e.g. numbers and text) cannot be
+    typed as either, so they are stored as text.
+    """
+    mixed = {
+        name: "string"
+        for name in df.columns
+        if df[name].dtype == object
+        and pd.api.types.infer_dtype(df[name], skipna=True).startswith("mixed")
+    }
+    return pa.Table.from_pandas(df.astype(mixed) if mixed else df, preserve_index=False)
+
+
+class LakeTable:
+    """One dataset of one source in the lake."""
+
+    def __init__(self, source: str, dataset: str, root: Path = LAKE_DIR):
+        self.source = source
+        self.dataset = dataset
+        self.root = Path(root)
+        self.path = self.root / f"source={source}" / f"dataset={dataset}"
+        self.manifest_path = self.path / MANIFEST_FILE
+
+    @classmethod
+    def at(cls, path) -> "LakeTable":
+        """Return the table stored in a ``source=<s>/dataset=<d>`` directory."""
+        path = Path(path)
+        source = path.parent.name.split("=", 1)[1]
+        dataset = path.name.split("=", 1)[1]
+        return cls(source, dataset, path.parent.parent)
+
+    def __repr__(self) -> str:
+        return f"LakeTable({self.source!r}, {self.dataset!r})"
+
+    def manifest(self) -> Dict:
+        """Return the committed manifest (empty if nothing was committed)."""
+        if not self.manifest_path.exists():
+            return {"files": {}}
+        return json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def exists(self) -> bool:
+        return bool(self.manifest()["files"])
+
+    def files(self) -> List[Path]:
+        """Return the committed part files, in year order."""
+        entries = self.manifest()["files"]
+        return [self.path / name for name in sorted(entries)]
+
+    def years(self) -> List[int]:
+        """Return the years stored (rows without a year are left out)."""
+        years = {entry["year"] for entry in self.manifest()["files"].values()}
+        return sorted(year for year in years if year is not None)
+
+    def rows(self) -> int:
+        return sum(entry["rows"] for entry in self.manifest()["files"].values())
+
+    def size_bytes(self) -> int:
+        """Return the size of the committed part files on disk."""
+        return sum(path.stat().st_size for path in self.files())
+
+    def write(
+        self,
+        df: pd.DataFrame,
+        year: Optional[int] = None,
+        mode: str = REPLACE_YEARS,
+        by_year: bool = True,
+    ) -> "LakeTable":
+        """
+        Commit rows to the table.
+
+        Rows are partitioned by their ``year`` column, or all go to ``year``
+        when the frame has none or ``by_year`` is False.
+
+        Args:
+            df: Rows to write
+            year: Year of every row, for frames without a year column
+            mode: REPLACE_YEARS replaces the partitions of the years written
+                and keeps the others; OVERWRITE replaces the whole table
+            by_year: Partition by the ``year`` column, which must then hold
+                whole numbers
+
+        Returns:
+            The table
+
+        Raises:
+            ValueError: If partitioning by a ``year`` column holding values
+                that are not whole numbers
+        """
+        if mode not in (REPLACE_YEARS, OVERWRITE):
+            raise ValueError(f"unknown write mode: {mode}")
+
+        if by_year and "year" in df.columns:
+            years = pd.to_numeric(df["year"], errors="coerce")
+            invalid = df["year"].notna() & (years.isna() | (years % 1 != 0))
+            if invalid.any():
+                raise ValueError(
+                    f"year column holds {df['year'][invalid].iloc[0]!r}; "
+                    "write with by_year=False to keep it as a field"
+                )
+            groups = [
+                (None if pd.isna(value) else int(value), part)
+                for value, part in df.groupby(years, dropna=False, sort=True)
+            ]
+        else:
+            groups = [(year, df)]
+
+        written = {}
+        try:
+            for value, part in groups:
+                name = self._write_part(part, value)
+                written[name] = {"year": value, "rows": len(part)}
+            replaced = self._commit(written, mode)
+        except BaseException:
+            # Nothing was committed; readers never saw these files
+            for name in written:
+                (self.path / name).unlink(missing_ok=True)
+            raise
+
+        for name in replaced:
+            (self.path / name).unlink(missing_ok=True)
+        return self
+
+    def add_file(
+        self, path, year: Optional[int] = None, mode: str = REPLACE_YEARS
+    ) -> Path:
+        """
+        Commit an already written Parquet file as one partition.
+
+        Lets a download be streamed to disk (e.g. to staging_file()) and
+        committed without reading it back into memory. The file is moved
+        into the table.
+
+        Args:
+            path: Parquet file, on the same filesystem as the table
+            year: Year of every row in the file (None for no year)
+            mode: REPLACE_YEARS or OVERWRITE, as for write()
+
+        Returns:
+            Path of the committed part file
+        """
+        if mode not in (REPLACE_YEARS, OVERWRITE):
+            raise ValueError(f"unknown write mode: {mode}")
+
+        name = self._part_name(year)
+        target = self.path / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(path, target)
+
+        written = {
+            name: {"year": year, "rows": pq.ParquetFile(target).metadata.num_rows}
+        }
+        try:
+            replaced = self._commit(written, mode)
+        except BaseException:
+            target.unlink(missing_ok=True)
+            raise
+
+        for name in replaced:
+            (self.path / name).unlink(missing_ok=True)
+        return target
+
+    def staging_file(self, suffix: str = ".parquet") -> Path:
+        """
+        Return a new file path for staging data before add_file().
+
+        Staged files live under ``_downloads/`` in the table directory, which
+        readers of the table (and of Hive-style datasets) ignore.
+        """
+        directory = self.path / STAGING_DIR
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / f"{uuid.uuid4().hex[:12]}{suffix}"
+
+    def _part_name(self, year: Optional[int]) -> str:
+        """Return a new part file name, relative to the table."""
+        partition = f"year={DEFAULT_PARTITION if year is None else year}"
+        return f"{partition}/part-{uuid.uuid4().hex[:12]}.parquet"
+
+    def _write_part(self, df: pd.DataFrame, year: Optional[int]) -> str:
+        """Write one partition file; returns its name relative to the table."""
+        name = self._part_name(year)
+        path = self.path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        pq.write_table(arrow_table(df), tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, path)
+        return name
+
+    def _commit(self, written: Dict[str, Dict], mode: str) -> List[str]:
+        """Swap the new files into the manifest; returns the superseded ones."""
+        with _commit_lock:
+            files = self.manifest()["files"]
+            years = {entry["year"] for entry in written.values()}
+            replaced = [
+                name
+                for name, entry in files.items()
+                if mode == OVERWRITE or entry["year"] in years
+            ]
+            for name in replaced:
+                del files[name]
+            files.update(written)
+
+            manifest = {
+                "source": self.source,
+                "dataset": self.dataset,
+                "committed_at": datetime.now().isoformat(timespec="seconds"),
+                "files": files,
+            }
+            self.path.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_name, self.manifest_path)
+
+        return replaced
+
+    def read(
+        self,
+        columns: Optional[List[str]] = None,
+        years: Optional[Iterable[int]] = None,
+    ) -> pd.DataFrame:
+        """
+        Read the committed table back with its dtypes.
+
+        Args:
+            columns: Only read these columns
+            years: Only read these years' partitions
+
+        Returns:
+            DataFrame (empty if nothing was committed)
+        """
+        entries = self.manifest()["files"]
+        wanted = None if years is None else {int(year) for year in years}
+        names = [
+            name
+            for name in sorted(entries)
+            if wanted is None or entries[name]["year"] in wanted
+        ]
+        if not names:
+            return pd.DataFrame(columns=columns)
+
+        # Years are written separately, so a column may be missing, all null,
+        # or int64 in one year and float64 (with NaN) in another; widen them
+        tables = [pq.read_table(self.path / name, columns=columns) for name in names]
+        return pa.concat_tables(tables, promote_options="permissive").to_pandas()
+
+
+def write_table(
+    df: pd.DataFrame,
+    source: str,
+    dataset: str,
+    year: Optional[int] = None,
+    mode: str = REPLACE_YEARS,
+    root: Path = LAKE_DIR,
+    by_year: bool = True,
+) -> LakeTable:
+    """Commit rows to a lake table (see LakeTable.write)."""
+    return LakeTable(source, dataset, root).write(df, year, mode, by_year)
+
+
+def read_table(
+    source: str,
+    dataset: str,
+    columns: Optional[List[str]] = None,
+    years: Optional[Iterable[int]] = None,
+    root: Path = LAKE_DIR,
+) -> pd.DataFrame:
+    """Read a lake table (see LakeTable.read)."""
+    return LakeTable(source, dataset, root).read(columns, years)
+
+
+def find_tables(pattern: str, root: Path = LAKE_DIR) -> List[LakeTable]:
+    """
+    Find the tables that replace the data/raw files matching a glob pattern.
+
+    A table stands for the timestamped files it replaces, so
+    ``"scott_county_iowa_*_historical_*.csv"`` finds every
+    ``scott_county_iowa_<dataset>_historical`` table.
+
+    Returns:
+        Matching tables with committed data, sorted by dataset name
+    """
+    tables = []
+    for manifest in sorted(Path(root).glob(f"source=*/dataset=*/{MANIFEST_FILE}")):
+        table = LakeTable.at(manifest.parent)
+        candidates = (f"{table.dataset}_{LEGACY_TIMESTAMP}.csv", f"{table.dataset}.csv")
+        if any(fnmatch.fnmatch(name, pattern) for name in candidates):
+            if table.exists():
+                tables.append(table)
+    return sorted(tables, key=lambda table: table.dataset)
+
+
+def load_latest(
+    pattern: str, raw_dir: Path = RAW_DIR, root: Path = LAKE_DIR
+) -> Optional[pd.DataFrame]:
+    """
+    Load a dataset by its data/raw file pattern.
+
+    The lake table is preferred; files written before the lake existed are
+    still found, newest first.
+
+    Args:
+        pattern: Glob pattern of the dataset's files in data/raw, e.g.
+            ``"iowa_state_income_historical_*.csv"``
+        raw_dir: Directory of the legacy CSV files
+
+    Returns:
+        DataFrame, or None if neither a table nor a file matches
+    """
+    tables = find_tables(pattern, root)
+    if tables:
+        return tables[0].read()
+
+    files = glob.glob(str(Path(raw_dir) / pattern))
+    if not files:
+        return None
+    return pd.read_csv(max(files))
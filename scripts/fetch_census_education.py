@@ -8,6 +8,7 @@ data by geography (national, state, county, tract levels).
 Usage:
     python scripts/fetch_census_education.py --geography state --year 2020
     python scripts/fetch_census_education.py --geography county --state 06 --year 2020
+    python scripts/fetch_census_education.py --geography tract --states all
     python scripts/fetch_census_education.py --help
 
 Notes:
@@ -15,21 +16,34 @@ Notes:
     - Add to .env: CENSUS_API_KEY=your_key_here
     - 2020 Decennial Census is most recent
     - Educational attainment is from ACS (American Community Survey), not pure Decennial
+    - With --states (or --stream), county/tract data is fetched state by state,
+      several states at a time, and each state is appended to a Parquet file
+      as it arrives, so a national tract pull never holds every tract in memory
 """
 
 import argparse
 import os
 import sys
 from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import requests
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_async import run_concurrently
+from scripts.census_client import get_census_client
+
 # State FIPS codes for reference
 STATE_FIPS = {
     "01": "Alabama",
@@ -87,7 +101,8 @@ STATE_FIPS = {
 }
 
 # Educational Attainment Variables (ACS 5-Year Estimates)
-# These are the most comprehensive education variables available
+# These are the most comprehensive education variables available. Each set
+# lives in a single table and is fetched with one group() request.
 EDUCATION_VARIABLES = {
     "B15003_001E": "Total population 25 years and over",
     "B15003_002E": "No schooling completed",
@@ -133,10 +148,13 @@ EDUCATION_SUMMARY = {
     "B15002_035E": "Female: Doctorate degree",
 }
 
+# Columns that identify a geography rather than hold a count
+GEOGRAPHY_COLUMNS = ["NAME", "state", "county", "tract"]
+
 
 def check_api_key():
     """Check if Census API key is available."""
-    api_key = os.getenv("CENSUS_API_KEY")
+    api_key = get_census_client().api_key
 
     if not api_key:
         print("\n" + "=" * 80)
@@ -174,10 +192,6 @@ def fetch_acs_education(geography, year=2021, state=None, detailed=False):
 
     # Select variable set
     variables = EDUCATION_VARIABLES if detailed else EDUCATION_SUMMARY
-    var_list = ",".join(variables.keys())
-
-    # Build API URL based on geography
-    base_url = f"https://api.census.gov/data/{year}/acs/acs5"
 
     # Build geography string
     if geography == "us":
@@ -213,35 +227,15 @@ def fetch_acs_education(geography, year=2021, state=None, detailed=False):
     )
     print("=" * 80 + "\n")
 
-    # Build request URL
-    params = {
-        "get": f"NAME,{var_list}",
-        "for": geo_str.split("&in=")[0].replace("for=", ""),
-        "key": api_key,
-    }
-
-    if "&in=" in geo_str:
-        params["in"] = geo_str.split("&in=")[1]
+    # Split the geography string into its for/in clauses
+    for_geo, _, in_geo = geo_str.partition("&in=")
 
     try:
         print("Downloading data from Census Bureau API...")
-        response = requests.get(base_url, params=params, timeout=30)
-        response.raise_for_status()
-
-        data = response.json()
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data[1:], columns=data[0])
-
-        # Rename columns to human-readable names
-        for var_code, var_name in variables.items():
-            if var_code in df.columns:
-                df.rename(columns={var_code: var_name}, inplace=True)
-
-        # Convert numeric columns
-        for col in df.columns:
-            if col not in ["NAME", "state", "county", "tract"]:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+        df = get_census_client().get_tables(
+            year, list(variables), for_geo, in_geo or None
+        )
+        df = tidy_education(df, variables)
 
         print(f"✓ Downloaded {len(df):,} geographic areas")
         print(f"✓ Columns: {len(df.columns)}")
@@ -261,13 +255,134 @@ def fetch_acs_education(geography, year=2021, state=None, detailed=False):
         return None
 
 
-def calculate_education_metrics(df):
+def tidy_education(df, variables):
+    """Rename variable codes to readable names and convert values to numbers."""
+    # Rename columns to human-readable names
+    for var_code, var_name in variables.items():
+        if var_code in df.columns:
+            df.rename(columns={var_code: var_name}, inplace=True)
+
+    # Convert numeric columns
+    for col in df.columns:
+        if col not in GEOGRAPHY_COLUMNS:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
+
+
+def fetch_state_part(geography, state, year, variables, metrics=True):
+    """
+    Fetch every county or tract in one state, ready to append to a file.
+
+    Counts are stored as floats so every state shares one column schema.
+    """
+    df = get_census_client().get_tables(
+        year, list(variables), f"{geography}:*", f"state:{state}"
+    )
+    df = tidy_education(df, variables)
+    numeric_cols = [col for col in df.columns if col not in GEOGRAPHY_COLUMNS]
+    df[numeric_cols] = df[numeric_cols].astype("float64")
+
+    if metrics:
+        df = calculate_education_metrics(df, verbose=False)
+    return df
+
+
+def stream_by_state(
+    geography, states, year=2021, detailed=False, metrics=True, concurrency=4
+):
+    """
+    Fetch a geography state by state and stream it into one Parquet file.
+
+    Several states are requested at once; each state's rows are appended to
+    the file as a row group the moment they arrive and then dropped, so
+    memory holds only the states in flight.
+
+    Args:
+        geography: 'county' or 'tract'
+        states: State FIPS codes to fetch
+        year: Year for ACS 5-year estimates
+        detailed: Use detailed variables (25 categories) vs summary (14 categories)
+        metrics: Add percentage and aggregate columns
+        concurrency: Number of states fetched at once
+
+    Returns:
+        Tuple of (output file or None, rows written, failed state codes)
+    """
+    if not check_api_key():
+        return None, 0, list(states)
+
+    variables = EDUCATION_VARIABLES if detailed else EDUCATION_SUMMARY
+
+    output_dir = Path("data/raw")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    scope = "all" if len(states) == len(STATE_FIPS) else "_".join(states)
+    if len(scope) > 40:
+        scope = f"{len(states)}states"
+    output_file = (
+        output_dir / f"census_education_{year}_{geography}_{scope}_{timestamp}.parquet"
+    )
+    tmp_file = output_file.with_suffix(".parquet.tmp")
+
+    print("\n" + "=" * 80)
+    print("STREAMING CENSUS EDUCATION DATA")
+    print("=" * 80)
+    print(f"Dataset: American Community Survey (ACS) {year} 5-Year Estimates")
+    print(f"Geography: {geography} in {len(states)} state(s), {concurrency} at a time")
+    print(f"Variables: {len(variables)} education indicators")
+    print(f"Output: {output_file}")
+    print("=" * 80 + "\n")
+
+    calls = {
+        state: partial(fetch_state_part, geography, state, year, variables, metrics)
+        for state in states
+    }
+    writer = None
+    rows = 0
+
+    def write_state(state, df):
+        nonlocal writer, rows
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_file, table.schema)
+        else:
+            table = table.select(writer.schema.names).cast(writer.schema)
+        writer.write_table(table)
+        rows += len(df)
+        print(f"  ✓ {STATE_FIPS.get(state, state)}: {len(df):,} areas")
+
+    try:
+        results = run_concurrently(
+            calls, concurrency=concurrency, on_result=write_state
+        )
+    except BaseException:
+        # Failed or interrupted (Ctrl-C): leave no partial file behind
+        if writer is not None:
+            writer.close()
+        tmp_file.unlink(missing_ok=True)
+        raise
+    if writer is not None:
+        writer.close()
+
+    failed = sorted(state for state, result in results.items() if result is not None)
+    for state in failed:
+        print(f"  ✗ {STATE_FIPS.get(state, state)}: {results[state]}")
+
+    if writer is None:
+        return None, 0, failed
+
+    os.replace(tmp_file, output_file)
+    return output_file, rows, failed
+
+
+def calculate_education_metrics(df, verbose=True):
     """Calculate useful education metrics from the raw data."""
-    print("\nCalculating education metrics...")
+    if verbose:
+        print("\nCalculating education metrics...")
 
     # Identify numeric columns (exclude geographic identifiers)
-    exclude_cols = ["NAME", "state", "county", "tract"]
-    numeric_cols = [col for col in df.columns if col not in exclude_cols]
+    numeric_cols = [col for col in df.columns if col not in GEOGRAPHY_COLUMNS]
 
     # Calculate percentages if we have total population
     total_col = next((col for col in numeric_cols if "Total population" in col), None)
@@ -294,8 +409,9 @@ def calculate_education_metrics(df):
                 df["Bachelor's degree or higher"] / df[total_col] * 100
             ).round(2)
 
-        print("✓ Calculated percentage distributions")
-        print("✓ Created aggregate education categories")
+        if verbose:
+            print("✓ Calculated percentage distributions")
+            print("✓ Created aggregate education categories")
 
     return df
 
@@ -386,6 +502,12 @@ Examples:
   # Census tracts in Texas
   python scripts/fetch_census_education.py --geography tract --state 48
 
+  # Every census tract in the US, streamed state by state to Parquet
+  python scripts/fetch_census_education.py --geography tract --states all
+
+  # Tracts in Iowa and Illinois, 8 states at a time
+  python scripts/fetch_census_education.py --geography tract --states 19 17 --concurrency 8
+
 Common State FIPS Codes:
   06 = California    36 = New York      48 = Texas
   12 = Florida       17 = Illinois      42 = Pennsylvania
@@ -427,9 +549,61 @@ Note: Requires free Census API key from https://api.census.gov/data/key_signup.h
         action="store_true",
         help="Skip calculating percentage and aggregate metrics",
     )
+    parser.add_argument(
+        "--states",
+        nargs="+",
+        help="County/tract: fetch these state FIPS codes (or 'all') one state "
+        "at a time, streaming to Parquet",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream --state county/tract data to Parquet instead of one CSV",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="States fetched at once in streaming mode (default: 4)",
+    )
 
     args = parser.parse_args()
 
+    if args.states or args.stream:
+        if args.geography not in ("county", "tract"):
+            parser.error("--states/--stream apply to county and tract geographies")
+        if args.states == ["all"]:
+            states = list(STATE_FIPS)
+        elif args.states:
+            states = [state.zfill(2) for state in args.states]
+        elif args.state:
+            states = [args.state.zfill(2)]
+        else:
+            parser.error("--stream needs --state or --states")
+
+        try:
+            output_file, rows, failed = stream_by_state(
+                args.geography,
+                states,
+                year=args.year,
+                detailed=args.detailed,
+                metrics=not args.no_metrics,
+                concurrency=args.concurrency,
+            )
+        except KeyboardInterrupt:
+            print("\n\n⚠ Interrupted by user")
+            sys.exit(1)
+
+        if output_file:
+            file_size_mb = output_file.stat().st_size / (1024 * 1024)
+            print(f"\n✓ Saved to: {output_file}")
+            print(f"✓ Records: {rows:,}")
+            print(f"✓ Size: {file_size_mb:.2f} MB")
+            print(f"\n   df = pd.read_parquet('{output_file}')")
+        if failed:
+            print(f"\n⚠ Failed states: {', '.join(failed)} - re-run with --states")
+        sys.exit(0 if output_file and not failed else 1)
+
     try:
         # Fetch data
         df = fetch_acs_education(
@@ -6,13 +6,25 @@ This script fetches the same metrics as Scott County for:
 - Black Hawk County (Waterloo)
 - Dubuque County (Dubuque)
 
+Counties in the same state are fetched together, and all categories share
+packed requests: each year is one request per state, not one per county per
+category.
+
+Every completed (county, category, year) is checkpointed to
+data/cache/jobs/comparison_counties.jsonl. If a run crashes or is
+interrupted, the next run resumes from the checkpoint instead of starting
+over; the checkpoint is removed once every year has been fetched.
+
 Usage:
     python scripts/fetch_comparison_counties.py
+    python scripts/fetch_comparison_counties.py --refresh
+    python scripts/fetch_comparison_counties.py --batch    # unattended
+    python scripts/fetch_comparison_counties.py --restart  # ignore checkpoint
+    python scripts/fetch_comparison_counties.py --batch --deadline 300
 """
 
-import os
+import argparse
 import sys
-import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -24,6 +36,11 @@ import requests
 PROJECT_ROOT = Path(__file__).parent.parent
 sys.path.append(str(PROJECT_ROOT))
 
+from scripts.census_client import get_census_client
+from scripts.circuit_breaker import Deadline
+from scripts.data_lake import write_table
+from scripts.job_checkpoint import JobCheckpoint
+
 # Configuration
 DATA_DIR = PROJECT_ROOT / "data" / "raw"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
@@ -37,8 +54,8 @@ COUNTIES = {
 
 STATE_FIPS = "19"  # Iowa
 
-# Census API base URL
-BASE_URL = "https://api.census.gov/data"
+# Name of the resumable job's checkpoint file
+CHECKPOINT_JOB = "comparison_counties"
 
 # Years to fetch (ACS 5-year estimates)
 YEARS = list(range(2009, 2022))  # 2009-2021
@@ -73,133 +90,181 @@ VARIABLE_GROUPS = {
 }
 
 
-def get_census_api_key() -> Optional[str]:
-    """Get Census API key from environment."""
-    api_key = os.getenv("CENSUS_API_KEY")
-    if not api_key:
-        print("⚠️  Warning: CENSUS_API_KEY not found in environment")
-        print(
-            "   You can get a free key at: https://api.census.gov/data/key_signup.html"
-        )
-        print("   Set it with: $env:CENSUS_API_KEY='your_key_here'")
-    return api_key
+def plan_county_requests(counties: Dict[str, Dict]) -> Dict[str, List[str]]:
+    """
+    Group counties by state so each state needs only one request.
+
+    The Census API accepts a comma-separated county list
+    (``for=county:113,013,061&in=state:19``), so every county sharing a
+    state can be fetched in a single call per category and year.
 
+    Returns:
+        Mapping of state FIPS to the county FIPS codes requested in it
+    """
+    plan: Dict[str, List[str]] = {}
+    for county_info in counties.values():
+        state = county_info.get("state", STATE_FIPS)
+        plan.setdefault(state, []).append(county_info["fips"])
+    return plan
 
-def fetch_acs_data(
+
+def fetch_acs_counties(
     year: int,
     variables: List[str],
     state: str,
-    county: str,
-    api_key: Optional[str] = None,
-) -> Optional[Dict]:
-    """Fetch ACS 5-year estimate data for a county."""
-
-    # Build URL
-    var_string = ",".join(variables)
-    url = f"{BASE_URL}/{year}/acs/acs5"
-
-    params = {
-        "get": var_string,
-        "for": f"county:{county}",
-        "in": f"state:{state}",
-    }
+    counties: List[str],
+) -> Dict[str, Dict]:
+    """
+    Fetch ACS 5-year estimate data for several counties in one request.
 
-    if api_key:
-        params["key"] = api_key
+    Variables beyond the API's 50-variable limit are packed into extra
+    requests and joined back together per county.
 
-    try:
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-
-        data = response.json()
-        if len(data) > 1:
-            # First row is headers, second row is data
-            headers = data[0]
-            values = data[1]
-            return dict(zip(headers, values))
-        return None
+    Returns:
+        Mapping of county FIPS to that county's row (empty on error)
+    """
 
+    try:
+        df = get_census_client().get_merged(
+            year, variables, f"county:{','.join(counties)}", f"state:{state}", extra=()
+        )
     except requests.exceptions.RequestException as e:
         print(f"    ⚠️  Error fetching {year}: {e}")
-        return None
+        return {}
 
+    # One row per county
+    return {row["county"]: row for row in df.to_dict("records")}
 
-def fetch_county_data(
-    county_key: str, county_info: Dict, api_key: Optional[str] = None
-) -> Dict[str, pd.DataFrame]:
-    """Fetch all data categories for a county."""
 
-    print(f"\n{'=' * 80}")
-    print(f"Fetching data for {county_info['name']} ({county_info['city']})")
-    print(f"{'=' * 80}\n")
+def parse_row(year: int, variables: Dict[str, str], data: Dict) -> Dict:
+    """Map variable codes in an API row to friendly names and floats."""
+    row = {"year": year}
 
-    results = {}
+    for var_code, var_name in variables.items():
+        value = data.get(var_code)
+        if value and value != "-666666666":  # Census null value
+            try:
+                row[var_name] = float(value)
+            except (ValueError, TypeError):
+                row[var_name] = None
+        else:
+            row[var_name] = None
 
-    for category, variables in VARIABLE_GROUPS.items():
-        print(f"  📊 Fetching {category}...")
+    return row
 
-        category_data = []
-        var_codes = list(variables.keys())
 
-        for year in YEARS:
-            print(f"    • {year}...", end=" ")
+def add_derived_metrics(category: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Calculate derived rate metrics for a category."""
+    if category == "income" and "population_below_poverty" in df.columns:
+        df["poverty_rate_pct"] = (
+            df["population_below_poverty"] / df["population_poverty_determined"] * 100
+        )
 
-            data = fetch_acs_data(
-                year, var_codes, STATE_FIPS, county_info["fips"], api_key
-            )
+    if category == "employment" and "unemployed" in df.columns:
+        df["unemployment_rate_pct"] = df["unemployed"] / df["labor_force"] * 100
 
-            if data:
-                row = {"year": year}
-
-                # Map variable codes to friendly names
-                for var_code, var_name in variables.items():
-                    value = data.get(var_code)
-                    if value and value != "-666666666":  # Census null value
-                        try:
-                            row[var_name] = float(value)
-                        except (ValueError, TypeError):
-                            row[var_name] = None
-                    else:
-                        row[var_name] = None
-
-                category_data.append(row)
-                print("✓")
-            else:
-                print("✗")
-
-            time.sleep(0.1)  # Be nice to the API
-
-        if category_data:
-            df = pd.DataFrame(category_data)
-
-            # Calculate derived metrics
-            if category == "income" and "population_below_poverty" in df.columns:
-                df["poverty_rate_pct"] = (
-                    df["population_below_poverty"]
-                    / df["population_poverty_determined"]
-                    * 100
-                )
-
-            if category == "employment" and "unemployed" in df.columns:
-                df["unemployment_rate_pct"] = df["unemployed"] / df["labor_force"] * 100
-
-            if category == "education":
-                df["bachelor_degree_or_higher"] = (
-                    df["bachelor_degree"]
-                    + df["master_degree"]
-                    + df["professional_degree"]
-                    + df["doctorate_degree"]
-                )
-                df["bachelor's_degree_or_higher_pct"] = (
-                    df["bachelor_degree_or_higher"]
-                    / df["total_25_plus_population"]
-                    * 100
-                )
-
-            results[category] = df
-            print(f"    ✅ Fetched {len(df)} years of {category} data")
+    if category == "education":
+        df["bachelor_degree_or_higher"] = (
+            df["bachelor_degree"]
+            + df["master_degree"]
+            + df["professional_degree"]
+            + df["doctorate_degree"]
+        )
+        df["bachelor's_degree_or_higher_pct"] = (
+            df["bachelor_degree_or_higher"] / df["total_25_plus_population"] * 100
+        )
+
+    return df
+
+
+def fetch_counties_data(
+    counties: Dict[str, Dict],
+    checkpoint: Optional[JobCheckpoint] = None,
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Fetch all data categories for several counties with batched requests.
+
+    Counties sharing a state are requested together, and every category's
+    variables are packed into the same request, so each year costs one call
+    per state instead of one call per county per category.
+
+    Args:
+        counties: Mapping of county key to county info
+        checkpoint: Optional job checkpoint; every (county, category, year)
+            already recorded is reused instead of fetched, and each newly
+            fetched one is recorded as soon as it arrives
+
+    Returns:
+        Mapping of county key to {category: DataFrame}
+    """
+    plan = plan_county_requests(counties)
+    keys_by_fips = {
+        (info.get("state", STATE_FIPS), info["fips"]): key
+        for key, info in counties.items()
+    }
+    var_codes = [code for variables in VARIABLE_GROUPS.values() for code in variables]
+
+    print(f"\n{'=' * 80}")
+    print(f"Fetching data for {len(counties)} counties in {len(plan)} state(s)")
+    print(f"Categories: {', '.join(VARIABLE_GROUPS)}")
+    print(f"{'=' * 80}\n")
+
+    rows: Dict[str, Dict[str, List[Dict]]] = {
+        key: {category: [] for category in VARIABLE_GROUPS} for key in counties
+    }
+
+    for year in YEARS:
+        print(f"  📊 {year}...", end=" ")
+
+        fetched = resumed = 0
+        for state, county_fips in plan.items():
+            pending = []
+            for fips in county_fips:
+                key = keys_by_fips[(state, fips)]
+                if checkpoint is not None and all(
+                    checkpoint.is_done(key, category, year)
+                    for category in VARIABLE_GROUPS
+                ):
+                    for category in VARIABLE_GROUPS:
+                        rows[key][category].append(
+                            checkpoint.result(key, category, year)
+                        )
+                    resumed += 1
+                else:
+                    pending.append(fips)
+
+            if not pending:
+                continue
+
+            responses = fetch_acs_counties(year, var_codes, state, pending)
+            for fips, data in responses.items():
+                key = keys_by_fips.get((state, fips))
+                if key:
+                    for category, variables in VARIABLE_GROUPS.items():
+                        row = parse_row(year, variables, data)
+                        rows[key][category].append(row)
+                        if checkpoint is not None:
+                            checkpoint.record(key, category, year, result=row)
+                    fetched += 1
+
+        if resumed:
+            print(f"✓ ({fetched} fetched, {resumed} from checkpoint)")
+        else:
+            print(f"✓ ({fetched} counties)" if fetched else "✗")
+
+    results: Dict[str, Dict[str, pd.DataFrame]] = {}
+    for key, categories in rows.items():
+        results[key] = {
+            category: add_derived_metrics(category, pd.DataFrame(category_rows))
+            for category, category_rows in categories.items()
+            if category_rows
+        }
+        if results[key]:
+            print(
+                f"    ✅ Fetched {len(categories)} categories for {counties[key]['name']}"
+            )
         else:
-            print(f"    ❌ No data retrieved for {category}")
+            print(f"    ❌ No data retrieved for {counties[key]['name']}")
 
     return results
 
@@ -207,15 +272,13 @@ def fetch_county_data(
 def save_county_data(
     county_key: str, county_info: Dict, data: Dict[str, pd.DataFrame]
 ) -> None:
-    """Save county data to CSV files."""
+    """Save county data to the data lake, replacing the years fetched."""
 
     print(f"\n  💾 Saving {county_info['name']} data...")
 
     for category, df in data.items():
-        filename = f"{county_key}_county_{category}_historical.csv"
-        filepath = DATA_DIR / filename
-        df.to_csv(filepath, index=False)
-        print(f"    ✅ Saved: {filename}")
+        table = write_table(df, "census", f"{county_key}_county_{category}_historical")
+        print(f"    ✅ Saved: {table.path.name}")
 
 
 def create_unified_dataset(
@@ -270,6 +333,37 @@ def create_unified_dataset(
 
 def main():
     """Main execution function."""
+    parser = argparse.ArgumentParser(
+        description="Fetch Census data for Iowa comparison counties"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Bypass the local response cache and re-download every year",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Run unattended: do not wait for Enter before fetching",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Discard the checkpoint from an earlier run and start over",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Stop sending requests N seconds into the run (default: no limit)",
+    )
+    args = parser.parse_args()
+
+    get_census_client().refresh = args.refresh
+    if args.deadline:
+        get_census_client().deadline = Deadline(args.deadline)
+    checkpoint = JobCheckpoint.for_job(CHECKPOINT_JOB)
+    if args.restart:
+        checkpoint.clear()
 
     print("=" * 80)
     print("IOWA COMPARISON COUNTIES - CENSUS DATA FETCH")
@@ -278,22 +372,30 @@ def main():
     print(f"Years: {min(YEARS)} - {max(YEARS)}")
     print(f"Categories: {', '.join(VARIABLE_GROUPS.keys())}")
 
-    # Get API key
-    api_key = get_census_api_key()
-    if not api_key:
+    # Resolve the API key once, up front
+    if not get_census_client().api_key:
         print("\n⚠️  Proceeding without API key (requests may be rate-limited)")
 
-    input("\nPress Enter to begin fetching data...")
+    if len(checkpoint):
+        print(f"\n↺ Resuming: {len(checkpoint)} results already checkpointed")
+
+    if not args.batch:
+        input("\nPress Enter to begin fetching data...")
 
     start_time = datetime.now()
 
-    # Fetch data for each county
+    # Fetch every county at once; requests are batched per state
+    try:
+        all_data = fetch_counties_data(COUNTIES, checkpoint)
+    except KeyboardInterrupt:
+        print(f"\n\n⏸️  Interrupted: {len(checkpoint)} results checkpointed")
+        print(f"   Re-run to resume from {checkpoint.path}")
+        sys.exit(130)
     all_unified = []
 
     for county_key, county_info in COUNTIES.items():
         try:
-            # Fetch all categories
-            data = fetch_county_data(county_key, county_info, api_key)
+            data = all_data[county_key]
 
             if data:
                 # Save individual category files
@@ -326,6 +428,13 @@ def main():
         print(f"     Total rows: {len(master_df):,}")
         print(f"     Counties: {master_df['county_name'].nunique()}")
 
+    # Keep the checkpoint while any year is missing so a re-run only retries it
+    expected = len(COUNTIES) * len(VARIABLE_GROUPS) * len(YEARS)
+    if len(checkpoint) >= expected:
+        checkpoint.clear()
+    else:
+        print(f"\n  ↺ {expected - len(checkpoint)} results missing; re-run to retry")
+
     # Summary
     elapsed = datetime.now() - start_time
 
@@ -334,6 +443,7 @@ def main():
     print(f"{'=' * 80}\n")
     print(f"  ⏱️  Time elapsed: {elapsed}")
     print(f"  📁 Data saved to: {DATA_DIR}")
+    print(f"  🌐 Census API: {get_census_client().describe_usage()}")
     print(f"  ✅ Counties fetched: {len(all_unified)} of {len(COUNTIES)}")
 
     print("\n" + "=" * 80)
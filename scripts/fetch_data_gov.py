@@ -3,145 +3,115 @@
 Fetch data from data.gov using the Socrata API.
 This script demonstrates how to pull data into your data lake.
 
+This is a command-line front-end over the shared Socrata ingestion engine
+(socrata_engine.py). Whole datasets are streamed from Socrata's bulk CSV
+export and decoded a chunk at a time; queries (and --json) page through the
+JSON API instead. Either way records are appended to the output file as
+they arrive, so memory use stays flat however large the dataset is.
+
+By default the download is committed as the dataset's Parquet table in the
+data lake, data/lake/source=socrata/dataset=<id>/ (see data_lake.py),
+replacing the previous copy (a --select/--where pull gets a table of its
+own); --format csv or parquet writes a timestamped file to --output-dir
+instead.
+
 Usage:
-    python fetch_data_gov.py <dataset_id> [--limit N]
+    python fetch_data_gov.py <dataset_id> [--limit N] [--domain DOMAIN]
 
 Examples:
-    python fetch_data_gov.py 6zsd-86xi              # NYC Dog Licensing Dataset
-    python fetch_data_gov.py 6zsd-86xi --limit 100  # Limit to 100 records
-    python fetch_data_gov.py erm2-nwe9              # NYC 311 Service Requests
+    python fetch_data_gov.py kzjm-xkqj              # Seattle Police Reports
+    python fetch_data_gov.py kzjm-xkqj --limit 100  # Limit to 100 records
+    python fetch_data_gov.py kzjm-xkqj --limit 0    # Every record
+    python fetch_data_gov.py kzjm-xkqj --limit 0 --format csv
+    python fetch_data_gov.py kzjm-xkqj --limit 0 --json --workers 4  # 4 pages at once
+    python fetch_data_gov.py 6zsd-86xi --domain data.cityofnewyork.us
+    python fetch_data_gov.py kzjm-xkqj --sync
+    python fetch_data_gov.py 9mfq-cb36 --domain chronicdata.cdc.gov \\
+        --select "yearstart, topic, datavalue" --where "locationabbr = 'IA'"
+
+With --sync, the dataset is kept as one local copy under data/raw/socrata/
+and each run fetches only the rows changed since the previous one (see
+socrata_sync.py).
+
+--select, --where and --order are sent to the server as SoQL, so only the
+columns and rows asked for are transferred.
 """
 
 import argparse
-import os
 import sys
-from datetime import datetime
 from pathlib import Path
 
-import pandas as pd
 from dotenv import load_dotenv
-from sodapy import Socrata
 
 # Load environment variables
 load_dotenv()
 
-
-def setup_directories():
-    """Ensure data directories exist."""
-    directories = ["data/raw", "data/staging", "data/processed", "data/external"]
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
-    print("✓ Data directories ready")
-
-
-def fetch_dataset(dataset_id, limit=10000, domain="data.cityofnewyork.us"):
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.socrata_client import soql_query
+from scripts.socrata_engine import (
+    DEFAULT_DOMAIN,
+    LAKE_FORMAT,
+    OUTPUT_FORMATS,
+    PREVIEW_ROWS,
+    SocrataEngine,
+    download_dataset,
+    fetch_dataset,
+    read_dataset,
+    save_data,
+    setup_directories,
+    show_preview,
+)
+from scripts.socrata_sync import SyncState
+
+
+def sync_local_copy(
+    dataset_id, domain=DEFAULT_DOMAIN, workers=1, full=False, app_token=None
+):
     """
-    Fetch a dataset from data.gov using Socrata API.
+    Bring the local copy of a dataset up to date with incremental sync.
 
     Args:
         dataset_id: The Socrata dataset identifier
-        limit: Maximum number of records to fetch
-        domain: The Socrata domain (default: NYC Open Data)
+        domain: The Socrata domain
+        workers: Pages to request at the same time
+        full: Download the whole dataset again
+        app_token: API token (default: DATA_GOV_APP_TOKEN from .env)
 
     Returns:
-        pandas DataFrame with fetched data
+        Path to the local copy, or None if the sync failed
     """
     print(f"\n{'='*60}")
-    print(f"Fetching dataset: {dataset_id}")
+    print(f"Syncing dataset: {dataset_id}")
     print(f"Domain: {domain}")
-    print(f"Limit: {limit:,} records")
     print(f"{'='*60}\n")
 
-    try:
-        # Get API token from environment (optional but recommended)
-        app_token = os.getenv("DATA_GOV_APP_TOKEN")
-        if app_token:
-            print(f"✓ Using API token for higher rate limits")
-        else:
-            print(f"⚠ No API token found - using public access (rate limited)")
-            print(f"  Add DATA_GOV_APP_TOKEN to .env for 10x faster access")
-
-        # Create client with token if available
-        client = Socrata(domain, app_token)
-
-        # Fetch the data
-        print("Downloading data...")
-        results = client.get(dataset_id, limit=limit)
-
-        if not results:
-            print("⚠ No data returned. Check dataset ID.")
-            return None
-
-        # Convert to pandas DataFrame
-        df = pd.DataFrame.from_records(results)
-
-        print(f"✓ Downloaded {len(df):,} records")
-        print(f"✓ Columns ({len(df.columns)}): {', '.join(df.columns.tolist()[:10])}")
-        if len(df.columns) > 10:
-            print(f"  ... and {len(df.columns) - 10} more columns")
-
-        return df
+    watermark = SyncState.load().watermark(domain, dataset_id)
+    if full:
+        print("Downloading every row again (--full)...")
+    elif watermark:
+        print(f"Fetching rows updated since {watermark}...")
+    else:
+        print("No local copy yet - downloading every row...")
 
+    try:
+        with SocrataEngine(domain, app_token, workers) as engine:
+            engine.print_token_status()
+            summary = engine.sync(dataset_id, full=full)
     except Exception as e:
-        print(f"❌ Error fetching data: {str(e)}")
-        return None
-
-
-def save_data(df, dataset_id, output_dir="data/raw"):
-    """
-    Save data to the data lake.
-
-    Args:
-        df: DataFrame to save
-        dataset_id: Identifier for naming the file
-        output_dir: Directory to save to
-
-    Returns:
-        Path to saved file
-    """
-    if df is None or df.empty:
-        print("⚠ No data to save")
+        print(f"❌ Error syncing data: {str(e)}")
         return None
 
-    # Create output directory
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-
-    # Save with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"{output_dir}/{dataset_id}_{timestamp}.csv"
-
-    print(f"\nSaving data...")
-    df.to_csv(output_file, index=False)
-
-    file_size_kb = os.path.getsize(output_file) / 1024
-    file_size_mb = file_size_kb / 1024
-
-    print(f"✓ Saved to: {output_file}")
-    print(f"✓ Records: {len(df):,}")
-    print(f"✓ Size: {file_size_mb:.2f} MB ({file_size_kb:.2f} KB)")
-
-    return output_file
-
+    if summary["mode"] == "incremental":
+        print(f"✓ {summary['fetched']:,} changed records merged")
+    else:
+        print(f"✓ Downloaded {summary['fetched']:,} records")
+    print(f"✓ Local copy: {summary['file']} ({summary['rows']:,} records)")
+    print(f"✓ High-water mark: {summary['updated_at'] or 'n/a'}")
 
-def show_preview(df):
-    """Show a preview of the data."""
-    if df is None or df.empty:
-        return
-
-    print(f"\n{'='*60}")
-    print("Data Preview (first 5 rows):")
-    print(f"{'='*60}\n")
-    print(df.head().to_string())
-
-    print(f"\n{'='*60}")
-    print("Data Types:")
-    print(f"{'='*60}\n")
-    print(df.dtypes)
-
-    print(f"\n{'='*60}")
-    print("Basic Statistics:")
-    print(f"{'='*60}\n")
-    print(df.describe())
+    return summary["file"]
 
 
 def main():
@@ -160,22 +130,61 @@ Popular Dataset IDs (TESTED & WORKING):
   vbim-akqf  CDC COVID-19 Data (chronicdata.cdc.gov)
 
 Note: NYC Open Data may require API token or have connection issues
+
+API Token:
+  Add to .env file: DATA_GOV_APP_TOKEN=your_token_here, or pass --token
         """,
     )
 
     parser.add_argument(
-        "dataset_id", help="Socrata dataset identifier (e.g., 6zsd-86xi)"
+        "dataset_id", help="Socrata dataset identifier (e.g., kzjm-xkqj)"
     )
     parser.add_argument(
         "--limit",
         type=int,
         default=10000,
-        help="Maximum number of records to fetch (default: 10000)",
+        help="Maximum number of records to fetch (default: 10000, 0 for all)",
     )
     parser.add_argument(
         "--domain",
-        default="data.seattle.gov",
-        help="Socrata domain (default: data.seattle.gov - TESTED & WORKING)",
+        default=DEFAULT_DOMAIN,
+        help=f"Socrata domain (default: {DEFAULT_DOMAIN} - TESTED & WORKING)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="JSON pages to download at the same time (default: 1)",
+    )
+    parser.add_argument(
+        "--select",
+        help='SoQL columns to fetch, e.g. "offense, report_datetime"',
+    )
+    parser.add_argument(
+        "--where",
+        help="SoQL row filter, e.g. \"report_datetime > '2024-01-01'\"",
+    )
+    parser.add_argument("--order", help='SoQL sort order, e.g. "report_datetime DESC"')
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Page through the JSON API instead of the bulk CSV export",
+    )
+    parser.add_argument(
+        "--format",
+        choices=(LAKE_FORMAT, *OUTPUT_FORMATS),
+        default=LAKE_FORMAT,
+        help="Save as a data lake table (default) or a timestamped csv/parquet file",
+    )
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Keep one local copy and fetch only rows changed since the last sync",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="With --sync, download the whole dataset again",
     )
     parser.add_argument(
         "--preview", action="store_true", help="Show data preview after fetching"
@@ -183,6 +192,7 @@ Note: NYC Open Data may require API token or have connection issues
     parser.add_argument(
         "--output-dir", default="data/raw", help="Output directory (default: data/raw)"
     )
+    parser.add_argument("--token", help="API token (optional, can also use .env file)")
 
     args = parser.parse_args()
 
@@ -190,26 +200,49 @@ Note: NYC Open Data may require API token or have connection issues
         # Setup
         setup_directories()
 
-        # Fetch data
-        df = fetch_dataset(args.dataset_id, args.limit, args.domain)
-
-        if df is None:
+        query = soql_query(args.select, args.where, args.order)
+
+        # Sync the local copy, or download data straight to disk
+        if args.sync:
+            if query:
+                print("⚠ --select/--where/--order are ignored with --sync")
+            output_file = sync_local_copy(
+                args.dataset_id,
+                args.domain,
+                args.workers,
+                args.full,
+                app_token=args.token,
+            )
+        else:
+            output_file = download_dataset(
+                args.dataset_id,
+                args.limit,
+                args.domain,
+                args.output_dir,
+                workers=args.workers,
+                query=query,
+                export=not args.json,
+                fmt=args.format,
+                app_token=args.token,
+            )
+
+        if output_file is None:
             sys.exit(1)
 
-        # Show preview if requested
+        # Show preview if requested (a sample read back from the file)
         if args.preview:
-            show_preview(df)
-
-        # Save data
-        output_file = save_data(df, args.dataset_id, args.output_dir)
+            show_preview(read_dataset(output_file, nrows=PREVIEW_ROWS))
 
         if output_file:
             print(f"\n{'='*60}")
             print("✓ Success! Next Steps:")
             print(f"{'='*60}\n")
             print(f"1. Review the data:")
-            print(f"   pandas: pd.read_csv('{output_file}')")
-            print(f"   duckdb: SELECT * FROM read_csv_auto('{output_file}') LIMIT 10;")
+            print(f"   python: read_dataset('{output_file}')  # scripts.socrata_engine")
+            if Path(output_file).is_dir():
+                print(f"   duckdb: SELECT * FROM '{output_file}/*/*.parquet' LIMIT 10;")
+            else:
+                print(f"   duckdb: SELECT * FROM '{output_file}' LIMIT 10;")
             print(f"\n2. Create a staging model:")
             print(f"   cp templates/staging_model_template.sql \\")
             print(f"      dbt_project/models/staging/stg_{args.dataset_id}.sql")
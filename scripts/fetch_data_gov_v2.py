@@ -3,141 +3,43 @@
 Fetch data from data.gov using the Socrata API.
 Now with automatic API token support for higher rate limits!
 
+Like fetch_data_gov.py, this is a thin front-end over the shared Socrata
+ingestion engine (socrata_engine.py); the dataset is fetched into memory,
+previewed, then saved.
+
 Usage:
     python fetch_data_gov.py <dataset_id> [--limit N] [--domain DOMAIN]
 
 Examples:
     python fetch_data_gov.py kzjm-xkqj --limit 10000
     python fetch_data_gov.py vbim-akqf --domain chronicdata.cdc.gov --limit 5000
+    python fetch_data_gov.py kzjm-xkqj --where "offense_parent_group = 'BURGLARY'"
 """
 
-import sys
-import os
 import argparse
-from sodapy import Socrata
-import pandas as pd
-from datetime import datetime
+import os
+import sys
 from pathlib import Path
+
 from dotenv import load_dotenv
 
 # Load environment variables (including API token)
 load_dotenv()
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
 
-def setup_directories():
-    """Ensure data directories exist."""
-    directories = ["data/raw", "data/staging", "data/processed", "data/external"]
-    for directory in directories:
-        Path(directory).mkdir(parents=True, exist_ok=True)
-    print("✓ Data directories ready")
-
-
-def fetch_dataset(dataset_id, limit=10000, domain="data.seattle.gov", app_token=None):
-    """
-    Fetch a dataset from data.gov using Socrata API.
-
-    Args:
-        dataset_id: The Socrata dataset identifier
-        limit: Maximum number of records to fetch
-        domain: The Socrata domain (default: Seattle)
-        app_token: Optional API token (automatically loaded from .env)
-
-    Returns:
-        pandas DataFrame with fetched data
-    """
-    print(f"\n{'='*60}")
-    print(f"Fetching dataset: {dataset_id}")
-    print(f"Domain: {domain}")
-    print(f"Limit: {limit:,} records")
-    if app_token:
-        print(f"✓ Using API token (higher rate limits - 1,000 req/hour)")
-    else:
-        print(f"⚠️  No API token (rate limited - ~100 req/hour)")
-        print(f"   Get a free token at: https://{domain}/profile/app_tokens")
-    print(f"{'='*60}\n")
-
-    try:
-        # Create client with optional token
-        client = Socrata(domain, app_token)
-
-        # Fetch the data
-        print("Downloading data...")
-        results = client.get(dataset_id, limit=limit)
-
-        if not results:
-            print("⚠ No data returned. Check dataset ID.")
-            return None
-
-        # Convert to pandas DataFrame
-        df = pd.DataFrame.from_records(results)
-
-        print(f"✓ Downloaded {len(df):,} records")
-        print(f"✓ Columns ({len(df.columns)}): {', '.join(df.columns.tolist()[:10])}")
-        if len(df.columns) > 10:
-            print(f"  ... and {len(df.columns) - 10} more columns")
-
-        return df
-
-    except Exception as e:
-        print(f"❌ Error fetching data: {str(e)}")
-        return None
-
-
-def save_data(df, dataset_id, output_dir="data/raw"):
-    """
-    Save data to the data lake.
-
-    Args:
-        df: DataFrame to save
-        dataset_id: Identifier for naming the file
-        output_dir: Directory to save to
-
-    Returns:
-        Path to saved file
-    """
-    if df is None or df.empty:
-        print("⚠ No data to save")
-        return None
-
-    # Create output directory
-    Path(output_dir).mkdir(parents=True, exist_ok=True)
-
-    # Save with timestamp
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f"{output_dir}/{dataset_id}_{timestamp}.csv"
-
-    print(f"\nSaving data...")
-    df.to_csv(output_file, index=False)
-
-    file_size_kb = os.path.getsize(output_file) / 1024
-    file_size_mb = file_size_kb / 1024
-
-    print(f"✓ Saved to: {output_file}")
-    print(f"✓ Records: {len(df):,}")
-    print(f"✓ Size: {file_size_mb:.2f} MB ({file_size_kb:.2f} KB)")
-
-    return output_file
-
-
-def show_preview(df):
-    """Show a preview of the data."""
-    if df is None or df.empty:
-        return
-
-    print(f"\n{'='*60}")
-    print("Data Preview (first 5 rows):")
-    print(f"{'='*60}\n")
-    print(df.head().to_string())
-
-    print(f"\n{'='*60}")
-    print("Data Types:")
-    print(f"{'='*60}\n")
-    print(df.dtypes)
-
-    print(f"\n{'='*60}")
-    print("Basic Statistics:")
-    print(f"{'='*60}\n")
-    print(df.describe())
+from scripts.socrata_client import soql_query
+from scripts.socrata_engine import (
+    DEFAULT_DOMAIN,
+    LAKE_FORMAT,
+    OUTPUT_FORMATS,
+    fetch_dataset,
+    save_data,
+    setup_directories,
+    show_preview,
+)
 
 
 def main():
@@ -174,8 +76,8 @@ API Token:
     )
     parser.add_argument(
         "--domain",
-        default="data.seattle.gov",
-        help="Socrata domain (default: data.seattle.gov - TESTED & WORKING)",
+        default=DEFAULT_DOMAIN,
+        help=f"Socrata domain (default: {DEFAULT_DOMAIN} - TESTED & WORKING)",
     )
     parser.add_argument(
         "--preview", action="store_true", help="Show data preview after fetching"
@@ -184,6 +86,18 @@ API Token:
         "--output-dir", default="data/raw", help="Output directory (default: data/raw)"
     )
     parser.add_argument("--token", help="API token (optional, can also use .env file)")
+    parser.add_argument("--select", help="SoQL columns to fetch")
+    parser.add_argument("--where", help="SoQL row filter")
+    parser.add_argument("--order", help="SoQL sort order")
+    parser.add_argument(
+        "--json", action="store_true", help="Use the JSON API, not the CSV export"
+    )
+    parser.add_argument(
+        "--format",
+        choices=(LAKE_FORMAT, *OUTPUT_FORMATS),
+        default=LAKE_FORMAT,
+        help="Save as a data lake table (default) or a csv/parquet file",
+    )
 
     args = parser.parse_args()
 
@@ -195,7 +109,15 @@ API Token:
         token = args.token or os.getenv("DATA_GOV_APP_TOKEN")
 
         # Fetch data
-        df = fetch_dataset(args.dataset_id, args.limit, args.domain, token)
+        query = soql_query(args.select, args.where, args.order)
+        df = fetch_dataset(
+            args.dataset_id,
+            args.limit,
+            args.domain,
+            query=query,
+            export=not args.json,
+            app_token=token,
+        )
 
         if df is None:
             sys.exit(1)
@@ -205,15 +127,20 @@ API Token:
             show_preview(df)
 
         # Save data
-        output_file = save_data(df, args.dataset_id, args.output_dir)
+        output_file = save_data(
+            df, args.dataset_id, args.output_dir, args.format, query=query
+        )
 
         if output_file:
             print(f"\n{'='*60}")
             print("✓ Success! Next Steps:")
             print(f"{'='*60}\n")
             print(f"1. Review the data:")
-            print(f"   pandas: pd.read_csv('{output_file}')")
-            print(f"   duckdb: SELECT * FROM read_csv_auto('{output_file}') LIMIT 10;")
+            print(f"   python: read_dataset('{output_file}')  # scripts.socrata_engine")
+            if args.format == LAKE_FORMAT:
+                print(f"   duckdb: SELECT * FROM '{output_file}/*/*.parquet' LIMIT 10;")
+            else:
+                print(f"   duckdb: SELECT * FROM '{output_file}' LIMIT 10;")
             print(f"\n2. Create a staging model:")
             print(f"   cp templates/staging_model_template.sql \\")
             print(f"      dbt_project/models/staging/stg_{args.dataset_id}.sql")
@@ -8,21 +8,75 @@ Usage:
     python scripts/fetch_federal_data.py --list              # Show all available datasets
     python scripts/fetch_federal_data.py --dataset cdc-covid # Fetch specific dataset
     python scripts/fetch_federal_data.py --category health   # Fetch all health datasets
+    python scripts/fetch_federal_data.py --dataset cdc-covid --limit 0  # Every record
+    python scripts/fetch_federal_data.py --dataset brfss --limit 0 --json --workers 8
+    python scripts/fetch_federal_data.py --dataset seattle-police --sync
+    python scripts/fetch_federal_data.py --dataset chronic-disease --preset iowa
+
+--category fetches the category's datasets in parallel, with one pooled
+client per domain and at most a few datasets per domain at once (more with
+an API token, see --concurrency), and ends with a per-dataset summary of
+records, time and bytes.
+
+Whole datasets are streamed from Socrata's bulk CSV export, which is
+several times smaller and faster to parse than the JSON API, and decoded a
+chunk at a time. Queries (presets, --select/--where/--order) and --json
+downloads page through the JSON API instead; --workers N requests N pages
+at a time and writes them back in order. Either way rows are appended to
+the output file as they arrive, so even the multi-million-row datasets are
+fetched with flat memory use. --sync keeps one local copy per dataset and
+fetches only the rows changed since the last run (see socrata_sync.py).
+Export downloads are conditional: when a dataset has not changed since its
+last download into the same directory, the server answers 304 Not Modified
+and the previous file is reused, so a scheduled refresh of an unchanged
+category transfers next to nothing.
+
+By default each dataset is committed as a Parquet table in the data lake,
+data/lake/source=socrata/dataset=<id>/ (see data_lake.py), replacing its
+previous copy. A preset or --select/--where pull gets a table of its own,
+``<id>_<preset>`` (see socrata_engine.lake_table); --format csv or parquet
+writes timestamped files instead.
+
+Column selection, row filters and sort order are pushed down to the server
+as SoQL (--select, --where, --order), so only the rows and columns asked
+for are transferred. Catalog entries can name common queries as presets
+(--preset), e.g. the Iowa rows of a state-level dataset; explicit --select,
+--where and --order override the preset's clauses.
 """
 
 import argparse
-import os
 import sys
-from datetime import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-import pandas as pd
 from dotenv import load_dotenv
-from sodapy import Socrata
 
 # Load environment variables
 load_dotenv()
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.fetch_data_gov import sync_local_copy
+from scripts.socrata_client import (
+    PUBLIC_DOMAIN_CONCURRENCY,
+    TOKEN_DOMAIN_CONCURRENCY,
+    domain_concurrency,
+    socrata_app_token,
+    soql_query,
+)
+from scripts.socrata_engine import (
+    LAKE_FORMAT,
+    OUTPUT_FORMATS,
+    PREVIEW_ROWS,
+    SocrataEngine,
+    output_path,
+    read_dataset,
+)
+from scripts.socrata_sync import SyncState
 
 # Federal Dataset Catalog
 FEDERAL_DATASETS = {
@@ -40,6 +94,21 @@ FEDERAL_DATASETS = {
             "name": "Chronic Disease Indicators",
             "description": "Health outcomes and risk factors by state",
             "size": "100K+",
+            "presets": {
+                "iowa": {
+                    "select": (
+                        "yearstart, yearend, locationabbr, topic, question, "
+                        "datavalue, datavalueunit, datavaluetype, "
+                        "stratificationcategory1, stratification1"
+                    ),
+                    "where": "locationabbr = 'IA'",
+                    "order": "yearstart DESC",
+                },
+                "iowa-diabetes": {
+                    "where": "locationabbr = 'IA' AND topic = 'Diabetes'",
+                    "order": "yearstart DESC",
+                },
+            },
         },
         "obesity": {
             "id": "cjae-szjv",
@@ -47,6 +116,9 @@ FEDERAL_DATASETS = {
             "name": "Nutrition, Physical Activity, and Obesity",
             "description": "Obesity and health behavior data",
             "size": "50K+",
+            "presets": {
+                "iowa": {"where": "locationabbr = 'IA'", "order": "yearstart DESC"},
+            },
         },
         "brfss": {
             "id": "735e-byxc",
@@ -54,6 +126,9 @@ FEDERAL_DATASETS = {
             "name": "Behavioral Risk Factor Surveillance System",
             "description": "Annual health survey data",
             "size": "400K+",
+            "presets": {
+                "iowa": {"where": "locationabbr = 'IA'", "order": "year DESC"},
+            },
         },
     },
     "crime": {
@@ -85,6 +160,8 @@ def list_datasets():
             print(f"     Dataset ID: {info['id']}")
             print(f"     Domain: {info['domain']}")
             print(f"     Size: {info['size']}")
+            for preset, query in info.get("presets", {}).items():
+                print(f"     Preset {preset}: {query.get('where', '')}")
             print(f"\n     Fetch: python scripts/fetch_federal_data.py --dataset {key}")
 
         print()
@@ -94,66 +171,161 @@ def list_datasets():
     print("   Add to .env file: DATA_GOV_APP_TOKEN=your_token_here\n")
 
 
-def fetch_dataset(dataset_key, limit=10000, preview=False):
+def find_dataset(dataset_key):
+    """Return the catalog entry for a dataset key, or None if unknown."""
+    for datasets in FEDERAL_DATASETS.values():
+        if dataset_key in datasets:
+            return datasets[dataset_key]
+    return None
+
+
+def resolve_query(dataset_info, preset=None, query=None):
+    """
+    Combine a catalog preset with explicit SoQL clauses.
+
+    Args:
+        dataset_info: Catalog entry from FEDERAL_DATASETS
+        preset: Name of one of the entry's presets, if any
+        query: Explicit clauses (see soql_query); these override the preset's
+
+    Returns:
+        The SoQL clauses to push down, or None if the preset is unknown
+    """
+    presets = dataset_info.get("presets", {})
+    if preset and preset not in presets:
+        print(f"❌ Preset '{preset}' not defined for {dataset_info['name']}")
+        if presets:
+            print(f"   Available: {', '.join(presets)}")
+        return None
+    return {**presets.get(preset, {}), **(query or {})}
+
+
+def sync_catalog_dataset(dataset_key, workers=1, full=False):
+    """
+    Incrementally sync a catalog dataset into its local copy.
+
+    Returns:
+        Path to the local copy, or None if the sync failed
+    """
+    dataset_info = find_dataset(dataset_key)
+    if not dataset_info:
+        print(f"❌ Dataset '{dataset_key}' not found in catalog")
+        print(f"   Run with --list to see available datasets")
+        return None
+
+    print(f"\n🔄 {dataset_info['name']}")
+    return sync_local_copy(
+        dataset_info["id"], dataset_info["domain"], workers=workers, full=full
+    )
+
+
+def fetch_dataset(
+    dataset_key,
+    limit=10000,
+    preview=False,
+    workers=1,
+    preset=None,
+    query=None,
+    export=True,
+    engine=None,
+    output_dir="data/raw",
+    fmt="csv",
+):
     """
     Fetch a federal dataset by key.
 
     Args:
         dataset_key: Short key from FEDERAL_DATASETS catalog
-        limit: Maximum records to fetch
+        limit: Maximum records to fetch (0 or None for all)
         preview: Show data preview after fetching
+        workers: Pages to download at the same time
+        preset: Named query from the dataset's catalog ``presets``
+        query: SoQL clauses (select/where/order), overriding the preset's
+        export: Read unfiltered datasets from the bulk CSV export
+        engine: SocrataEngine for the dataset's domain to reuse (it is left
+            open); by default an engine is made for this fetch and closed
+        output_dir: Directory to save to, for the file formats
+        fmt: "lake" to commit the data lake table
+            data/lake/source=socrata/dataset=<id> (see lake_table), or
+            "csv" / "parquet" for a timestamped file in output_dir
+
+    Returns:
+        Summary with the ``rows`` saved, the output ``file`` (or table), its size in
+        ``bytes``, the ``transferred`` bytes (bulk export only, else None),
+        the ``source`` it was read from and the fetch time in ``seconds``;
+        None if the fetch failed
     """
     # Find dataset in catalog
-    dataset_info = None
-    for category, datasets in FEDERAL_DATASETS.items():
-        if dataset_key in datasets:
-            dataset_info = datasets[dataset_key]
-            break
+    dataset_info = find_dataset(dataset_key)
 
     if not dataset_info:
         print(f"❌ Dataset '{dataset_key}' not found in catalog")
         print(f"   Run with --list to see available datasets")
         return None
 
+    query = resolve_query(dataset_info, preset, query)
+    if query is None:
+        return None
+
     print("\n" + "=" * 80)
     print(f"FETCHING: {dataset_info['name']}")
     print("=" * 80)
     print(f"Dataset ID: {dataset_info['id']}")
     print(f"Domain: {dataset_info['domain']}")
     print(f"Description: {dataset_info['description']}")
-    print(f"Limit: {limit:,} records")
+    print(f"Limit: {f'{limit:,} records' if limit else 'all records'}")
+    if preset:
+        print(f"Preset: {preset}")
+    for clause, value in query.items():
+        print(f"{clause.title()}: {value}")
     print("=" * 80 + "\n")
 
     try:
-        # Get API token
-        app_token = os.getenv("DATA_GOV_APP_TOKEN")
-        if app_token:
-            print("✓ Using API token for higher rate limits")
-        else:
-            print("⚠ No API token - using public access (slower)")
-            print("  Get token: https://api.data.gov/signup/")
-
-        # Create Socrata client
-        client = Socrata(dataset_info["domain"], app_token)
+        # Use the shared engine for this domain, or one just for this fetch
+        own_engine = engine is None
+        if own_engine:
+            engine = SocrataEngine(dataset_info["domain"], workers=workers)
+        engine.print_token_status()
 
-        # Fetch data
-        print("\nDownloading data...")
-        results = client.get(dataset_info["id"], limit=limit)
-
-        if not results:
+        name = f"{dataset_key}_{preset}" if preset else dataset_key
+        print()
+        try:
+            if fmt == LAKE_FORMAT:
+                # A preset's own table, unless its clauses were overridden
+                label = preset if query == resolve_query(dataset_info, preset) else None
+                summary = engine.download_to_lake(
+                    dataset_info["id"], limit, query, export, label
+                )
+            else:
+                summary = engine.download(
+                    dataset_info["id"],
+                    output_path(name, output_dir, fmt),
+                    limit,
+                    query,
+                    export,
+                )
+        finally:
+            if own_engine:
+                engine.close()
+
+        rows = summary["rows"]
+        output_file = summary["file"]
+        if not rows:
             print("⚠ No data returned")
             return None
 
-        # Convert to DataFrame
-        df = pd.DataFrame.from_records(results)
-
-        print(f"\n✓ Downloaded {len(df):,} records")
-        print(f"✓ Columns ({len(df.columns)}): {', '.join(df.columns.tolist()[:8])}")
-        if len(df.columns) > 8:
-            print(f"  ... and {len(df.columns) - 8} more columns")
+        if summary["transferred"] is not None:
+            print(f"✓ Transferred {summary['transferred'] / (1024 * 1024):.2f} MB")
+        columns = read_dataset(output_file, nrows=1).columns.tolist()
+        print(f"\n✓ Downloaded {rows:,} records")
+        print(f"✓ Columns ({len(columns)}): {', '.join(columns[:8])}")
+        if len(columns) > 8:
+            print(f"  ... and {len(columns) - 8} more columns")
 
-        # Show preview if requested
+        # Show preview if requested (a sample read back from the file)
         if preview:
+            df = read_dataset(output_file, nrows=PREVIEW_ROWS)
+
             print("\n" + "=" * 80)
             print("DATA PREVIEW (first 5 rows)")
             print("=" * 80 + "\n")
@@ -164,17 +336,7 @@ def fetch_dataset(dataset_key, limit=10000, preview=False):
             print("=" * 80 + "\n")
             print(df.dtypes)
 
-        # Save data
-        output_dir = Path("data/raw")
-        output_dir.mkdir(parents=True, exist_ok=True)
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = output_dir / f"{dataset_key}_{timestamp}.csv"
-
-        print(f"\nSaving data...")
-        df.to_csv(output_file, index=False)
-
-        file_size_mb = output_file.stat().st_size / (1024 * 1024)
+        file_size_mb = summary["bytes"] / (1024 * 1024)
         print(f"✓ Saved to: {output_file}")
         print(f"✓ Size: {file_size_mb:.2f} MB")
 
@@ -183,15 +345,15 @@ def fetch_dataset(dataset_key, limit=10000, preview=False):
         print("NEXT STEPS")
         print("=" * 80)
         print(f"\n1. Load in Python:")
-        print(f"   import pandas as pd")
-        print(f"   df = pd.read_csv('{output_file}')")
+        print(f"   from scripts.socrata_engine import read_dataset")
+        print(f"   df = read_dataset('{output_file}')")
         print(f"\n2. Explore in Jupyter:")
         print(f"   jupyter lab")
         print(f"\n3. Create dbt staging model:")
         print(f"   See templates/ directory for examples")
         print()
 
-        return df
+        return summary
 
     except Exception as e:
         print(f"\n❌ Error: {str(e)}")
@@ -201,32 +363,153 @@ def fetch_dataset(dataset_key, limit=10000, preview=False):
         return None
 
 
-def fetch_category(category, limit=5000):
-    """Fetch all datasets in a category."""
+def fetch_category(
+    category,
+    limit=5000,
+    workers=1,
+    sync=False,
+    full=False,
+    preset=None,
+    query=None,
+    export=True,
+    concurrency=None,
+    output_dir="data/raw",
+    fmt="csv",
+):
+    """
+    Fetch (or with ``sync``, incrementally sync) all datasets in a category.
+
+    Datasets are fetched in parallel, sharing one engine per domain.
+    At most ``concurrency`` datasets per domain are fetched at once, by
+    default as many as the token tier allows (see domain_concurrency), so
+    a category takes about as long as its slowest dataset. Syncs run one
+    after another, as they share the sync state file.
+
+    With ``preset``, only the datasets that define that preset are fetched.
+
+    Returns:
+        Summary per dataset key (see fetch_dataset), for the datasets fetched
+    """
     if category not in FEDERAL_DATASETS:
         print(f"❌ Category '{category}' not found")
         print(f"   Available: {', '.join(FEDERAL_DATASETS.keys())}")
-        return
+        return {}
 
     datasets = FEDERAL_DATASETS[category]
     print(f"\n📦 Fetching all datasets in category: {category.upper()}")
     print(f"   Total datasets: {len(datasets)}")
-    print(f"   Limit per dataset: {limit:,} records\n")
+    print(f"   Limit per dataset: {f'{limit:,} records' if limit else 'all'}\n")
+
+    keys = []
+    for key, info in datasets.items():
+        if preset and preset not in info.get("presets", {}):
+            print(f"⏭ {key}: no '{preset}' preset, skipped")
+        else:
+            keys.append(key)
+
+    started = time.perf_counter()
+    if sync:
+        results = {}
+        for number, key in enumerate(keys, start=1):
+            print(f"\n{'='*80}")
+            print(f"Dataset {number}/{len(keys)}")
+            print(f"{'='*80}")
+            dataset_started = time.perf_counter()
+            path = sync_catalog_dataset(key, workers, full)
+            if path is not None:
+                info = datasets[key]
+                results[key] = {
+                    "rows": SyncState.load().stored_rows(info["domain"], info["id"]),
+                    "file": path,
+                    "bytes": Path(path).stat().st_size,
+                    "transferred": None,
+                    "source": "sync",
+                    "seconds": time.perf_counter() - dataset_started,
+                }
+    else:
+        results = fetch_parallel(
+            {key: datasets[key] for key in keys},
+            concurrency,
+            limit=limit,
+            preview=False,
+            workers=workers,
+            preset=preset,
+            query=query,
+            export=export,
+            output_dir=output_dir,
+            fmt=fmt,
+        )
+
+    print_category_summary(results, time.perf_counter() - started)
+    return results
+
+
+def fetch_parallel(datasets, concurrency=None, **options):
+    """
+    Fetch catalog datasets in parallel, with one engine (and so one pooled
+    client) per domain.
+
+    Args:
+        datasets: Catalog entries by dataset key
+        concurrency: Datasets fetched at once per domain (default: by token
+            tier, see domain_concurrency)
+        **options: Passed to fetch_dataset()
+
+    Returns:
+        Summary per dataset key, for the datasets fetched
+    """
+    app_token = socrata_app_token()
+    per_domain = concurrency or domain_concurrency(app_token)
+    domains = sorted({info["domain"] for info in datasets.values()})
+    print(f"   Domains: {len(domains)}, up to {per_domain} dataset(s) at once each")
+
+    # Enough keep-alive connections for every dataset's pages in flight
+    pool_size = per_domain * options.get("workers", 1)
+    engines = {
+        domain: SocrataEngine(
+            domain, app_token, options.get("workers", 1), pool_size=pool_size
+        )
+        for domain in domains
+    }
+    slots = {domain: threading.Semaphore(per_domain) for domain in domains}
+
+    def fetch(key):
+        domain = datasets[key]["domain"]
+        with slots[domain]:
+            return fetch_dataset(key, engine=engines[domain], **options)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(datasets))) as pool:
+            futures = {key: pool.submit(fetch, key) for key in datasets}
+            summaries = {key: future.result() for key, future in futures.items()}
+    finally:
+        for engine in engines.values():
+            engine.close()
 
-    results = {}
-    for key in datasets.keys():
-        print(f"\n{'='*80}")
-        print(f"Dataset {list(datasets.keys()).index(key) + 1}/{len(datasets)}")
-        print(f"{'='*80}")
-        df = fetch_dataset(key, limit=limit, preview=False)
-        if df is not None:
-            results[key] = len(df)
+    return {key: summary for key, summary in summaries.items() if summary}
 
+
+def print_category_summary(results, elapsed):
+    """Print rows, time and bytes per dataset, and the category wall time."""
     print("\n" + "=" * 80)
     print("CATEGORY FETCH COMPLETE")
     print("=" * 80)
-    for key, rows in results.items():
-        print(f"  ✓ {key}: {rows:,} records")
+    print(f"  {'Dataset':<20}{'Records':>12}{'Time':>10}{'Saved':>12}{'Transfer':>12}")
+    for key, summary in results.items():
+        transferred = summary["transferred"]
+        print(
+            f"  ✓ {key:<18}{summary['rows']:>12,}{summary['seconds']:>9.1f}s"
+            f"{summary['bytes'] / (1024 * 1024):>9.2f} MB"
+            + (
+                f"{transferred / (1024 * 1024):>9.2f} MB"
+                if transferred is not None
+                else f"{'n/a':>12}"
+            )
+        )
+    total_seconds = sum(summary["seconds"] for summary in results.values())
+    print(
+        f"\n  Wall time: {elapsed:.1f}s (datasets took {total_seconds:.1f}s in total)"
+    )
     print()
 
 
@@ -249,6 +532,23 @@ Examples:
   # Fetch entire category
   python scripts/fetch_federal_data.py --category health --limit 5000
 
+  # Every BRFSS record, from the bulk CSV export
+  python scripts/fetch_federal_data.py --dataset brfss --limit 0
+
+  # ... or from the JSON API, 8 pages at a time
+  python scripts/fetch_federal_data.py --dataset brfss --limit 0 --json --workers 8
+
+  # Daily refresh: fetch only rows changed since the last sync
+  python scripts/fetch_federal_data.py --dataset seattle-police --sync
+
+  # Only Iowa rows and the columns used downstream (catalog preset)
+  python scripts/fetch_federal_data.py --dataset chronic-disease --preset iowa
+
+  # Ad-hoc SoQL pushdown
+  python scripts/fetch_federal_data.py --dataset obesity \\
+      --select "yearstart, locationabbr, question, data_value" \\
+      --where "locationabbr IN ('IA', 'NE')" --order "yearstart DESC"
+
 Popular Datasets:
   cdc-covid          CDC COVID-19 case surveillance data
   chronic-disease    Chronic disease indicators by state
@@ -272,7 +572,47 @@ Categories:
         "--limit",
         type=int,
         default=10000,
-        help="Maximum records to fetch (default: 10000)",
+        help="Maximum records to fetch (default: 10000, 0 for all)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="JSON pages to download at the same time (default: 1)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="With --category, datasets fetched at once per domain "
+        f"(default: {TOKEN_DOMAIN_CONCURRENCY} with an API token, "
+        f"{PUBLIC_DOMAIN_CONCURRENCY} without)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Page through the JSON API instead of the bulk CSV export",
+    )
+    parser.add_argument(
+        "--format",
+        choices=(LAKE_FORMAT, *OUTPUT_FORMATS),
+        default=LAKE_FORMAT,
+        help="Save as a data lake table (default) or a timestamped csv/parquet file",
+    )
+    parser.add_argument(
+        "--preset", help="Named query from the dataset's catalog entry (e.g., iowa)"
+    )
+    parser.add_argument("--select", help="SoQL columns to fetch")
+    parser.add_argument("--where", help="SoQL row filter")
+    parser.add_argument("--order", help="SoQL sort order")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Keep one local copy and fetch only rows changed since the last sync",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="With --sync, download the whole dataset again",
     )
     parser.add_argument(
         "--preview", action="store_true", help="Show data preview after fetching"
@@ -286,13 +626,39 @@ Categories:
         print("\n💡 TIP: Start with --list to see available datasets\n")
         sys.exit(0)
 
+    query = soql_query(args.select, args.where, args.order)
+    if args.sync and (query or args.preset):
+        print("⚠ --preset/--select/--where/--order are ignored with --sync")
+
     try:
         if args.list:
             list_datasets()
+        elif args.dataset and args.sync:
+            sync_catalog_dataset(args.dataset, args.workers, args.full)
         elif args.dataset:
-            fetch_dataset(args.dataset, args.limit, args.preview)
+            fetch_dataset(
+                args.dataset,
+                args.limit,
+                args.preview,
+                args.workers,
+                args.preset,
+                query,
+                not args.json,
+                fmt=args.format,
+            )
         elif args.category:
-            fetch_category(args.category, args.limit)
+            fetch_category(
+                args.category,
+                args.limit,
+                args.workers,
+                args.sync,
+                args.full,
+                args.preset,
+                query,
+                not args.json,
+                args.concurrency,
+                fmt=args.format,
+            )
         else:
             parser.print_help()
 
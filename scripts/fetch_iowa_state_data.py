@@ -3,14 +3,21 @@ Fetch Iowa state-level Census data for comparison with Scott County.
 
 This script fetches the same Census variables at the state level to enable
 state vs. county comparisons.
+
+Usage:
+    python scripts/fetch_iowa_state_data.py
+    python scripts/fetch_iowa_state_data.py historical
+    python scripts/fetch_iowa_state_data.py historical --refresh
+
+In historical mode only years missing from data/raw/manifest.json are
+requested; they are appended to the historical tables in the data lake
+(data/lake/source=census/).
 """
 
-import os
-from datetime import datetime
+import sys
 from pathlib import Path
 
 import pandas as pd
-import requests
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,8 +25,14 @@ load_dotenv()
 
 # Configuration
 PROJECT_ROOT = Path(__file__).parent.parent
-DATA_DIR = PROJECT_ROOT / "data" / "raw"
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_client import get_census_client
+from scripts.data_lake import LAKE_DIR, LakeTable
+from scripts.fetch_manifest import FetchManifest
+
 STATE_FIPS = "19"  # Iowa
+GEOGRAPHY = f"state:{STATE_FIPS}"  # manifest key
 
 # Same datasets as Scott County for comparison
 CENSUS_DATASETS = {
@@ -91,42 +104,39 @@ def fetch_state_data(year: int = 2021) -> dict:
     print(f"FETCHING IOWA STATE DATA - {year}")
     print(f"{'='*80}\n")
 
-    results = {}
+    # All datasets share as few requests as the variable limit allows
+    try:
+        results = fetch_state_datasets(year)
+    except Exception as e:
+        print(f"  ✗ Error fetching {year}: {e}")
+        return {}
 
     for dataset_name, config in CENSUS_DATASETS.items():
-        print(f"\nFetching {dataset_name}...")
-        print(f"Description: {config['description']}")
+        print(f"\n{dataset_name}: {config['description']}")
+        print(f"  ✓ Successfully fetched {len(results[dataset_name])} row")
 
-        # Build variables list
-        variables = ",".join(config["variables"])
-
-        # Build API URL for state-level data
-        url = (
-            f"https://api.census.gov/data/{year}/acs/acs5"
-            f"?get=NAME,{variables}"
-            f"&for=state:{STATE_FIPS}"
-        )
-
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
+    return results
 
-            data = response.json()
 
-            # Convert to DataFrame
-            df = pd.DataFrame(data[1:], columns=data[0])
-            df["year"] = year
+def fetch_state_datasets(year: int, dataset_names=None) -> dict:
+    """
+    Fetch several datasets for one year with packed requests.
 
-            # Calculate metrics
-            df = calculate_metrics(df, dataset_name)
+    Every dataset's variables are packed into shared requests (up to the
+    API's 50-variable limit) and split back out per dataset.
 
-            results[dataset_name] = df
+    Returns:
+        Dictionary with dataset names as keys and DataFrames as values
+    """
+    dataset_names = dataset_names or list(CENSUS_DATASETS)
+    groups = {name: CENSUS_DATASETS[name]["variables"] for name in dataset_names}
 
-            print(f"  ✓ Successfully fetched {len(df)} row")
+    frames = get_census_client().get_packed(year, groups, f"state:{STATE_FIPS}")
 
-        except Exception as e:
-            print(f"  ✗ Error fetching {dataset_name}: {e}")
-            continue
+    results = {}
+    for dataset_name, df in frames.items():
+        df["year"] = year
+        results[dataset_name] = calculate_metrics(df, dataset_name)
 
     return results
 
@@ -173,98 +183,110 @@ def calculate_metrics(df: pd.DataFrame, dataset_name: str) -> pd.DataFrame:
     return df
 
 
-def fetch_historical_state_data(start_year: int = 2009, end_year: int = 2021) -> dict:
+def fetch_historical_state_data(
+    start_year: int = 2009, end_year: int = 2021, years=None
+) -> dict:
     """
     Fetch historical Iowa state data for trend analysis.
 
     Args:
         start_year: First year to fetch
         end_year: Last year to fetch
+        years: Optional explicit list of years (e.g. only the missing ones)
 
     Returns:
         Dictionary with dataset names as keys and DataFrames as values
     """
+    if years is None:
+        years = list(range(start_year, end_year + 1))
+
     print(f"\n{'='*80}")
     print(f"FETCHING IOWA STATE HISTORICAL DATA ({start_year}-{end_year})")
     print(f"{'='*80}\n")
 
-    all_results = {}
+    frames_by_dataset = {name: [] for name in CENSUS_DATASETS}
 
-    for dataset_name in CENSUS_DATASETS.keys():
-        print(f"\nFetching {dataset_name} historical data...")
-        dataset_frames = []
+    # One packed request per year covers every dataset
+    for year in years:
+        try:
+            year_data = fetch_state_datasets(year)
+            for dataset_name, df in year_data.items():
+                frames_by_dataset[dataset_name].append(df)
+            print(f"  ✓ {year}")
+        except Exception as e:
+            print(f"  ✗ {year}: {e}")
+            continue
 
-        for year in range(start_year, end_year + 1):
-            try:
-                year_data = fetch_state_data_single(dataset_name, year)
-                if year_data is not None:
-                    dataset_frames.append(year_data)
-                    print(f"  ✓ {year}")
-            except Exception as e:
-                print(f"  ✗ {year}: {e}")
-                continue
+    all_results = {}
 
+    for dataset_name, dataset_frames in frames_by_dataset.items():
         if dataset_frames:
             combined_df = pd.concat(dataset_frames, ignore_index=True)
             combined_df = combined_df.sort_values("year")
             all_results[dataset_name] = combined_df
-            print(f"\n  Total: {len(combined_df)} years of data")
+            print(f"\n  {dataset_name}: {len(combined_df)} years of data")
         else:
             print(f"\n  No data collected for {dataset_name}")
 
     return all_results
 
 
-def fetch_state_data_single(dataset_name: str, year: int) -> pd.DataFrame:
-    """Fetch single dataset for single year."""
-    config = CENSUS_DATASETS[dataset_name]
-    variables = ",".join(config["variables"])
-
-    url = (
-        f"https://api.census.gov/data/{year}/acs/acs5"
-        f"?get=NAME,{variables}"
-        f"&for=state:{STATE_FIPS}"
-    )
-
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-
-    data = response.json()
-    df = pd.DataFrame(data[1:], columns=data[0])
-    df["year"] = year
-
-    return calculate_metrics(df, dataset_name)
+def missing_historical_years(
+    manifest: FetchManifest, start_year: int = 2009, end_year: int = 2021
+) -> list:
+    """Return the years any dataset is still missing in the manifest."""
+    missing = set()
+    for dataset_name in CENSUS_DATASETS:
+        missing.update(
+            manifest.missing_years(
+                GEOGRAPHY, dataset_name, range(start_year, end_year + 1)
+            )
+        )
+    return sorted(missing)
 
 
-def save_results(results: dict, prefix: str = "current"):
-    """Save results to CSV files."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+def save_results(results: dict, prefix: str = "current", manifest=None):
+    """
+    Save results to the data lake.
 
+    With a manifest, each dataset's new years are appended to the table that
+    already holds it and recorded in the manifest.
+    """
     print(f"\n{'='*80}")
-    print("SAVING FILES")
+    print("SAVING TABLES")
     print(f"{'='*80}\n")
 
-    DATA_DIR.mkdir(parents=True, exist_ok=True)
-
     for dataset_name, df in results.items():
-        filename = f"iowa_state_{dataset_name}_{prefix}_{timestamp}.csv"
-        filepath = DATA_DIR / filename
-        df.to_csv(filepath, index=False)
-        print(f"  ✓ Saved: {filename}")
+        table = LakeTable("census", f"iowa_state_{dataset_name}_{prefix}")
+        if manifest is not None:
+            table = manifest.append_to_table(GEOGRAPHY, dataset_name, df, table)
+        else:
+            table.write(df)
+        print(f"  ✓ Saved: {table.path.name}")
 
-    print(f"\nAll files saved to: {DATA_DIR}")
+    print(f"\nAll tables saved to: {LAKE_DIR / 'source=census'}")
 
 
 def main():
     """Main execution function."""
-    import sys
+    # --refresh bypasses the local response cache
+    get_census_client().refresh = "--refresh" in sys.argv
 
     if len(sys.argv) > 1 and sys.argv[1] == "historical":
-        # Fetch historical data
-        results = fetch_historical_state_data()
-        if results:
-            save_results(results, prefix="historical")
-            print("\n✓ Historical Iowa state data fetched successfully!")
+        # Fetch only the historical years not stored yet
+        manifest = FetchManifest.load()
+        years = None
+        if "--refresh" not in sys.argv:
+            years = missing_historical_years(manifest)
+
+        if years == []:
+            print("\n✓ All historical years are already stored - nothing to fetch")
+        else:
+            results = fetch_historical_state_data(years=years)
+            if results:
+                save_results(results, prefix="historical", manifest=manifest)
+                manifest.save()
+                print("\n✓ Historical Iowa state data fetched successfully!")
     else:
         # Fetch current year data
         results = fetch_state_data(year=2021)
@@ -272,6 +294,8 @@ def main():
             save_results(results, prefix="2021")
             print("\n✓ Current Iowa state data (2021) fetched successfully!")
 
+    print(f"\nCensus API: {get_census_client().describe_usage()}")
+
     print("\nNext steps:")
     print("  1. Run comparison: python scripts/compare_county_to_state.py")
     print("  2. Analyze trends: python scripts/analyze_yoy_changes.py")
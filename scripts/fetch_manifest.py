@@ -0,0 +1,135 @@
+"""
+Manifest of historical Census data already stored locally.
+
+The manifest records, for each (geography, dataset) pair, which years are
+stored and in which file or data lake table. Historical fetch scripts use
+it to request only the missing years and append them to the existing
+table, so a new ACS release costs one request per new year instead of a
+full re-download.
+
+Datasets still recorded as a CSV in data/raw are moved into their lake
+table the next time years are appended to them.
+
+Usage:
+    from scripts.fetch_manifest import FetchManifest
+
+    manifest = FetchManifest.load()
+    years = manifest.missing_years("county:19163", "education", range(2009, 2023))
+    ...
+    table = manifest.append_to_table("county:19163", "education", df, table)
+    manifest.save()
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from scripts.data_lake import MANIFEST_FILE, LakeTable
+from scripts.utils import DATA_DIR
+
+MANIFEST_PATH = DATA_DIR / "raw" / "manifest.json"
+
+# FIPS columns read back as text so leading zeros survive
+GEOGRAPHY_COLUMNS = ("state", "county", "tract")
+
+
+def write_csv_atomic(df: pd.DataFrame, path: Path) -> None:
+    """Write a CSV via a temp file so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    df.to_csv(tmp_name, index=False)
+    os.replace(tmp_name, path)
+
+
+class FetchManifest:
+    """Which (geography, dataset, year) cells are stored, and where."""
+
+    def __init__(self, path: Path = MANIFEST_PATH, entries: Optional[Dict] = None):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = entries or {}
+
+    @classmethod
+    def load(cls, path: Path = MANIFEST_PATH) -> "FetchManifest":
+        """Load the manifest, or start an empty one if none exists yet."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        return cls(path, json.loads(path.read_text(encoding="utf-8")))
+
+    def save(self) -> None:
+        """Write the manifest atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_name, self.path)
+
+    @staticmethod
+    def entry_key(geography: str, dataset: str) -> str:
+        return f"{geography}/{dataset}"
+
+    def stored_file(self, geography: str, dataset: str) -> Optional[Path]:
+        """
+        Return the file or lake table directory holding this
+        geography/dataset, if it still exists.
+        """
+        entry = self.entries.get(self.entry_key(geography, dataset))
+        if not entry:
+            return None
+        path = self.path.parent / entry["file"]
+        if path.is_dir():
+            return path if (path / MANIFEST_FILE).exists() else None
+        return path if path.exists() else None
+
+    def stored_years(self, geography: str, dataset: str) -> List[int]:
+        """Return the years already stored for a geography/dataset."""
+        if self.stored_file(geography, dataset) is None:
+            return []
+        return self.entries[self.entry_key(geography, dataset)]["years"]
+
+    def missing_years(
+        self, geography: str, dataset: str, years: Iterable[int]
+    ) -> List[int]:
+        """Return the requested years that are not stored yet."""
+        stored = set(self.stored_years(geography, dataset))
+        return [year for year in years if year not in stored]
+
+    def append_to_table(
+        self, geography: str, dataset: str, df: pd.DataFrame, table: LakeTable
+    ) -> LakeTable:
+        """
+        Commit newly fetched years to a data lake table and record them.
+
+        Rows for a year that is already stored are replaced. A dataset still
+        stored as a CSV is moved into the table first, so no stored year is
+        lost.
+
+        Returns:
+            The table now holding every stored year
+        """
+        path = self.stored_file(geography, dataset)
+
+        if path is not None and path.is_file():
+            legacy = pd.read_csv(path, dtype={col: str for col in GEOGRAPHY_COLUMNS})
+            legacy = legacy[~legacy["year"].isin(df["year"])]
+            if not legacy.empty:
+                table.write(sort_places(legacy))
+
+        table.write(sort_places(df))
+
+        self.entries[self.entry_key(geography, dataset)] = {
+            "file": os.path.relpath(table.path, self.path.parent),
+            "years": table.years(),
+        }
+        return table
+
+
+def sort_places(df: pd.DataFrame) -> pd.DataFrame:
+    """Order rows by place, then year, so each place's rows stay together."""
+    order = [col for col in GEOGRAPHY_COLUMNS if col in df.columns]
+    return df.sort_values([*order, "year"], ignore_index=True)
@@ -21,9 +21,7 @@ Usage:
 """
 
 import argparse
-import os
 import sys
-from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
@@ -33,6 +31,13 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_client import get_census_client
+from scripts.data_lake import write_table
+
 # Scott County, Iowa identifiers
 STATE_FIPS = "19"  # Iowa
 COUNTY_FIPS = "163"  # Scott County
@@ -174,83 +179,57 @@ CENSUS_DATASETS = {
 }
 
 
-def check_api_key():
-    """Check if Census API key is available."""
-    api_key = os.getenv("CENSUS_API_KEY")
-
-    if not api_key:
-        print("\nℹ️  No Census API key found (optional - will work without it)")
-        print("   Get one at: https://api.census.gov/data/key_signup.html")
-        print("   for higher rate limits\n")
-        return None
-
-    # Validate key format (Census keys are typically 40 chars)
-    if len(api_key) < 30:
-        print("\n⚠️  Census API key looks invalid (too short)")
-        print("   Proceeding without key...\n")
-        return None
-
-    return api_key
-
+def fetch_datasets(dataset_names, year=2021):
+    """
+    Fetch several datasets for Scott County in as few requests as possible.
 
-def fetch_dataset(dataset_name, dataset_info, year=2021):
-    """Fetch a specific dataset for Scott County."""
-    api_key = check_api_key()
+    The variables of every dataset are packed into shared requests (up to the
+    API's 50-variable limit) and split back out per dataset afterwards.
 
-    variables = dataset_info["variables"]
-    var_list = ",".join(variables.keys())
-
-    base_url = f"https://api.census.gov/data/{year}/acs/acs5"
+    Returns:
+        Dictionary with dataset names as keys and DataFrames as values
+    """
+    groups = {name: list(CENSUS_DATASETS[name]["variables"]) for name in dataset_names}
 
     print(f"\n{'='*80}")
-    print(f"Fetching: {dataset_info['name']}")
+    print(f"Fetching: {', '.join(CENSUS_DATASETS[name]['name'] for name in groups)}")
     print(f"{'='*80}")
     print(f"Location: {LOCATION_NAME}")
-    print(f"Variables: {len(variables)}")
+    print(f"Variables: {sum(len(codes) for codes in groups.values())}")
     print(f"Year: {year} ACS 5-Year Estimates")
 
-    params = {
-        "get": f"NAME,{var_list}",
-        "for": f"county:{COUNTY_FIPS}",
-        "in": f"state:{STATE_FIPS}",
-    }
-
-    # Add key only if available
-    if api_key:
-        params["key"] = api_key
-
     try:
         print("Downloading...")
-        response = requests.get(base_url, params=params, timeout=30)
-        response.raise_for_status()
-
-        data = response.json()
+        frames = get_census_client().get_packed(
+            year, groups, f"county:{COUNTY_FIPS}", f"state:{STATE_FIPS}"
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error: {str(e)}")
+        if hasattr(e, "response") and hasattr(e.response, "text"):
+            print(f"   Response: {e.response.text[:200]}")
+        return {}
 
-        # Convert to DataFrame
-        df = pd.DataFrame(data[1:], columns=data[0])
+    results = {}
+    for name, df in frames.items():
+        results[name] = tidy_dataset(df, CENSUS_DATASETS[name]["variables"])
+        print(f"✓ {CENSUS_DATASETS[name]['name']}: {len(df.columns) - 3} indicators")
 
-        # Rename columns
-        for var_code, var_name in variables.items():
-            if var_code in df.columns:
-                df.rename(columns={var_code: var_name}, inplace=True)
+    return results
 
-        # Convert numeric columns
-        for col in df.columns:
-            if col not in ["NAME", "state", "county"]:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
 
-        print(f"✓ Downloaded {len(df.columns) - 3} indicators")
+def tidy_dataset(df, variables):
+    """Rename variable codes to labels and convert values to numbers."""
+    # Rename columns
+    for var_code, var_name in variables.items():
+        if var_code in df.columns:
+            df.rename(columns={var_code: var_name}, inplace=True)
 
-        return df
+    # Convert numeric columns
+    for col in df.columns:
+        if col not in ["NAME", "state", "county"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error: {str(e)}")
-        if hasattr(e, "response") and hasattr(e.response, "text"):
-            print(f"   Response: {e.response.text[:200]}")
-        return None
-    except Exception as e:
-        print(f"❌ Error: {str(e)}")
-        return None
+    return df
 
 
 def calculate_metrics(df, dataset_name):
@@ -359,24 +338,16 @@ def calculate_metrics(df, dataset_name):
 
 
 def save_dataset(df, dataset_name, year):
-    """Save dataset to file."""
+    """Save dataset to the data lake."""
     if df is None or df.empty:
         return None
 
-    output_dir = Path("data/raw")
-    output_dir.mkdir(parents=True, exist_ok=True)
+    table = write_table(df, "census", f"scott_county_iowa_{dataset_name}_{year}", year)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"scott_county_iowa_{dataset_name}_{year}_{timestamp}.csv"
-    output_file = output_dir / filename
+    print(f"✓ Saved: {table.path.name}")
+    print(f"✓ Size: {table.size_bytes() / 1024:.2f} KB")
 
-    df.to_csv(output_file, index=False)
-
-    file_size_kb = output_file.stat().st_size / 1024
-    print(f"✓ Saved: {output_file.name}")
-    print(f"✓ Size: {file_size_kb:.2f} KB")
-
-    return output_file
+    return table
 
 
 def create_summary_report(all_data, year):
@@ -501,12 +472,10 @@ Requires: Free Census API key from https://api.census.gov/data/key_signup.html
             CENSUS_DATASETS.keys() if args.dataset == "all" else [args.dataset]
         )
 
-        for dataset_name in datasets_to_fetch:
-            dataset_info = CENSUS_DATASETS[dataset_name]
-
-            # Fetch data
-            df = fetch_dataset(dataset_name, dataset_info, args.year)
+        # Fetch all requested datasets with packed requests
+        fetched = fetch_datasets(datasets_to_fetch, args.year)
 
+        for dataset_name, df in fetched.items():
             if df is not None:
                 # Calculate metrics
                 df = calculate_metrics(df, dataset_name)
@@ -522,11 +491,13 @@ Requires: Free Census API key from https://api.census.gov/data/key_signup.html
 
             print("\n✅ SUCCESS! All Census data for Scott County, Iowa downloaded.")
             print(
-                f"\n📁 Files saved to: data/raw/scott_county_iowa_*_{args.year}_*.csv"
+                "\n📁 Tables saved to: data/lake/source=census/"
+                f"dataset=scott_county_iowa_*_{args.year}"
             )
             print("\n🎯 Next Steps:")
             print(
-                "   1. Load in Python: pd.read_csv('data/raw/scott_county_iowa_*.csv')"
+                "   1. Load in Python: "
+                "read_table('census', 'scott_county_iowa_<dataset>_<year>')"
             )
             print("   2. Open in Jupyter: jupyter lab")
             print("   3. Analyze and visualize the data")
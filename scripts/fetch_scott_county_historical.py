@@ -11,13 +11,28 @@ Usage:
     python scripts/fetch_scott_county_historical.py
     python scripts/fetch_scott_county_historical.py --start-year 2015
     python scripts/fetch_scott_county_historical.py --dataset education
+    python scripts/fetch_scott_county_historical.py --concurrency 8
+    python scripts/fetch_scott_county_historical.py --refresh
+    python scripts/fetch_scott_county_historical.py --all-counties --state 19
+    python scripts/fetch_scott_county_historical.py --deadline 120
+
+Years already stored (per data/raw/manifest.json) are skipped; only missing
+years are requested and committed to the dataset's table in the data lake
+(data/lake/source=census/, see data_lake.py).
+
+With --all-counties, every county in the state comes back in the same
+response (``for=county:*``), and each dataset is written as one tidy
+county x year table.
+
+If the API keeps failing, the client's circuit breaker makes the remaining
+years fail at once instead of each waiting out its timeout; --deadline
+bounds the whole run.
 """
 
 import argparse
-import os
 import sys
 import time
-from datetime import datetime
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
@@ -27,10 +42,23 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.census_async import run_concurrently
+from scripts.census_cache import is_published_vintage
+from scripts.census_client import get_census_client
+from scripts.circuit_breaker import Deadline
+from scripts.data_lake import LakeTable
+from scripts.fetch_manifest import FetchManifest
+
 # Scott County, Iowa identifiers
 STATE_FIPS = "19"  # Iowa
 COUNTY_FIPS = "163"  # Scott County
 LOCATION_NAME = "Scott County, Iowa"
+GEOGRAPHY = f"county:{STATE_FIPS}{COUNTY_FIPS}"  # manifest key
+FILE_PREFIX = "scott_county_iowa"
 
 # Available years (ACS 5-Year Estimates)
 AVAILABLE_YEARS = list(range(2009, 2022))  # 2009-2021
@@ -89,71 +117,58 @@ CENSUS_DATASETS = {
 }
 
 
-def check_api_key():
-    """Check if Census API key is available."""
-    api_key = os.getenv("CENSUS_API_KEY")
+def fetch_year_datasets(
+    dataset_names,
+    year,
+    for_geo=f"county:{COUNTY_FIPS}",
+    in_geo=f"state:{STATE_FIPS}",
+):
+    """
+    Fetch several datasets for one year in as few requests as possible.
 
-    if not api_key:
-        print("\nℹ️  No Census API key (optional - will work without it)")
-        return None
-
-    if len(api_key) < 30:
-        print("\n⚠️  Census API key looks invalid")
-        return None
+    Every dataset's variables are packed into shared requests (up to the
+    API's 50-variable limit) and split back out per dataset.
 
-    return api_key
+    Args:
+        for_geo, in_geo: Geography clauses; ``county:*`` returns every
+            county in the ``in_geo`` state in the same response
 
-
-def fetch_year_data(dataset_name, dataset_info, year):
-    """Fetch data for a specific year."""
-    api_key = check_api_key()
-
-    variables = dataset_info["variables"]
-    var_list = ",".join(variables.keys())
-
-    base_url = f"https://api.census.gov/data/{year}/acs/acs5"
-
-    params = {
-        "get": f"NAME,{var_list}",
-        "for": f"county:{COUNTY_FIPS}",
-        "in": f"state:{STATE_FIPS}",
-    }
-
-    if api_key:
-        params["key"] = api_key
+    Returns:
+        Dictionary of dataset name to DataFrame, or None if the year failed
+    """
+    groups = {name: list(CENSUS_DATASETS[name]["variables"]) for name in dataset_names}
 
     try:
-        response = requests.get(base_url, params=params, timeout=15)
-        response.raise_for_status()
-
-        # Check for HTML error response
-        if response.text.startswith("<"):
-            return None
-
-        data = response.json()
+        frames = get_census_client().get_packed(
+            year, groups, for_geo, in_geo, timeout=15
+        )
+    except requests.exceptions.RequestException as e:
+        # Also covers CensusAPIError and an open circuit (CircuitOpenError)
+        print(f"  ⚠ {year}: {e}")
+        return None
 
-        # Convert to DataFrame
-        df = pd.DataFrame(data[1:], columns=data[0])
+    return {
+        name: tidy_year_data(df, CENSUS_DATASETS[name]["variables"], year)
+        for name, df in frames.items()
+    }
 
-        # Add year column
-        df["year"] = year
 
-        # Rename columns
-        for var_code, var_name in variables.items():
-            if var_code in df.columns:
-                df.rename(columns={var_code: var_name}, inplace=True)
+def tidy_year_data(df, variables, year):
+    """Add the year, rename variable codes to labels and convert to numbers."""
+    # Add year column
+    df["year"] = year
 
-        # Convert numeric columns
-        for col in df.columns:
-            if col not in ["NAME", "state", "county", "year"]:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
+    # Rename columns
+    for var_code, var_name in variables.items():
+        if var_code in df.columns:
+            df.rename(columns={var_code: var_name}, inplace=True)
 
-        return df
+    # Convert numeric columns
+    for col in df.columns:
+        if col not in ["NAME", "state", "county", "year"]:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    except requests.exceptions.RequestException:
-        return None
-    except Exception:
-        return None
+    return df
 
 
 def calculate_metrics(df, dataset_name):
@@ -217,34 +232,8 @@ def calculate_metrics(df, dataset_name):
     return df
 
 
-def fetch_historical_dataset(dataset_name, dataset_info, start_year, end_year):
-    """Fetch historical data for all years."""
-    print(f"\n{'='*80}")
-    print(f"Fetching Historical: {dataset_info['name']}")
-    print(f"{'='*80}")
-    print(f"Location: {LOCATION_NAME}")
-    print(f"Years: {start_year}-{end_year} ({end_year - start_year + 1} years)")
-    print(f"Variables: {len(dataset_info['variables'])}")
-
-    all_data = []
-    failed_years = []
-
-    for year in range(start_year, end_year + 1):
-        print(f"  Fetching {year}...", end=" ", flush=True)
-
-        df = fetch_year_data(dataset_name, dataset_info, year)
-
-        if df is not None and not df.empty:
-            df = calculate_metrics(df, dataset_name)
-            all_data.append(df)
-            print("✓")
-        else:
-            failed_years.append(year)
-            print("✗")
-
-        # Be nice to the API
-        time.sleep(0.5)
-
+def combine_years(all_data, failed_years):
+    """Combine per-year frames into one year-sorted DataFrame."""
     if not all_data:
         print(f"\n❌ No data retrieved")
         return None
@@ -260,26 +249,147 @@ def fetch_historical_dataset(dataset_name, dataset_info, start_year, end_year):
     return combined
 
 
-def save_historical_data(df, dataset_name):
-    """Save historical data to file."""
+def fetch_historical_datasets(
+    dataset_names,
+    start_year,
+    end_year,
+    concurrency=1,
+    plan=None,
+    geography=None,
+    location=LOCATION_NAME,
+):
+    """
+    Fetch several datasets for a range of years.
+
+    Each year's datasets are packed into shared requests, and with
+    ``concurrency`` > 1 the years are fetched at the same time.
+
+    Args:
+        plan: Optional mapping of year to the dataset names to fetch that
+            year (see plan_missing_years); defaults to every dataset for
+            every year in the range
+        geography: Optional (for_geo, in_geo) pair; defaults to Scott County
+        location: Name of the geography for progress output
+
+    Returns:
+        Dictionary of dataset name to its years combined into one
+        year-sorted DataFrame (None if no year was retrieved)
+    """
+    if plan is None:
+        plan = {year: dataset_names for year in range(start_year, end_year + 1)}
+    calls = {
+        year: partial(fetch_year_datasets, names, year, *(geography or ()))
+        for year, names in plan.items()
+    }
+
+    print(f"\n{'='*80}")
+    print(f"Fetching {len(dataset_names)} datasets for {len(calls)} years")
+    print(f"{'='*80}")
+    print(f"Location: {location}")
+    print(f"Concurrent requests: {concurrency}")
+
+    get_census_client().ensure_pool_size(concurrency)
+    started = time.perf_counter()
+    responses = run_concurrently(calls, concurrency=concurrency)
+    print(f"✓ Finished in {time.perf_counter() - started:.1f}s")
+
+    # Request failures come back as None; anything raised is a bug
+    for response in responses.values():
+        if isinstance(response, Exception):
+            raise response
+
+    results = {}
+    for dataset_name in dataset_names:
+        print(f"\n{CENSUS_DATASETS[dataset_name]['name']}:")
+
+        all_data = []
+        failed_years = []
+        for year, names in plan.items():
+            if dataset_name not in names:
+                continue
+            frames = responses[year]
+            df = frames.get(dataset_name) if isinstance(frames, dict) else None
+            if df is not None and not df.empty:
+                all_data.append(calculate_metrics(df, dataset_name))
+            else:
+                failed_years.append(year)
+
+        results[dataset_name] = combine_years(all_data, failed_years)
+
+    return results
+
+
+def plan_missing_years(
+    dataset_names, start_year, end_year, manifest, geography=GEOGRAPHY
+):
+    """
+    Work out which datasets still need fetching for each year.
+
+    Returns:
+        Mapping of year to the dataset names missing for it; years with
+        nothing missing are left out
+    """
+    plan = {}
+    for dataset_name in dataset_names:
+        missing = manifest.missing_years(
+            geography, dataset_name, range(start_year, end_year + 1)
+        )
+        for year in missing:
+            plan.setdefault(year, []).append(dataset_name)
+    return dict(sorted(plan.items()))
+
+
+def save_historical_data(
+    df, dataset_name, manifest=None, geography=GEOGRAPHY, prefix=FILE_PREFIX
+):
+    """
+    Save historical data to the data lake.
+
+    With a manifest, the new years are appended to the table that already
+    holds this dataset and recorded; otherwise the years in ``df`` replace
+    those stored in the table.
+    """
     if df is None or df.empty:
         return None
 
-    output_dir = Path("data/raw")
-    output_dir.mkdir(parents=True, exist_ok=True)
+    table = LakeTable("census", f"{prefix}_{dataset_name}_historical")
+
+    if manifest is not None:
+        table = manifest.append_to_table(geography, dataset_name, df, table)
+    else:
+        table.write(df)
+
+    print(f"\n✓ Saved: {table.path.name}")
+    print(f"✓ Added years: {', '.join(map(str, sorted(df['year'].unique())))}")
+    print(f"✓ Size: {table.size_bytes() / 1024:.2f} KB")
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"scott_county_iowa_{dataset_name}_historical_{timestamp}.csv"
-    output_file = output_dir / filename
+    return table
 
-    df.to_csv(output_file, index=False)
 
-    file_size_kb = output_file.stat().st_size / 1024
-    print(f"\n✓ Saved: {output_file.name}")
-    print(f"✓ Records: {len(df)} (years × variables)")
-    print(f"✓ Size: {file_size_kb:.2f} KB")
+def tidy_counties_table(df):
+    """
+    Shape an all-counties result as one row per county and year.
 
-    return output_file
+    Geography columns come first (state, county FIPS, name), then the year,
+    then the values, sorted by county and year.
+    """
+    df = df.astype({"state": str, "county": str})
+    df["county"] = df["county"].str.zfill(3)
+    front = ["state", "county", "NAME", "year"]
+    df = df[front + [col for col in df.columns if col not in front]]
+    return df.sort_values(["county", "year"], ignore_index=True)
+
+
+def show_county_coverage(df, dataset_name):
+    """Summarise an all-counties table."""
+    if df is None or df.empty:
+        return
+
+    years = sorted(df["year"].unique())
+    print(
+        f"📍 {dataset_name}: {df['county'].nunique()} counties x "
+        f"{len(years)} years ({years[0]}-{years[-1]}), {len(df):,} rows"
+    )
 
 
 def show_trends(df, dataset_name):
@@ -372,6 +482,18 @@ Examples:
 
   # From 2015 onwards
   python scripts/fetch_scott_county_historical.py --start-year 2015
+
+  # Send up to 8 requests at once instead of one year at a time
+  python scripts/fetch_scott_county_historical.py --concurrency 8
+
+  # Ignore cached responses and download everything again
+  python scripts/fetch_scott_county_historical.py --refresh
+
+  # Every county in Iowa, one county x year table per dataset
+  python scripts/fetch_scott_county_historical.py --all-counties --state 19
+
+  # Scheduled run: give up after 2 minutes if the API is degraded
+  python scripts/fetch_scott_county_historical.py --deadline 120
         """,
     )
 
@@ -391,7 +513,33 @@ Examples:
         "--end-year",
         type=int,
         default=2021,
-        help="Ending year (default: 2021, most recent)",
+        help="Ending year (default: 2021; later published vintages are allowed)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of concurrent requests (default: 1, one year at a time)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Bypass the local response cache and re-download every year",
+    )
+    parser.add_argument(
+        "--all-counties",
+        action="store_true",
+        help="Fetch every county in --state instead of just Scott County",
+    )
+    parser.add_argument(
+        "--state",
+        default=STATE_FIPS,
+        help=f"State FIPS code for --all-counties (default: {STATE_FIPS})",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Stop sending requests N seconds into the run (default: no limit)",
     )
 
     args = parser.parse_args()
@@ -401,16 +549,38 @@ Examples:
         print("⚠ Warning: ACS 5-Year data starts in 2009")
         args.start_year = 2009
 
-    if args.end_year > 2021:
-        print("⚠ Warning: 2021 is most recent complete year")
-        args.end_year = 2021
+    if not is_published_vintage(args.end_year):
+        print(f"⚠ Warning: {args.end_year} ACS 5-Year data is not published yet")
+        while not is_published_vintage(args.end_year):
+            args.end_year -= 1
+
+    get_census_client().refresh = args.refresh
+    if args.deadline:
+        get_census_client().deadline = Deadline(args.deadline)
+
+    # One county, or every county in the state in a single response
+    if args.all_counties:
+        state = args.state.zfill(2)
+        location = f"All counties in state {state}"
+        request_geo = ("county:*", f"state:{state}")
+        geography = f"county:{state}*"
+        prefix = f"state_{state}_counties"
+    else:
+        location = LOCATION_NAME
+        request_geo = None
+        geography = GEOGRAPHY
+        prefix = FILE_PREFIX
 
     try:
         print("\n" + "=" * 80)
-        print(f"FETCHING HISTORICAL CENSUS DATA FOR {LOCATION_NAME}")
+        print(f"FETCHING HISTORICAL CENSUS DATA FOR {location.upper()}")
         print("=" * 80)
-        print(f"State FIPS: {STATE_FIPS} (Iowa)")
-        print(f"County FIPS: {COUNTY_FIPS} (Scott County)")
+        if args.all_counties:
+            print(f"State FIPS: {state}")
+            print("Counties: all (for=county:*)")
+        else:
+            print(f"State FIPS: {STATE_FIPS} (Iowa)")
+            print(f"County FIPS: {COUNTY_FIPS} (Scott County)")
         print(f"Years: {args.start_year}-{args.end_year}")
         print(f"Source: ACS 5-Year Estimates")
         print("=" * 80)
@@ -419,30 +589,62 @@ Examples:
             CENSUS_DATASETS.keys() if args.dataset == "all" else [args.dataset]
         )
 
-        all_files = []
-
-        for dataset_name in datasets_to_fetch:
-            dataset_info = CENSUS_DATASETS[dataset_name]
+        all_tables = []
+        manifest = FetchManifest.load()
+
+        # Only request years not already stored (--refresh refetches all)
+        plan = None
+        if not args.refresh:
+            plan = plan_missing_years(
+                list(datasets_to_fetch),
+                args.start_year,
+                args.end_year,
+                manifest,
+                geography,
+            )
 
-            # Fetch historical data
-            df = fetch_historical_dataset(
-                dataset_name, dataset_info, args.start_year, args.end_year
+        if plan == {}:
+            print("\n✓ All requested years are already stored - nothing to fetch")
+            fetched = {}
+        else:
+            # Fetch historical data; each year's datasets share packed requests
+            fetched = fetch_historical_datasets(
+                list(datasets_to_fetch),
+                args.start_year,
+                args.end_year,
+                args.concurrency,
+                plan,
+                request_geo,
+                location,
             )
 
+        for dataset_name, df in fetched.items():
             if df is not None:
-                # Save data
-                output_file = save_historical_data(df, dataset_name)
-                if output_file:
-                    all_files.append(output_file)
+                if args.all_counties:
+                    df = tidy_counties_table(df)
+
+                # Append new years to the stored table
+                table = save_historical_data(
+                    df, dataset_name, manifest, geography, prefix
+                )
+                if table:
+                    all_tables.append(table)
+
+                    # Show trends across every stored year
+                    stored = table.read()
+                    if args.all_counties:
+                        show_county_coverage(stored, dataset_name)
+                    else:
+                        show_trends(stored, dataset_name)
 
-                # Show trends
-                show_trends(df, dataset_name)
+        manifest.save()
 
         # Final summary
         print("=" * 80)
         print("✅ HISTORICAL DATA FETCH COMPLETE")
         print("=" * 80)
-        print(f"\n📁 {len(all_files)} files saved to data/raw/")
+        print(f"\n📁 {len(all_tables)} tables updated in data/lake/")
+        print(f"🌐 Census API: {get_census_client().describe_usage()}")
         print("\n🎯 Next Steps:")
         print("   1. Open in Jupyter Lab for time series analysis")
         print("   2. Create trend visualizations")
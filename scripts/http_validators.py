@@ -0,0 +1,108 @@
+"""
+HTTP cache validators (ETag / Last-Modified) for conditional requests.
+
+A response's ``ETag`` and ``Last-Modified`` headers are stored with the
+local copy made from it. The next request for the same resource sends them
+back as ``If-None-Match`` / ``If-Modified-Since``; if nothing changed, the
+server answers ``304 Not Modified`` with an empty body and the local copy
+is reused, so polling an unchanged resource costs one round trip instead of
+a full download and parse.
+
+The Census response and metadata caches keep validators in their own
+entries (census_cache.py, census_metadata.py). Downloads that end up as
+files, such as Socrata bulk exports, record theirs in a ValidatorStore in
+the output directory, next to the files they describe.
+
+Usage:
+    from scripts.http_validators import (
+        NOT_MODIFIED, conditional_headers, response_validators,
+    )
+
+    response = session.get(url, headers=conditional_headers(stored))
+    if response.status_code == NOT_MODIFIED:
+        ...  # reuse the local copy
+    else:
+        stored = response_validators(response)
+"""
+
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+NOT_MODIFIED = 304
+
+VALIDATORS_FILE = "validators.json"
+
+# Serializes read-modify-write of validator files between threads
+_store_lock = threading.Lock()
+
+
+def response_validators(response) -> Dict[str, str]:
+    """Return the ``etag`` / ``last_modified`` validators of a response."""
+    validators = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return {name: value for name, value in validators.items() if value}
+
+
+def conditional_headers(validators: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Return the request headers that revalidate a stored copy."""
+    headers = {}
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    return headers
+
+
+class ValidatorStore:
+    """Validators and local files of downloads, kept in one directory."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.path = self.directory / VALIDATORS_FILE
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, resource: str) -> Optional[Dict]:
+        """
+        Return the stored entry for a resource, if its local file still exists.
+
+        The entry holds the validators plus the ``file`` (relative to the
+        directory) and whatever else was recorded with it.
+        """
+        entry = self._read().get(resource)
+        if not entry or not (self.directory / entry["file"]).exists():
+            return None
+        return {**entry, "file": self.directory / entry["file"]}
+
+    def record(
+        self, resource: str, path, validators: Dict[str, str], **details
+    ) -> None:
+        """Record the validators of a completed download; the write is atomic."""
+        if not validators:
+            return
+        with _store_lock:
+            entries = self._read()
+            entries[resource] = {
+                **validators,
+                **details,
+                "file": os.path.relpath(path, self.directory),
+                "fetched_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_name, self.path)
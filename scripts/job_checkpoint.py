@@ -0,0 +1,88 @@
+"""
+Checkpoints for long-running, resumable ingestion jobs.
+
+A job records each completed unit of work (for example one county, category
+and year) as a line in an append-only JSON Lines file, flushed to disk as
+soon as it is done. If the job dies or is interrupted, the next run loads
+the file and skips every unit already recorded. A torn final line from a
+crash mid-write is cut off on load, so the next record starts on a line of
+its own.
+
+Usage:
+    from scripts.job_checkpoint import JobCheckpoint
+
+    checkpoint = JobCheckpoint.for_job("comparison_counties")
+    if not checkpoint.is_done("linn", "income", 2021):
+        row = fetch(...)
+        checkpoint.record("linn", "income", 2021, result=row)
+    ...
+    checkpoint.clear()  # once the job has finished
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Hashable, Iterator, Optional, Tuple
+
+from scripts.utils import DATA_DIR
+
+CHECKPOINT_DIR = DATA_DIR / "cache" / "jobs"
+
+
+class JobCheckpoint:
+    """Append-only record of the work units a job has completed."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.done: Dict[Tuple, Any] = {}
+        self._load()
+
+    @classmethod
+    def for_job(cls, name: str, directory: Path = CHECKPOINT_DIR) -> "JobCheckpoint":
+        """Return the checkpoint for a named job."""
+        return cls(Path(directory) / f"{name}.jsonl")
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if not data.endswith(b"\n"):
+                # Partial line left by a crash mid-write; appending after it
+                # would corrupt the next record too
+                data = data[: data.rfind(b"\n") + 1]
+                f.truncate(len(data))
+        for line in data.decode("utf-8").splitlines():
+            entry = json.loads(line)
+            self.done[tuple(entry["unit"])] = entry["result"]
+
+    def __len__(self) -> int:
+        return len(self.done)
+
+    def is_done(self, *unit: Hashable) -> bool:
+        """Return True if this unit of work has already been recorded."""
+        return unit in self.done
+
+    def result(self, *unit: Hashable) -> Optional[Any]:
+        """Return the recorded result for a unit, or None."""
+        return self.done.get(unit)
+
+    def record(self, *unit: Hashable, result: Any = None) -> None:
+        """Record a completed unit of work and flush it to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({"unit": list(unit), "result": result})
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.done[unit] = result
+
+    def items(self) -> Iterator[Tuple[Tuple, Any]]:
+        """Iterate over (unit, result) pairs in the order they were recorded."""
+        return iter(self.done.items())
+
+    def clear(self) -> None:
+        """Forget every recorded unit and remove the checkpoint file."""
+        self.done.clear()
+        if self.path.exists():
+            self.path.unlink()
@@ -1,16 +1,18 @@
+import sys
 from pathlib import Path
 
-import pandas as pd
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_lake import find_tables, load_latest
 
 print("\n" + "=" * 80)
 print("SCOTT COUNTY, IOWA - HISTORICAL DATA SUMMARY")
 print("=" * 80 + "\n")
 
-files = list(Path("data/raw").glob("scott_county_iowa_*_historical_*.csv"))
-
-for f in sorted(files):
-    df = pd.read_csv(f)
-    dataset = f.stem.split("_")[3]
+for table in find_tables("scott_county_iowa_*_historical_*.csv"):
+    df = table.read()
+    dataset = table.dataset.split("_")[3]
     years = f"{int(df['year'].min())}-{int(df['year'].max())}"
     print(f"{dataset.title():15} {len(df):2} years  ({years})")
 
@@ -19,7 +21,7 @@ print("QUICK STATS")
 print("=" * 80 + "\n")
 
 # Education
-edu = pd.read_csv(next(Path("data/raw").glob("*education_historical_*.csv")))
+edu = load_latest("scott_county_iowa_education_historical_*.csv")
 first_edu = edu[edu["year"] == edu["year"].min()][
     "Bachelor's degree or higher (%)"
 ].values[0]
@@ -31,7 +33,7 @@ print(
 )
 
 # Income
-inc = pd.read_csv(next(Path("data/raw").glob("*income_historical_*.csv")))
+inc = load_latest("scott_county_iowa_income_historical_*.csv")
 first_inc = inc[inc["year"] == inc["year"].min()]["Median household income"].values[0]
 last_inc = inc[inc["year"] == inc["year"].max()]["Median household income"].values[0]
 print(
@@ -39,7 +41,7 @@ print(
 )
 
 # Population
-pop = pd.read_csv(next(Path("data/raw").glob("*demographics_historical_*.csv")))
+pop = load_latest("scott_county_iowa_demographics_historical_*.csv")
 first_pop = pop[pop["year"] == pop["year"].min()]["Total population"].values[0]
 last_pop = pop[pop["year"] == pop["year"].max()]["Total population"].values[0]
 print(
@@ -47,7 +49,7 @@ print(
 )
 
 # Housing
-hs = pd.read_csv(next(Path("data/raw").glob("*housing_historical_*.csv")))
+hs = load_latest("scott_county_iowa_housing_historical_*.csv")
 first_hs = hs[hs["year"] == hs["year"].min()]["Median home value"].values[0]
 last_hs = hs[hs["year"] == hs["year"].max()]["Median home value"].values[0]
 print(
@@ -0,0 +1,89 @@
+"""
+Token-bucket rate limiter with adaptive backoff.
+
+The bucket refills at a steady rate and allows short bursts up to its
+capacity. When the server pushes back (HTTP 429 or 5xx), the rate is halved;
+each successful response then wins a little of it back until the configured
+rate is restored. This lets a fetch run close to the real quota instead of
+idling on fixed sleeps.
+
+Usage:
+    from scripts.rate_limiter import census_rate_limiter
+
+    limiter = census_rate_limiter(api_key)
+    limiter.acquire()      # blocks until a request may be sent
+    limiter.on_throttle()  # after a 429/5xx
+    limiter.on_success()   # after a good response
+"""
+
+import threading
+import time
+from typing import Optional
+
+# Census API pacing: keyed requests get a much larger allowance
+KEYED_RATE = 20.0  # requests per second
+KEYED_BURST = 20
+ANONYMOUS_RATE = 2.0
+ANONYMOUS_BURST = 5
+
+# Share of the configured rate regained per successful response
+RECOVERY_STEP = 0.1
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts to throttling."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        min_rate: Optional[float] = None,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def on_throttle(self) -> None:
+        """Halve the rate and drop any saved-up burst."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = min(self.tokens, 0.0)
+
+    def on_success(self) -> None:
+        """Win back part of the configured rate after a good response."""
+        with self._lock:
+            if self.rate < self.base_rate:
+                self._refill(time.monotonic())
+                self.rate = min(
+                    self.base_rate, self.rate + self.base_rate * RECOVERY_STEP
+                )
+
+
+def census_rate_limiter(api_key: Optional[str]) -> TokenBucket:
+    """Return a bucket sized to whether a Census API key is in use."""
+    if api_key:
+        return TokenBucket(KEYED_RATE, KEYED_BURST)
+    return TokenBucket(ANONYMOUS_RATE, ANONYMOUS_BURST)
@@ -1,9 +1,15 @@
 """Analyze available datasets and suggest next steps."""
 
+import sys
 from pathlib import Path
 
 import pandas as pd
 
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_lake import find_tables
+
 print("\n" + "=" * 60)
 print("📊 YOUR DATA INVENTORY")
 print("=" * 60 + "\n")
@@ -22,7 +28,21 @@ for f in files:
     print(f"   First 3 columns: {', '.join(df.columns[:3])}")
     print()
 
-print(f"💾 Total: {len(files)} files with {total_rows:,} rows combined\n")
+tables = find_tables("*")
+for table in tables:
+    df = table.read()
+    total_rows += len(df)
+    print(f"🗄️  {table.source}/{table.dataset} (data lake)")
+    print(f"   Rows: {len(df):,}")
+    print(f"   Columns: {len(df.columns)}")
+    print(f"   Size: {table.size_bytes() / 1024:.1f} KB")
+    print(f"   First 3 columns: {', '.join(df.columns[:3])}")
+    print()
+
+print(
+    f"💾 Total: {len(files)} files and {len(tables)} tables "
+    f"with {total_rows:,} rows combined\n"
+)
 
 print("=" * 60)
 print("🎯 SUGGESTED NEXT STEPS")
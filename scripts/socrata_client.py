@@ -0,0 +1,370 @@
+"""
+Shared construction of Socrata (data.gov) clients.
+
+Every Socrata fetch script builds its sodapy client here, so one setting can
+redirect them all. SOCRATA_BASE_URL sends requests to another server, such
+as the local stand-in (see api_standin.py), instead of the dataset's real
+domain; the real domain is passed along in an ``X-Socrata-Host`` header.
+
+Usage:
+    from scripts.socrata_client import make_socrata_client
+
+    client = make_socrata_client("data.seattle.gov")
+    rows = client.get("kzjm-xkqj", limit=100)
+
+    # Point at a stand-in:
+    # SOCRATA_BASE_URL=http://127.0.0.1:8765
+
+Large datasets are read a page at a time (iter_pages) and appended to disk
+as each page arrives (write_pages), so memory use does not grow with the
+size of the dataset:
+
+    pages = iter_pages(client, "vbim-akqf", limit=None)
+    rows = write_pages(pages, "data/raw/cdc_covid.csv")
+
+Columns, filters and sort order can be pushed down to the server as SoQL
+(``select``, ``where``, ``order``), so only the rows and columns that are
+used get transferred and parsed:
+
+    query = soql_query(select="year, value", where="locationabbr = 'IA'")
+    pages = iter_pages(client, "g4ie-h725", **query)
+
+With ``workers`` > 1, iter_pages requests several pages at once and still
+yields them in order. At most ``workers`` pages are in flight or waiting to
+be written at any time, so memory stays bounded by ``workers * page_size``.
+"""
+
+import csv
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from pathlib import Path
+from typing import (
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from urllib.parse import urlsplit
+
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from sodapy import Socrata
+
+# Load environment variables
+load_dotenv()
+
+# sodapy's default request timeout, in seconds
+DEFAULT_TIMEOUT = 10
+
+# Rows per request when paging (the SODA 2.x maximum is 50,000)
+PAGE_SIZE = 50000
+
+# Datasets fetched at once from one Socrata domain. Requests with an app
+# token get their own, much larger allowance; anonymous requests share a
+# per-IP throttle, so they are kept to a trickle.
+TOKEN_DOMAIN_CONCURRENCY = 4
+PUBLIC_DOMAIN_CONCURRENCY = 1
+
+
+def socrata_app_token() -> Optional[str]:
+    """Return the data.gov app token from the environment, if any."""
+    return os.getenv("DATA_GOV_APP_TOKEN")
+
+
+def domain_concurrency(app_token: Optional[str]) -> int:
+    """Return how many datasets to fetch at once per domain for a token tier."""
+    return TOKEN_DOMAIN_CONCURRENCY if app_token else PUBLIC_DOMAIN_CONCURRENCY
+
+
+def make_socrata_client(
+    domain: str,
+    app_token: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+    pool_size: Optional[int] = None,
+) -> Socrata:
+    """
+    Create a Socrata client for a domain, honouring SOCRATA_BASE_URL.
+
+    Args:
+        domain: Socrata domain, e.g. "data.seattle.gov"
+        app_token: Optional app token for higher rate limits
+        timeout: Request timeout in seconds
+        pool_size: Keep-alive connections to hold open, for concurrent
+            page requests (default: requests' pool of 10)
+
+    Returns:
+        sodapy Socrata client
+    """
+    base_url = os.getenv("SOCRATA_BASE_URL")
+    adapter = (
+        HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        if pool_size
+        else HTTPAdapter()
+    )
+    if not base_url:
+        return Socrata(
+            domain,
+            app_token,
+            session_adapter={"prefix": "https://", "adapter": adapter},
+            timeout=timeout,
+        )
+
+    target = urlsplit(base_url)
+    client = Socrata(
+        target.netloc,
+        app_token,
+        session_adapter={"prefix": f"{target.scheme}://", "adapter": adapter},
+        timeout=timeout,
+    )
+    client.session.headers["X-Socrata-Host"] = domain
+    return client
+
+
+def soql_query(
+    select: Optional[str] = None,
+    where: Optional[str] = None,
+    order: Optional[str] = None,
+) -> Dict[str, str]:
+    """
+    Collect SoQL clauses to push down to the server, leaving out unset ones.
+
+    Returns:
+        Keyword arguments for iter_pages() / ``client.get``
+    """
+    clauses = {"select": select, "where": where, "order": order}
+    return {name: value for name, value in clauses.items() if value}
+
+
+def stable_order(order: Optional[str]) -> str:
+    """Make a SoQL ``$order`` total by appending ``:id`` when it is missing."""
+    if not order:
+        return ":id"
+    if ":id" in [term.split()[0] for term in order.split(",") if term.strip()]:
+        return order
+    return f"{order}, :id"
+
+
+def iter_pages(
+    client: Socrata,
+    dataset_id: str,
+    limit: Optional[int] = None,
+    page_size: int = PAGE_SIZE,
+    workers: int = 1,
+    **query,
+) -> Iterator[List[Dict]]:
+    """
+    Yield a dataset's records one page at a time.
+
+    Pages are requested with ``$limit``/``$offset`` in ``:id`` order, so
+    they neither overlap nor skip rows while paging. A caller's ``order``
+    is kept, with ``:id`` appended as a tie-breaker.
+
+    Args:
+        client: Socrata client for the dataset's domain
+        dataset_id: Socrata dataset identifier
+        limit: Maximum number of records in total; None for all of them
+        page_size: Records per request
+        workers: Pages to request at the same time; pages are still
+            yielded in order
+        **query: Other SoQL parameters passed to ``client.get``, e.g.
+            ``select``, ``where`` and ``order`` (None values are dropped)
+
+    Yields:
+        Lists of record dicts, at most ``page_size`` long
+    """
+    query["order"] = stable_order(query.get("order"))
+
+    def fetch(offset: int) -> Tuple[List[Dict], int]:
+        size = page_size if limit is None else min(page_size, limit - offset)
+        return client.get(dataset_id, limit=size, offset=offset, **query), size
+
+    if workers <= 1:
+        for offset in count(0, page_size):
+            if limit is not None and offset >= limit:
+                return
+            page, size = fetch(offset)
+            if page:
+                yield page
+            if len(page) < size:
+                return
+        return
+
+    # The total is unknown, so pages past the end may be requested; they
+    # come back empty and are dropped
+    offsets = iter(range(0, limit, page_size)) if limit else count(0, page_size)
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+
+            def submit_next() -> None:
+                offset = next(offsets, None)
+                if offset is not None:
+                    pending.append(pool.submit(fetch, offset))
+
+            for _ in range(workers):
+                submit_next()
+
+            while pending:
+                page, size = pending.popleft().result()
+                if page:
+                    yield page
+                if len(page) < size:
+                    return
+                submit_next()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def dataset_schema(client: Socrata, dataset_id: str) -> Optional[Dict[str, str]]:
+    """
+    Return a dataset's columns and their Socrata types from its metadata.
+
+    Maps each column's field name to its ``dataTypeName`` ("number", "text",
+    "calendar_date", "point", ...), in the dataset's column order. System
+    fields (``:id``, ``:updated_at``, ...) are left out. Returns None when
+    the metadata cannot be loaded.
+    """
+    try:
+        metadata = client.get_metadata(dataset_id)
+    except Exception:
+        return None
+    schema = {
+        column["fieldName"]: column.get("dataTypeName", "text")
+        for column in metadata.get("columns", [])
+        if not column.get("fieldName", ":").startswith(":")
+    }
+    return schema or None
+
+
+def dataset_columns(client: Socrata, dataset_id: str) -> Optional[List[str]]:
+    """
+    Return a dataset's column field names from its metadata.
+
+    System fields are left out. Returns None when the metadata cannot be
+    loaded.
+    """
+    schema = dataset_schema(client, dataset_id)
+    return list(schema) if schema else None
+
+
+class CSVPageWriter:
+    """
+    Append pages of records to a CSV file as they arrive.
+
+    Socrata leaves null fields out of JSON records, so a column can first
+    appear on a later page. New columns are added to the header: when the
+    header has already been written, the file is rewritten once on close,
+    row by row. The file is written under a temporary name and moved into
+    place on close, so a failed download never leaves a partial file, and
+    one that returned no rows leaves no file at all.
+    """
+
+    def __init__(self, path: Path, columns: Optional[Sequence[str]] = None):
+        self.path = Path(path)
+        self.columns: List[str] = list(columns or [])
+        self.rows = 0
+        self._header: Optional[List[str]] = None
+        self._tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._tmp_path, "w", newline="", encoding="utf-8")
+        self._writer = csv.writer(self._file)
+
+    def __enter__(self) -> "CSVPageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, records: List[Dict]) -> None:
+        """Append one page of records."""
+        known = set(self.columns)
+        for record in records:
+            for column in record:
+                if column not in known:
+                    known.add(column)
+                    self.columns.append(column)
+
+        if self._header is None:
+            self._header = list(self.columns)
+            self._writer.writerow(self._header)
+
+        # Rows written before a column appeared are padded on close
+        self._writer.writerows(
+            [record.get(column) for column in self.columns] for record in records
+        )
+        self.rows += len(records)
+
+    def close(self) -> Optional[Path]:
+        """
+        Finish the file and move it into place.
+
+        Returns:
+            The file, or None if no rows were written (the target is left
+            as it was)
+        """
+        self._file.close()
+        if not self.rows:
+            self._tmp_path.unlink(missing_ok=True)
+            return None
+        if self._header is not None and self._header != self.columns:
+            self._widen_header()
+        os.replace(self._tmp_path, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        """Discard the partial file."""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _widen_header(self) -> None:
+        """Rewrite the file with the full header, padding short rows."""
+        widened = self._tmp_path.with_name(f"{self._tmp_path.name}.wide")
+        with (
+            open(self._tmp_path, newline="", encoding="utf-8") as src,
+            open(widened, "w", newline="", encoding="utf-8") as dst,
+        ):
+            reader = csv.reader(src)
+            writer = csv.writer(dst)
+            next(reader)
+            writer.writerow(self.columns)
+            width = len(self.columns)
+            for row in reader:
+                writer.writerow(row + [""] * (width - len(row)))
+        os.replace(widened, self._tmp_path)
+
+
+def write_pages(
+    pages: Iterable[List[Dict]],
+    path: Path,
+    columns: Optional[Sequence[str]] = None,
+    on_page: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Write pages of records to one CSV file, holding one page at a time.
+
+    Args:
+        pages: Iterable of record lists, e.g. from iter_pages()
+        path: Output CSV path
+        columns: Optional column order (e.g. from dataset_columns())
+        on_page: Optional callback ``on_page(page_number, rows_so_far)``
+
+    Returns:
+        Number of records written
+    """
+    with CSVPageWriter(path, columns) as writer:
+        for number, page in enumerate(pages, start=1):
+            writer.write(page)
+            if on_page is not None:
+                on_page(number, writer.rows)
+    return writer.rows
@@ -0,0 +1,720 @@
+"""
+Socrata (data.gov) ingestion engine shared by every Socrata fetch script.
+
+fetch_data_gov.py, fetch_data_gov_v2.py and fetch_federal_data.py are thin
+command-line front-ends over SocrataEngine, so each ingestion improvement
+lands here once and applies to all data.gov pulls:
+
+- paging through the JSON API, optionally several pages at once, with
+  SoQL select/where/order pushed down (socrata_client.py)
+- bulk CSV export for whole datasets, decoded a chunk at a time
+  (socrata_export.py)
+- typed decoding from the dataset's column metadata (socrata_types.py)
+- incremental sync of a local copy that only fetches changed rows
+  (socrata_sync.py)
+- CSV (with a schema sidecar) or columnar Parquet output, streamed to disk
+  either way
+- conditional export requests: the ETag / Last-Modified of each download
+  are kept in the output directory (http_validators.py), and when the
+  dataset has not changed since, the server's ``304 Not Modified`` is a
+  cache hit that reuses the previous file instead of downloading it again
+
+One engine holds one pooled client for its domain and can be shared by
+threads fetching different datasets from that domain. The command-line
+helpers at the end of this module (fetch_dataset, download_dataset,
+save_data) are what the front-ends' main() functions call.
+
+Usage:
+    from scripts.socrata_engine import SocrataEngine
+
+    with SocrataEngine("data.seattle.gov") as engine:
+        df = engine.fetch("kzjm-xkqj", limit=1000)
+        summary = engine.download("kzjm-xkqj", "data/raw/police.parquet")
+"""
+
+import hashlib
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.data_lake import LAKE_DIR, OVERWRITE, LakeTable
+from scripts.http_validators import ValidatorStore
+from scripts.socrata_client import (
+    PAGE_SIZE,
+    dataset_schema,
+    iter_pages,
+    make_socrata_client,
+    socrata_app_token,
+    write_pages,
+)
+from scripts.socrata_export import export_frame, export_frames, write_frames
+from scripts.socrata_sync import SyncState, sync_dataset
+from scripts.socrata_types import (
+    BOOLEAN_TYPES,
+    DATETIME_TYPES,
+    NUMBER_TYPES,
+    UTC_DATETIME_TYPES,
+    decode_frame,
+    decode_records,
+    read_typed_csv,
+    write_schema,
+)
+
+# Domain used when a front-end is not given one (tested and reliable)
+DEFAULT_DOMAIN = "data.seattle.gov"
+
+# Output formats, by file suffix
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Save a fetched frame as a data lake table instead of a file (data_lake.py)
+LAKE_FORMAT = "lake"
+
+# Rows read back from an output file for a preview
+PREVIEW_ROWS = 1000
+
+# SoQL clauses that change which rows or columns a download holds
+FILTER_CLAUSES = ("select", "where")
+
+
+def output_path(name: str, output_dir="data/raw", fmt: str = "csv") -> Path:
+    """Return a timestamped output file, ``<output_dir>/<name>_<ts>.<fmt>``."""
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"unknown output format: {fmt}")
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return Path(output_dir) / f"{name}_{timestamp}.{fmt}"
+
+
+def lake_table(
+    dataset_id: str,
+    query: Optional[Dict[str, str]] = None,
+    label: Optional[str] = None,
+    root: Path = LAKE_DIR,
+) -> LakeTable:
+    """
+    Return the data lake table a Socrata download is committed to.
+
+    Tables are named by dataset id, whichever front-end fetched them. A
+    filtered pull (select/where) gets its own ``<id>_<label>`` table, e.g.
+    named after a catalog preset, or ``<id>_q<hash of the clauses>``, so it
+    never replaces the whole dataset's table.
+    """
+    filters = {
+        clause: query[clause] for clause in FILTER_CLAUSES if (query or {}).get(clause)
+    }
+    if not filters:
+        return LakeTable("socrata", dataset_id, root)
+    if not label:
+        digest = hashlib.sha1(json.dumps(filters, sort_keys=True).encode())
+        label = f"q{digest.hexdigest()[:8]}"
+    return LakeTable("socrata", f"{dataset_id}_{label}", root)
+
+
+def export_resource(domain: str, dataset_id: str, limit: Optional[int], path) -> str:
+    """Return the validator store key of an export download."""
+    return (
+        f"{domain}/{dataset_id}/rows.csv?limit={limit or 'all'}&as={Path(path).suffix}"
+    )
+
+
+def arrow_schema(frame: pd.DataFrame) -> pa.Schema:
+    """
+    Return the Parquet schema for decoded frames shaped like ``frame``.
+
+    Types come from the Socrata schema (``frame.attrs``), not from the
+    frame's dtypes, so that every chunk of a download gets the same schema
+    (a number column without nulls in one chunk is still a double).
+    """
+    schema = frame.attrs.get("socrata_schema") or {}
+    fields = []
+    for name in frame.columns:
+        kind = schema.get(name)
+        if kind in NUMBER_TYPES:
+            kind = pa.float64()
+        elif kind in DATETIME_TYPES:
+            kind = pa.timestamp("us")
+        elif kind in UTC_DATETIME_TYPES:
+            kind = pa.timestamp("us", tz="UTC")
+        elif kind in BOOLEAN_TYPES:
+            kind = pa.bool_()
+        else:
+            kind = pa.string()
+        fields.append(pa.field(name, kind))
+    return pa.schema(fields)
+
+
+def write_parquet(
+    frames: Iterable[pd.DataFrame],
+    path,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Stream decoded frames into one Parquet file.
+
+    Like the CSV writers, the file is written to ``<path>.tmp`` and renamed
+    into place only once complete.
+
+    Returns:
+        Number of rows written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    writer = None
+    rows = 0
+    try:
+        for number, frame in enumerate(frames, start=1):
+            if writer is None:
+                schema = arrow_schema(frame)
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+            frame = frame.reindex(columns=schema.names)
+            for field in schema:
+                if pa.types.is_string(field.type):
+                    frame[field.name] = frame[field.name].astype("string")
+            writer.write_table(
+                pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+            )
+            rows += len(frame)
+            if on_chunk:
+                on_chunk(number, rows)
+        if writer is not None:
+            writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if not rows:
+        tmp_path.unlink(missing_ok=True)
+        return 0
+    tmp_path.replace(path)
+    return rows
+
+
+def read_dataset(path, nrows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Read a file written by the engine back with its column types.
+
+    Args:
+        path: CSV (with schema sidecar) or Parquet file, or the directory of
+            a data lake table
+        nrows: Read only the first rows (e.g. for a preview)
+    """
+    path = Path(path)
+    if path.is_dir():
+        df = LakeTable.at(path).read()
+        return df if nrows is None else df.head(nrows)
+    if path.suffix != ".parquet":
+        return read_typed_csv(path, nrows=nrows)
+    if nrows is None:
+        return pd.read_parquet(path)
+    batch = next(pq.ParquetFile(path).iter_batches(batch_size=nrows), None)
+    return batch.to_pandas() if batch is not None else pd.DataFrame()
+
+
+def save_frame(df: pd.DataFrame, path) -> Path:
+    """Save a decoded DataFrame as CSV (with schema sidecar) or Parquet."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == ".parquet":
+        write_parquet([df], path)
+    else:
+        df.to_csv(path, index=False)
+        write_schema(path, df.attrs.get("socrata_schema"))
+    return path
+
+
+def show_preview(df: pd.DataFrame) -> None:
+    """Show a preview of the data: first rows, column types, statistics."""
+    if df is None or df.empty:
+        return
+
+    print(f"\n{'='*60}")
+    print("Data Preview (first 5 rows):")
+    print(f"{'='*60}\n")
+    print(df.head().to_string())
+
+    print(f"\n{'='*60}")
+    print("Data Types:")
+    print(f"{'='*60}\n")
+    print(df.dtypes)
+
+    print(f"\n{'='*60}")
+    print("Basic Statistics:")
+    print(f"{'='*60}\n")
+    print(df.describe())
+
+
+class SocrataEngine:
+    """Fetches datasets from one Socrata domain over a pooled client."""
+
+    def __init__(
+        self,
+        domain: str = DEFAULT_DOMAIN,
+        app_token: Optional[str] = None,
+        workers: int = 1,
+        page_size: int = PAGE_SIZE,
+        pool_size: Optional[int] = None,
+        verbose: bool = True,
+    ):
+        """
+        Args:
+            domain: Socrata domain, e.g. "data.seattle.gov"
+            app_token: App token; defaults to DATA_GOV_APP_TOKEN
+            workers: JSON pages to request at the same time
+            page_size: Records per JSON page
+            pool_size: Keep-alive connections (default: ``workers``)
+            verbose: Print download progress
+        """
+        self.domain = domain
+        self.app_token = app_token or socrata_app_token()
+        self.workers = workers
+        self.page_size = page_size
+        self.verbose = verbose
+        self.client = make_socrata_client(
+            domain, self.app_token, pool_size=pool_size or workers
+        )
+
+    def __enter__(self) -> "SocrataEngine":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.client.close()
+
+    def _print(self, message: str) -> None:
+        if self.verbose:
+            print(message, flush=True)
+
+    def print_token_status(self) -> None:
+        """Say whether requests use an app token, and where to get one."""
+        if self.app_token:
+            print("✓ Using API token for higher rate limits")
+        else:
+            print("⚠ No API token - using public access (rate limited)")
+            print(f"  Get a free token at: https://{self.domain}/profile/app_tokens")
+            print("  and add DATA_GOV_APP_TOKEN to .env")
+
+    def _pages(
+        self, dataset_id: str, limit: Optional[int], query: Dict[str, str]
+    ) -> Iterator[List[Dict]]:
+        return iter_pages(
+            self.client, dataset_id, limit, self.page_size, self.workers, **query
+        )
+
+    def fetch(
+        self,
+        dataset_id: str,
+        limit: Optional[int] = None,
+        query: Optional[Dict[str, str]] = None,
+        export: bool = True,
+    ) -> pd.DataFrame:
+        """
+        Fetch a dataset into one typed DataFrame, held in memory.
+
+        Whole datasets are read from the bulk CSV export; queries (and
+        ``export=False``) page through the JSON API.
+
+        Args:
+            dataset_id: Socrata dataset identifier
+            limit: Maximum records (None or 0 for all)
+            query: SoQL clauses (select/where/order, see soql_query)
+            export: Read unfiltered datasets from the bulk CSV export
+
+        Returns:
+            Decoded DataFrame (empty if no rows)
+        """
+        limit = limit or None
+        query = query or {}
+        if export and not query:
+            df = export_frame(self.client, dataset_id, limit)
+            if df is not None:
+                return df
+
+        records = [
+            record for page in self._pages(dataset_id, limit, query) for record in page
+        ]
+        return decode_records(records, dataset_schema(self.client, dataset_id))
+
+    def download(
+        self,
+        dataset_id: str,
+        path,
+        limit: Optional[int] = None,
+        query: Optional[Dict[str, str]] = None,
+        export: bool = True,
+    ) -> Dict[str, object]:
+        """
+        Download a dataset straight to a CSV or Parquet file.
+
+        The output format follows the file suffix. Records are written as
+        they arrive, so memory holds at most one export chunk or
+        ``workers`` JSON pages.
+
+        Args:
+            dataset_id: Socrata dataset identifier
+            path: Output file (``.csv`` or ``.parquet``)
+            limit: Maximum records (None or 0 for all)
+            query: SoQL clauses (select/where/order, see soql_query)
+            export: Read unfiltered datasets from the bulk CSV export
+
+        Whole-dataset exports are requested conditionally when a previous
+        download of the same export is still in the output directory; if
+        the dataset has not changed, that file is returned instead.
+
+        Returns:
+            Summary with the ``rows`` saved, the output ``file``, its size in
+            ``bytes``, the ``transferred`` bytes (bulk export only, else
+            None), the ``source`` ("export", "json", or "cache" when the
+            previous file was reused), the export's ``validators`` and
+            ``seconds``
+        """
+        started = time.perf_counter()
+        path = Path(path)
+        limit = limit or None
+        query = query or {}
+        parquet = path.suffix == ".parquet"
+
+        def progress(unit):
+            return lambda number, total: self._print(
+                f"  {unit} {number}: {total:,} records"
+            )
+
+        stats = {}
+        frames = None
+        if export and not query:
+            store = ValidatorStore(path.parent)
+            resource = export_resource(self.domain, dataset_id, limit, path)
+            previous = store.get(resource)
+            frames = export_frames(
+                self.client,
+                dataset_id,
+                limit,
+                stats=stats,
+                validators=previous,
+            )
+            if stats.get("not_modified"):
+                self._print("✓ Not modified since the last download")
+                return {
+                    "rows": previous["rows"],
+                    "file": previous["file"],
+                    "bytes": previous["file"].stat().st_size,
+                    "transferred": 0,
+                    "source": "cache",
+                    "validators": None,
+                    "seconds": time.perf_counter() - started,
+                }
+
+        if frames is not None:
+            self._print("Downloading data (bulk CSV export)...")
+            source = "export"
+            if parquet:
+                rows = write_parquet(frames, path, progress("chunk"))
+            else:
+                rows = write_frames(frames, path, progress("chunk"))
+            if rows:
+                store.record(resource, path, stats["validators"], rows=rows)
+        else:
+            self._print(
+                f"Downloading data ({self.page_size:,} records per page, "
+                f"{self.workers} at a time)..."
+            )
+            source = "json"
+            schema = dataset_schema(self.client, dataset_id)
+            # With $select, the columns are whatever the query returns
+            columns = list(schema) if schema and "select" not in query else None
+            pages = self._pages(dataset_id, limit, query)
+            if parquet:
+                frames = (
+                    decode_frame(
+                        pd.DataFrame.from_records(page, columns=columns),
+                        schema,
+                        categories=False,
+                    )
+                    for page in pages
+                )
+                rows = write_parquet(frames, path, progress("page"))
+            else:
+                rows = write_pages(pages, path, columns, on_page=progress("page"))
+                if rows:
+                    write_schema(path, schema)
+
+        return {
+            "rows": rows,
+            "file": path if rows else None,
+            "bytes": path.stat().st_size if rows else 0,
+            "transferred": stats.get("bytes"),
+            "source": source,
+            "validators": stats.get("validators"),
+            "seconds": time.perf_counter() - started,
+        }
+
+    def download_to_lake(
+        self,
+        dataset_id: str,
+        limit: Optional[int] = None,
+        query: Optional[Dict[str, str]] = None,
+        export: bool = True,
+        label: Optional[str] = None,
+        root: Path = LAKE_DIR,
+    ) -> Dict[str, object]:
+        """
+        Download a dataset into a data lake table, replacing its contents.
+
+        The download is streamed to a Parquet file staged in the table's
+        directory, as download() does, then committed as the table's only
+        partition, so memory use stays flat. Whole-dataset exports are
+        requested conditionally against the last committed download; if
+        the dataset has not changed, the table is left as it is.
+
+        Args:
+            dataset_id: Socrata dataset identifier
+            limit: Maximum records (None or 0 for all)
+            query: SoQL clauses (select/where/order, see soql_query)
+            export: Read unfiltered datasets from the bulk CSV export
+            label: Name for a filtered pull's table (see lake_table)
+            root: Root directory of the data lake
+
+        Returns:
+            The download() summary, with the table directory as ``file``
+            (None if no rows) and the committed part's size in ``bytes``
+        """
+        table = lake_table(dataset_id, query, label, root)
+        staging = table.staging_file()
+        try:
+            summary = self.download(dataset_id, staging, limit, query, export)
+        finally:
+            staging.with_name(staging.name + ".tmp").unlink(missing_ok=True)
+
+        if summary["source"] == "cache":
+            return {**summary, "file": table.path}
+        if not summary["rows"]:
+            staging.unlink(missing_ok=True)
+            return summary
+
+        part = table.add_file(staging, mode=OVERWRITE)
+        if summary["validators"]:
+            # Point the next conditional request at the committed file
+            resource = export_resource(self.domain, dataset_id, limit or None, staging)
+            ValidatorStore(staging.parent).record(
+                resource, part, summary["validators"], rows=summary["rows"]
+            )
+        return {**summary, "file": table.path, "bytes": part.stat().st_size}
+
+    def sync(
+        self,
+        dataset_id: str,
+        full: bool = False,
+        state: Optional[SyncState] = None,
+    ) -> Dict[str, object]:
+        """
+        Bring the local copy of a dataset up to date (see socrata_sync.py).
+
+        Args:
+            dataset_id: Socrata dataset identifier
+            full: Download everything again instead of only changed rows
+            state: Sync state to update; by default the shared state file is
+                loaded and saved
+
+        Returns:
+            The sync summary (mode, fetched, rows, file, updated_at)
+        """
+        shared = state is None
+        state = SyncState.load() if shared else state
+        summary = sync_dataset(
+            self.client,
+            dataset_id,
+            self.domain,
+            state,
+            page_size=self.page_size,
+            workers=self.workers,
+            full=full,
+        )
+        if shared:
+            state.save()
+        return summary
+
+
+# Command-line helpers shared by fetch_data_gov.py and fetch_data_gov_v2.py
+
+
+def setup_directories():
+    """Ensure data directories exist."""
+    directories = ["data/raw", "data/staging", "data/processed", "data/external"]
+    for directory in directories:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+    print("✓ Data directories ready")
+
+
+def print_header(dataset_id, domain, limit, query):
+    """Print the banner describing a fetch."""
+    print(f"\n{'='*60}")
+    print(f"Fetching dataset: {dataset_id}")
+    print(f"Domain: {domain}")
+    print(f"Limit: {f'{limit:,} records' if limit else 'all records'}")
+    for clause, value in (query or {}).items():
+        print(f"{clause.title()}: {value}")
+    print(f"{'='*60}\n")
+
+
+def fetch_dataset(
+    dataset_id,
+    limit=10000,
+    domain=DEFAULT_DOMAIN,
+    query=None,
+    export=True,
+    app_token=None,
+):
+    """
+    Fetch a dataset from data.gov using Socrata API.
+
+    The whole result is held in memory; download_dataset() streams large
+    datasets to disk instead.
+
+    Args:
+        dataset_id: The Socrata dataset identifier
+        limit: Maximum number of records to fetch (0 or None for all)
+        domain: The Socrata domain (default: Seattle)
+        query: Optional SoQL clauses (select/where/order, see soql_query)
+        export: Read unfiltered datasets from the bulk CSV export
+        app_token: API token (default: DATA_GOV_APP_TOKEN from .env)
+
+    Returns:
+        pandas DataFrame with fetched data
+    """
+    print_header(dataset_id, domain, limit, query)
+
+    try:
+        with SocrataEngine(domain, app_token) as engine:
+            engine.print_token_status()
+            print("Downloading data...")
+            df = engine.fetch(dataset_id, limit, query, export)
+
+        if df.empty:
+            print("⚠ No data returned. Check dataset ID.")
+            return None
+
+        print(f"✓ Downloaded {len(df):,} records")
+        print(f"✓ Columns ({len(df.columns)}): {', '.join(df.columns.tolist()[:10])}")
+        if len(df.columns) > 10:
+            print(f"  ... and {len(df.columns) - 10} more columns")
+
+        return df
+
+    except Exception as e:
+        print(f"❌ Error fetching data: {str(e)}")
+        return None
+
+
+def download_dataset(
+    dataset_id,
+    limit=10000,
+    domain=DEFAULT_DOMAIN,
+    output_dir="data/raw",
+    page_size=PAGE_SIZE,
+    workers=1,
+    query=None,
+    export=True,
+    fmt="csv",
+    app_token=None,
+):
+    """
+    Download a dataset from data.gov straight to a file, as it arrives.
+
+    Args:
+        dataset_id: The Socrata dataset identifier
+        limit: Maximum number of records to fetch (0 or None for all)
+        domain: The Socrata domain (default: Seattle)
+        output_dir: Directory to save to
+        page_size: Records per JSON page
+        workers: JSON pages to request at the same time
+        query: Optional SoQL clauses (select/where/order, see soql_query)
+        export: Read unfiltered datasets from the bulk CSV export
+        fmt: "lake" to commit the dataset's table under
+            data/lake/source=socrata/ (output_dir is then unused), or "csv" /
+            "parquet" for a timestamped file in output_dir
+        app_token: API token (default: DATA_GOV_APP_TOKEN from .env)
+
+    Returns:
+        Path to the table directory or saved file, or None if nothing was
+        downloaded
+    """
+    print_header(dataset_id, domain, limit, query)
+
+    try:
+        with SocrataEngine(domain, app_token, workers, page_size) as engine:
+            engine.print_token_status()
+            if fmt == LAKE_FORMAT:
+                summary = engine.download_to_lake(dataset_id, limit, query, export)
+            else:
+                summary = engine.download(
+                    dataset_id,
+                    output_path(dataset_id, output_dir, fmt),
+                    limit,
+                    query,
+                    export,
+                )
+
+        if not summary["rows"]:
+            print("⚠ No data returned. Check dataset ID.")
+            return None
+
+        print(f"✓ Downloaded {summary['rows']:,} records")
+        if summary["transferred"] is not None:
+            print(f"✓ Transferred {summary['transferred'] / (1024 * 1024):.2f} MB")
+        print(f"✓ Saved to: {summary['file']}")
+        print(f"✓ Size: {summary['bytes'] / (1024 * 1024):.2f} MB")
+
+        return summary["file"]
+
+    except Exception as e:
+        print(f"❌ Error fetching data: {str(e)}")
+        return None
+
+
+def save_data(df, dataset_id, output_dir="data/raw", fmt=LAKE_FORMAT, query=None):
+    """
+    Save data to the data lake.
+
+    Args:
+        df: DataFrame to save
+        dataset_id: Identifier for naming the table or file
+        output_dir: Directory to save to, for the file formats
+        fmt: "lake" to commit a Parquet table under data/lake/source=socrata/
+            (replacing the previous copy), or "csv" / "parquet" for a file
+        query: SoQL clauses the data was fetched with; filtered data gets
+            its own table (see lake_table)
+
+    Returns:
+        Path to the saved table directory or file
+    """
+    if df is None or df.empty:
+        print("⚠ No data to save")
+        return None
+
+    print(f"\nSaving data...")
+    if fmt == LAKE_FORMAT:
+        # Like download_to_lake(), one partition: a Socrata "year" is just a field
+        table = lake_table(dataset_id, query)
+        table.write(df, mode=OVERWRITE, by_year=False)
+        output_file, size_bytes = table.path, table.size_bytes()
+    else:
+        output_file = save_frame(df, output_path(dataset_id, output_dir, fmt))
+        size_bytes = output_file.stat().st_size
+
+    file_size_kb = size_bytes / 1024
+    file_size_mb = file_size_kb / 1024
+
+    print(f"✓ Saved to: {output_file}")
+    print(f"✓ Records: {len(df):,}")
+    print(f"✓ Size: {file_size_mb:.2f} MB ({file_size_kb:.2f} KB)")
+
+    return output_file
@@ -0,0 +1,285 @@
+"""
+Bulk CSV export of whole Socrata datasets.
+
+For an unfiltered download, the dataset's ``rows.csv`` export is far
+cheaper than paging through the SODA JSON API: CSV is several times smaller
+than the equivalent JSON records, and it is parsed by pandas' C reader
+instead of json + DataFrame.from_records. The export is streamed and
+decoded a chunk at a time (see socrata_types.py), so memory stays bounded
+by ``chunk_rows`` however large the dataset is.
+
+An export can be opened conditionally, with the ETag / Last-Modified of a
+previous download (see http_validators.py). When the dataset has not
+changed, the server answers ``304 Not Modified`` and nothing is
+transferred; export_frames() then reports ``not_modified`` in its stats so
+the caller can reuse its local copy.
+
+The export only serves the whole dataset in its own column order. Queries
+with SoQL clauses (select/where/order) still go through the JSON API
+(socrata_client.iter_pages), and so does any dataset whose export cannot be
+opened.
+
+Usage:
+    from scripts.socrata_export import export_frame, export_frames, write_frames
+
+    frames = export_frames(client, "vbim-akqf")
+    if frames is not None:
+        rows = write_frames(frames, "data/raw/cdc_covid.csv")
+
+    df = export_frame(client, "vbim-akqf", limit=10000)  # in memory
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import pandas as pd
+import requests
+from sodapy import Socrata
+
+from scripts.http_validators import (
+    NOT_MODIFIED,
+    conditional_headers,
+    response_validators,
+)
+from scripts.socrata_types import categorize, decode_frame, write_schema
+
+# Rows decoded per chunk of the export
+CHUNK_ROWS = 50000
+
+# How rows.csv formats dates and timestamps
+EXPORT_DATE_FORMAT = "%m/%d/%Y %I:%M:%S %p"
+
+
+class ExportStream(io.RawIOBase):
+    """Readable body of an export response that counts the bytes read."""
+
+    def __init__(self, response: requests.Response):
+        self.response = response
+        self.response.raw.decode_content = True
+        self.bytes = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self.response.raw.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.bytes += size
+        return size
+
+    def close(self) -> None:
+        self.response.close()
+        super().close()
+
+
+def export_schema(
+    client: Socrata, dataset_id: str
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Return how to read a dataset's export, from its metadata.
+
+    Returns:
+        (export header name -> field name, field name -> Socrata type)
+    """
+    columns = [
+        column
+        for column in client.get_metadata(dataset_id).get("columns", [])
+        if not column.get("fieldName", ":").startswith(":")
+    ]
+    names = {
+        column.get("name", column["fieldName"]): column["fieldName"]
+        for column in columns
+    }
+    schema = {
+        column["fieldName"]: column.get("dataTypeName", "text") for column in columns
+    }
+    return names, schema
+
+
+def open_export(
+    client: Socrata, dataset_id: str, headers: Optional[Dict[str, str]] = None
+) -> ExportStream:
+    """
+    Start streaming a dataset's rows.csv export.
+
+    Args:
+        client: Socrata client for the dataset's domain
+        dataset_id: Socrata dataset identifier
+        headers: Extra request headers, e.g. conditional_headers()
+
+    Raises:
+        requests.RequestException: If the export cannot be opened
+    """
+    url = f"{client.uri_prefix}{client.domain}/api/views/{dataset_id}/rows.csv"
+    response = client.session.get(
+        url,
+        params={"accessType": "DOWNLOAD"},
+        headers=headers,
+        stream=True,
+        timeout=client.timeout,
+    )
+    response.raise_for_status()
+    return ExportStream(response)
+
+
+def read_export(
+    stream: ExportStream,
+    names: Dict[str, str],
+    schema: Dict[str, str],
+    limit: Optional[int] = None,
+    chunk_rows: int = CHUNK_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    Decode an export stream into typed DataFrames of up to ``chunk_rows``.
+
+    Text columns are not made categorical here, as categories would differ
+    from chunk to chunk; use socrata_types.categorize() on the whole.
+
+    Args:
+        stream: Export opened with open_export()
+        names: Export header name -> field name
+        schema: Field name -> Socrata type
+        limit: Stop after this many rows (None for all)
+        chunk_rows: Rows decoded at a time
+    """
+    remaining = limit
+    try:
+        reader = pd.read_csv(
+            io.BufferedReader(stream),
+            dtype=str,
+            chunksize=chunk_rows,
+            encoding="utf-8",
+        )
+        for chunk in reader:
+            if remaining is not None:
+                chunk = chunk.iloc[:remaining]
+                remaining -= len(chunk)
+            chunk = chunk.rename(columns=names)
+            yield decode_frame(
+                chunk, schema, date_format=EXPORT_DATE_FORMAT, categories=False
+            )
+            if remaining is not None and remaining <= 0:
+                break
+    finally:
+        stream.close()
+
+
+def export_frames(
+    client: Socrata,
+    dataset_id: str,
+    limit: Optional[int] = None,
+    chunk_rows: int = CHUNK_ROWS,
+    stats: Optional[Dict] = None,
+    validators: Optional[Dict[str, str]] = None,
+) -> Optional[Iterator[pd.DataFrame]]:
+    """
+    Open a dataset's export and return its typed chunks.
+
+    The export is opened before returning, so a caller can fall back to
+    the JSON API when it is not available.
+
+    Args:
+        client: Socrata client for the dataset's domain
+        dataset_id: Socrata dataset identifier
+        limit: Maximum rows (None for all)
+        chunk_rows: Rows decoded at a time
+        stats: Optional dict that gets the ``bytes`` read from the export,
+            its ``validators`` and, for a 304, ``not_modified``
+        validators: ETag / Last-Modified of a previous download; the export
+            is then only sent if it has changed
+
+    Returns:
+        Iterator of decoded DataFrames (none if not modified), or None if
+        the export is unavailable
+    """
+    stats = stats if stats is not None else {}
+    stream = None
+    try:
+        stream = open_export(client, dataset_id, conditional_headers(validators))
+        stats["validators"] = response_validators(stream.response)
+        if stream.response.status_code == NOT_MODIFIED:
+            stream.close()
+            stats["not_modified"] = True
+            return iter(())
+        names, schema = export_schema(client, dataset_id)
+    except (requests.RequestException, ValueError) as e:
+        if stream is not None:
+            stream.close()
+        print(f"⚠ Bulk export unavailable ({e}), using the JSON API")
+        return None
+
+    def frames() -> Iterator[pd.DataFrame]:
+        for frame in read_export(stream, names, schema, limit, chunk_rows):
+            stats["bytes"] = stream.bytes
+            yield frame
+
+    return frames()
+
+
+def export_frame(
+    client: Socrata, dataset_id: str, limit: Optional[int] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Read a dataset's export into one typed DataFrame.
+
+    Returns:
+        The decoded DataFrame, or None if the export is unavailable
+    """
+    frames = export_frames(client, dataset_id, limit)
+    if frames is None:
+        return None
+    frames = list(frames)
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    schema = df.attrs.get("socrata_schema")
+    df = categorize(df, schema)
+    df.attrs["socrata_schema"] = schema
+    return df
+
+
+def write_frames(
+    frames: Iterator[pd.DataFrame],
+    path,
+    on_chunk: Optional[Callable[[int, int], None]] = None,
+) -> int:
+    """
+    Append typed chunks to a CSV file, with their schema sidecar.
+
+    The file is written to ``<path>.tmp`` and renamed into place only once
+    complete; a failed download leaves nothing behind.
+
+    Args:
+        frames: DataFrames from export_frames()
+        path: Output CSV file
+        on_chunk: Optional callback(chunk_number, rows_so_far)
+
+    Returns:
+        Number of rows written
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    rows = 0
+    schema = None
+    try:
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            for number, frame in enumerate(frames, start=1):
+                frame.to_csv(f, index=False, header=number == 1)
+                schema = schema or frame.attrs.get("socrata_schema")
+                rows += len(frame)
+                if on_chunk:
+                    on_chunk(number, rows)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if not rows:
+        tmp_path.unlink(missing_ok=True)
+        return 0
+    os.replace(tmp_path, path)
+    write_schema(path, schema)
+    return rows
@@ -0,0 +1,270 @@
+"""
+Incremental sync of Socrata datasets into a local copy.
+
+The first sync downloads the whole dataset, with Socrata's system fields
+(``:id``, ``:created_at``, ``:updated_at``), to one stable file per dataset:
+
+    data/raw/socrata/<domain>/<dataset id>.csv
+
+and records the newest ``:updated_at`` seen as the dataset's high-water mark
+in data/raw/socrata/sync.json, with the ``:id``s of the rows stamped at the
+mark. Later syncs ask only for rows with ``:updated_at`` at or after the mark
+and upsert them by ``:id``: changed rows replace their old version in place,
+and new rows are appended. Including the mark itself catches rows updated in
+the same second as the mark but after the last sync ran; the rows already
+synced at the mark come back too, and are dropped by their ``:id``. When
+nothing changed, the local file is left alone. The local file is streamed
+through in batches, so memory holds only the changed rows, and a daily
+refresh moves just what changed upstream.
+
+Rows deleted upstream are not seen by an incremental sync; ``full=True``
+(``--full`` in the fetch scripts) downloads the dataset again.
+
+Usage:
+    from scripts.socrata_sync import SyncState, sync_dataset
+
+    state = SyncState.load()
+    summary = sync_dataset(client, "kzjm-xkqj", "data.seattle.gov", state)
+    state.save()
+"""
+
+import csv
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sodapy import Socrata
+
+from scripts.socrata_client import (
+    PAGE_SIZE,
+    CSVPageWriter,
+    dataset_schema,
+    iter_pages,
+    write_pages,
+)
+from scripts.socrata_types import SYSTEM_SCHEMA, write_schema
+from scripts.utils import DATA_DIR
+
+SYNC_DIR = DATA_DIR / "raw" / "socrata"
+STATE_PATH = SYNC_DIR / "sync.json"
+
+# Socrata system fields used as the row key and the change marker
+ID_FIELD = ":id"
+UPDATED_FIELD = ":updated_at"
+
+# Rows rewritten per batch while upserting into the local copy
+REWRITE_BATCH = 50000
+
+
+class SyncState:
+    """High-water marks and local files of synced datasets."""
+
+    def __init__(self, path: Path = STATE_PATH, entries: Optional[Dict] = None):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = entries or {}
+
+    @classmethod
+    def load(cls, path: Path = STATE_PATH) -> "SyncState":
+        """Load the sync state, or start an empty one if none exists yet."""
+        path = Path(path)
+        if not path.exists():
+            return cls(path)
+        return cls(path, json.loads(path.read_text(encoding="utf-8")))
+
+    def save(self) -> None:
+        """Write the sync state atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_name, self.path)
+
+    @staticmethod
+    def entry_key(domain: str, dataset_id: str) -> str:
+        return f"{domain}/{dataset_id}"
+
+    def stored_file(self, domain: str, dataset_id: str) -> Optional[Path]:
+        """Return the local copy of a dataset, if it still exists."""
+        entry = self.entries.get(self.entry_key(domain, dataset_id))
+        if not entry:
+            return None
+        path = self.path.parent / entry["file"]
+        return path if path.exists() else None
+
+    def watermark(self, domain: str, dataset_id: str) -> Optional[str]:
+        """Return the newest ``:updated_at`` synced, or None if never synced."""
+        if self.stored_file(domain, dataset_id) is None:
+            return None
+        return self.entries[self.entry_key(domain, dataset_id)]["updated_at"]
+
+    def ids_at_watermark(self, domain: str, dataset_id: str) -> List[str]:
+        """Return the ``:id``s of the synced rows stamped at the watermark."""
+        if self.stored_file(domain, dataset_id) is None:
+            return []
+        return self.entries[self.entry_key(domain, dataset_id)].get("ids_at_mark", [])
+
+    def stored_rows(self, domain: str, dataset_id: str) -> int:
+        """Return the number of rows in the local copy (0 if never synced)."""
+        if self.stored_file(domain, dataset_id) is None:
+            return 0
+        return self.entries[self.entry_key(domain, dataset_id)]["rows"]
+
+    def record(
+        self,
+        domain: str,
+        dataset_id: str,
+        path: Path,
+        updated_at: str,
+        rows: int,
+        ids_at_mark: Iterable[str] = (),
+    ) -> None:
+        """Record a completed sync."""
+        self.entries[self.entry_key(domain, dataset_id)] = {
+            "file": os.path.relpath(path, self.path.parent),
+            "updated_at": updated_at,
+            "ids_at_mark": sorted(ids_at_mark),
+            "rows": rows,
+            "synced_at": datetime.now().isoformat(timespec="seconds"),
+        }
+
+
+def track_watermark(
+    pages: Iterable[List[Dict]], mark: Dict[str, object]
+) -> Iterator[List[Dict]]:
+    """
+    Pass pages through, keeping the newest ``:updated_at`` in ``mark``.
+
+    ``mark["ids"]`` collects the ``:id``s of the rows stamped at the newest
+    ``:updated_at``.
+    """
+    ids = mark.setdefault("ids", set())
+    for page in pages:
+        for record in page:
+            updated = record.get(UPDATED_FIELD)
+            if not updated or updated < mark.get("updated_at", ""):
+                continue
+            if updated > mark.get("updated_at", ""):
+                mark["updated_at"] = updated
+                ids.clear()
+            if ID_FIELD in record:
+                ids.add(record[ID_FIELD])
+        yield page
+
+
+def upsert_rows(path: Path, changed: List[Dict]) -> int:
+    """
+    Merge changed rows into a local copy, keyed by ``:id``.
+
+    Each changed row replaces the stored row with the same ``:id``; rows
+    with a new ``:id`` are appended. The file is streamed through, not
+    loaded whole.
+
+    Returns:
+        Number of rows in the updated file
+    """
+    pending = {record[ID_FIELD]: record for record in changed}
+
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        writer = CSVPageWriter(path, reader.fieldnames)
+        try:
+            batch = []
+            for row in reader:
+                batch.append(pending.pop(row[ID_FIELD], row))
+                if len(batch) >= REWRITE_BATCH:
+                    writer.write(batch)
+                    batch = []
+            writer.write(batch + list(pending.values()))
+        except BaseException:
+            writer.abort()
+            raise
+
+    # Replace the local copy only once it is no longer being read
+    writer.close()
+    return writer.rows
+
+
+def sync_dataset(
+    client: Socrata,
+    dataset_id: str,
+    domain: str,
+    state: SyncState,
+    directory: Path = SYNC_DIR,
+    page_size: int = PAGE_SIZE,
+    workers: int = 1,
+    full: bool = False,
+) -> Dict[str, object]:
+    """
+    Bring the local copy of a dataset up to date.
+
+    Args:
+        client: Socrata client for ``domain``
+        dataset_id: Socrata dataset identifier
+        domain: Socrata domain (part of the local path and state key)
+        state: Sync state holding the dataset's high-water mark
+        directory: Root of the local copies
+        page_size, workers: Paging options passed to iter_pages()
+        full: Download everything again instead of only changed rows
+
+    Returns:
+        Summary with the sync ``mode`` ("full" or "incremental"), rows
+        ``fetched``, total ``rows`` stored, the ``file`` and the new
+        ``updated_at`` mark
+    """
+    path = state.stored_file(domain, dataset_id)
+    watermark = None if full else state.watermark(domain, dataset_id)
+    seen = set(state.ids_at_watermark(domain, dataset_id)) if watermark else set()
+    mark = {"updated_at": watermark or "", "ids": set(seen)}
+
+    if not watermark:
+        path = Path(directory) / domain / f"{dataset_id}.csv"
+        pages = iter_pages(
+            client,
+            dataset_id,
+            page_size=page_size,
+            workers=workers,
+            exclude_system_fields=False,
+        )
+        schema = dataset_schema(client, dataset_id)
+        if schema:
+            schema = {**SYSTEM_SCHEMA, **schema}
+        columns = list(schema) if schema else None
+        rows = write_pages(track_watermark(pages, mark), path, columns)
+        write_schema(path, schema)
+        fetched, mode = rows, "full"
+    else:
+        pages = iter_pages(
+            client,
+            dataset_id,
+            page_size=page_size,
+            workers=workers,
+            # >=: rows can share the mark's timestamp yet be new to us
+            where=f"{UPDATED_FIELD} >= '{watermark}'",
+            exclude_system_fields=False,
+        )
+        # Rows already synced at the mark come back unchanged
+        changed = [
+            record
+            for page in track_watermark(pages, mark)
+            for record in page
+            if not (
+                record.get(UPDATED_FIELD) == watermark and record.get(ID_FIELD) in seen
+            )
+        ]
+        if changed:
+            rows = upsert_rows(path, changed)
+        else:
+            rows = state.stored_rows(domain, dataset_id)
+        fetched, mode = len(changed), "incremental"
+
+    state.record(domain, dataset_id, path, mark["updated_at"], rows, mark["ids"])
+    return {
+        "mode": mode,
+        "fetched": fetched,
+        "rows": rows,
+        "file": path,
+        "updated_at": mark["updated_at"],
+    }
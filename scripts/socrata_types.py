@@ -0,0 +1,200 @@
+"""
+Typed decoding of Socrata records from the dataset's column metadata.
+
+SODA returns every value as a string, so a plain
+``pd.DataFrame.from_records`` gives object columns throughout and each
+consumer converts them again with ``pd.to_numeric``/``pd.to_datetime``.
+Here the dataset's schema (see socrata_client.dataset_schema) decides the
+dtype of each column once, at fetch time:
+
+    number, double, money, percent     -> float64 / int64
+    calendar_date, floating_timestamp  -> datetime64
+    fixed_timestamp                    -> datetime64 (UTC)
+    checkbox                           -> boolean
+    point                              -> <col>_longitude, <col>_latitude floats
+    text                               -> category when values repeat a lot
+
+Other types (url, location, polygons, ...) are left as they are.
+
+CSV has no types, so files written by the fetchers get a sidecar
+``<name>.schema.json`` holding the schema; read_typed_csv (and
+utils.load_csv) use it to decode the file back into the same dtypes.
+
+Usage:
+    from scripts.socrata_types import decode_records, read_typed_csv
+
+    df = decode_records(records, dataset_schema(client, "kzjm-xkqj"))
+    df = read_typed_csv("data/raw/kzjm-xkqj_20250101_120000.csv")
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+NUMBER_TYPES = {"number", "double", "money", "percent"}
+DATETIME_TYPES = {"calendar_date", "floating_timestamp", "date"}
+UTC_DATETIME_TYPES = {"fixed_timestamp"}
+BOOLEAN_TYPES = {"checkbox"}
+POINT_TYPES = {"point"}
+TEXT_TYPES = {"text"}
+
+# Socrata system fields, as returned with $$exclude_system_fields=false
+SYSTEM_SCHEMA = {
+    ":id": "text",
+    ":created_at": "fixed_timestamp",
+    ":updated_at": "fixed_timestamp",
+}
+
+# Text columns with at most this share of distinct values become categorical
+CATEGORY_SHARE = 0.5
+
+SCHEMA_SUFFIX = ".schema.json"
+
+# First two numbers of a point, as a GeoJSON dict/string or WKT "POINT (x y)"
+COORDINATE = re.compile(r"-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?")
+
+
+def point_coordinates(value) -> Tuple[Optional[float], Optional[float]]:
+    """Return (longitude, latitude) of a Socrata point, or (None, None)."""
+    if isinstance(value, Mapping):
+        value = value.get("coordinates")
+    if isinstance(value, (list, tuple)) and len(value) >= 2:
+        return float(value[0]), float(value[1])
+    if isinstance(value, str):
+        numbers = COORDINATE.findall(value)
+        if len(numbers) >= 2:
+            return float(numbers[0]), float(numbers[1])
+    return None, None
+
+
+def decode_boolean(column: pd.Series) -> pd.Series:
+    """Decode checkbox values (True/"true"/"True") into a nullable boolean."""
+    text = column.astype("string").str.lower()
+    return text.map({"true": True, "false": False}).astype("boolean")
+
+
+def categorize(df: pd.DataFrame, schema: Optional[Dict[str, str]]) -> pd.DataFrame:
+    """Make text columns whose values repeat a lot categorical, in place."""
+    for name, kind in (schema or {}).items():
+        if kind in TEXT_TYPES and name in df.columns and len(df):
+            if df[name].nunique() <= CATEGORY_SHARE * len(df):
+                df[name] = df[name].astype("category")
+    return df
+
+
+def decode_frame(
+    df: pd.DataFrame,
+    schema: Optional[Dict[str, str]],
+    date_format: str = "ISO8601",
+    categories: bool = True,
+) -> pd.DataFrame:
+    """
+    Convert the columns of ``df`` to the dtypes their Socrata types call for.
+
+    Columns missing from the schema (or a missing schema) are left as they
+    are. The schema of the decoded frame, with point columns split into
+    their longitude/latitude, is kept in ``df.attrs["socrata_schema"]`` so
+    that save functions can write it alongside the data.
+
+    Args:
+        df: Frame of raw values
+        schema: Socrata type of each column
+        date_format: Format of date and timestamp values
+        categories: Make repetitive text columns categorical. Frames decoded
+            chunk by chunk should leave this to categorize() on the whole.
+
+    Returns:
+        The decoded DataFrame
+    """
+    if not schema:
+        return df
+
+    decoded = {}
+    decoded_schema = {}
+    for name in df.columns:
+        column = df[name]
+        kind = schema.get(name)
+
+        if kind in NUMBER_TYPES:
+            column = pd.to_numeric(column, errors="coerce")
+        elif kind in DATETIME_TYPES:
+            column = pd.to_datetime(column, errors="coerce", format=date_format)
+        elif kind in UTC_DATETIME_TYPES:
+            column = pd.to_datetime(
+                column, errors="coerce", format=date_format, utc=True
+            )
+        elif kind in BOOLEAN_TYPES:
+            column = decode_boolean(column)
+        elif kind in POINT_TYPES:
+            coordinates = [point_coordinates(value) for value in column]
+            for axis, position in (("longitude", 0), ("latitude", 1)):
+                decoded[f"{name}_{axis}"] = pd.Series(
+                    [pair[position] for pair in coordinates],
+                    index=df.index,
+                    dtype="float64",
+                )
+                decoded_schema[f"{name}_{axis}"] = "number"
+            continue
+
+        decoded[name] = column
+        if kind:
+            decoded_schema[name] = kind
+
+    result = pd.DataFrame(decoded, index=df.index)
+    result.attrs["socrata_schema"] = decoded_schema
+    return categorize(result, decoded_schema) if categories else result
+
+
+def decode_records(
+    records: Iterable[Dict], schema: Optional[Dict[str, str]]
+) -> pd.DataFrame:
+    """Build a DataFrame from SODA records, decoded by the dataset schema."""
+    return decode_frame(pd.DataFrame.from_records(list(records)), schema)
+
+
+def schema_path(path) -> Path:
+    """Return the schema sidecar of a data file (``x.csv`` -> ``x.schema.json``)."""
+    path = Path(path)
+    return path.with_name(path.stem + SCHEMA_SUFFIX)
+
+
+def write_schema(path, schema: Optional[Dict[str, str]]) -> Optional[Path]:
+    """Write the schema sidecar of a data file, if there is a schema."""
+    if not schema:
+        return None
+    sidecar = schema_path(path)
+    sidecar.write_text(json.dumps(schema, indent=2), encoding="utf-8")
+    return sidecar
+
+
+def read_schema(path) -> Optional[Dict[str, str]]:
+    """Return the schema stored alongside a data file, or None."""
+    sidecar = schema_path(path)
+    if not sidecar.exists():
+        return None
+    return json.loads(sidecar.read_text(encoding="utf-8"))
+
+
+def read_typed_csv(
+    path, schema: Optional[Dict[str, str]] = None, **kwargs
+) -> pd.DataFrame:
+    """
+    Read a CSV written by the fetchers back with its Socrata dtypes.
+
+    Args:
+        path: CSV file
+        schema: Column types; defaults to the file's schema sidecar
+        **kwargs: Additional arguments to pass to pd.read_csv
+
+    Returns:
+        DataFrame decoded by the schema (plain read_csv without one)
+    """
+    schema = schema or read_schema(path)
+    if schema:
+        # Read typed columns as text so decoding sees the values as written
+        # (e.g. leading zeros of text codes survive)
+        kwargs.setdefault("dtype", {name: str for name in schema})
+    return decode_frame(pd.read_csv(path, **kwargs), schema)
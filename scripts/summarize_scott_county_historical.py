@@ -32,24 +32,30 @@ if 'education' in datasets:
 This script creates summary visualizations of all historical data.
 """
 
+import sys
 from pathlib import Path
 
 import matplotlib.pyplot as plt
 import pandas as pd
 
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+from scripts.data_lake import find_tables
+
 print("\n" + "=" * 80)
 print("SCOTT COUNTY, IOWA - HISTORICAL CENSUS DATA SUMMARY (2009-2021)")
 print("=" * 80)
 
-# Load all historical files
-files = sorted(Path("data/raw").glob("scott_county_iowa_*_historical_*.csv"))
+# Load all historical tables
+tables = find_tables("scott_county_iowa_*_historical_*.csv")
 
-print(f"\n✅ {len(files)} historical datasets loaded\n")
+print(f"\n✅ {len(tables)} historical datasets loaded\n")
 
 datasets = {}
-for f in files:
-    dataset_name = f.stem.split("_")[3]
-    df = pd.read_csv(f)
+for table in tables:
+    dataset_name = table.dataset.split("_")[3]
+    df = table.read()
     datasets[dataset_name] = df
     print(f"📊 {dataset_name.title()}: {len(df)} years of data")
 
@@ -5,6 +5,8 @@ from typing import Optional
 
 import pandas as pd
 
+from scripts.socrata_types import read_typed_csv
+
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 
@@ -32,6 +34,9 @@ def get_data_path(subfolder: str = "raw", filename: Optional[str] = None) -> Pat
 def load_csv(filename: str, subfolder: str = "raw", **kwargs) -> pd.DataFrame:
     """Load a CSV file from the data directory.
 
+    Files saved by the Socrata fetchers carry a ``.schema.json`` sidecar
+    and are read back with their column types (see socrata_types.py).
+
     Args:
         filename: Name of the CSV file
         subfolder: Data subfolder (raw, processed, staging, external)
@@ -44,7 +49,7 @@ def load_csv(filename: str, subfolder: str = "raw", **kwargs) -> pd.DataFrame:
         >>> df = load_csv("sample_sales_data.csv")
     """
     filepath = get_data_path(subfolder, filename)
-    return pd.read_csv(filepath, **kwargs)
+    return read_typed_csv(filepath, **kwargs)
 
 
 def save_csv(
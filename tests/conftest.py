@@ -0,0 +1,59 @@
+"""Fakes and fixtures shared by the test modules."""
+
+import pytest
+import requests
+
+from scripts.api_standin import StandinServer
+from scripts.census_client import CensusClient
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response."""
+
+    def __init__(self, payload=None, status_code=200, headers=None, text=None):
+        self._payload = payload
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = text if text is not None else str(payload)
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} error")
+
+
+class FakeCensusClient(CensusClient):
+    """
+    Census client stand-in that answers get() without the network.
+
+    Subclasses build each response in rows(); every call is recorded in
+    ``calls`` as ``(year, variables, for_geo, in_geo)``.
+    """
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self.metadata = None
+        self.calls = []
+
+    def get(self, year, variables, for_geo, in_geo=None, *args, **kwargs):
+        self.calls.append((year, variables, for_geo, in_geo))
+        return self.rows(year, variables, for_geo, in_geo)
+
+    def rows(self, year, variables, for_geo, in_geo):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def standin(request, monkeypatch):
+    """
+    Stand-in API server that Socrata clients are pointed at.
+
+    StandinServer options come from the module's or test's ``standin``
+    marker, e.g. ``pytestmark = pytest.mark.standin(socrata_rows=300)``.
+    """
+    marker = request.node.get_closest_marker("standin")
+    with StandinServer(**(marker.kwargs if marker else {})) as server:
+        monkeypatch.setenv("SOCRATA_BASE_URL", server.url)
+        yield server
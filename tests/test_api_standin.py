@@ -0,0 +1,93 @@
+"""Tests for the local Census/Socrata stand-in server."""
+
+import json
+
+import pytest
+import requests
+
+from scripts.api_standin import StandinServer, expand_geography, synthetic_census
+from scripts.census_client import CensusClient
+from scripts.socrata_client import make_socrata_client
+
+
+@pytest.fixture
+def server():
+    with StandinServer() as standin:
+        yield standin
+
+
+def make_client(server, **kwargs):
+    return CensusClient(
+        api_key="0" * 40, base_url=f"{server.url}/data", cache=None, **kwargs
+    )
+
+
+def test_expand_geography_counts_iowa_counties():
+    columns, rows = expand_geography("county:*", "state:19")
+    assert columns == ["state", "county"]
+    assert len(rows) == 99
+    assert rows[0] == ["19", "001"]
+
+
+def test_synthetic_census_is_deterministic():
+    params = {"get": "NAME,B01003_001E", "for": "county:163", "in": "state:19"}
+    first = synthetic_census("2021", params)
+    assert first == synthetic_census("2021", params)
+    assert first[0] == ["NAME", "B01003_001E", "state", "county"]
+    assert first[1][-2:] == ["19", "163"]
+
+
+def test_census_client_reads_counties_from_standin(server):
+    client = make_client(server)
+    df = client.get_merged(2021, ["B01003_001E"], "county:*", "state:19")
+
+    assert len(df) == 99
+    assert df["B01003_001E"].notna().all()
+    assert [status for _, status, _ in server.log] == [200] * len(server.log)
+
+
+def test_census_client_group_request(server):
+    client = make_client(server)
+    df = client.get_group(
+        2021, "B15003", "county:163", "state:19", columns=["B15003_022E"]
+    )
+    assert list(df["county"]) == ["163"]
+    assert "B15003_022E" in df.columns
+
+
+def test_socrata_client_pages_through_standin(server, monkeypatch):
+    monkeypatch.setenv("SOCRATA_BASE_URL", server.url)
+    client = make_socrata_client("data.example.gov")
+
+    page = client.get("test-0001", limit=50, offset=100, select="id,category")
+    client.close()
+
+    assert len(page) == 50
+    assert page[0] == {"id": "100", "category": "alpha"}
+
+
+def test_injected_errors_and_latency(server):
+    server.error_rate = 1.0
+    response = requests.get(f"{server.url}/data/2021/acs/acs5/variables.json")
+    assert response.status_code == 503
+    assert server.log[-1][:2] == ("census", 503)
+
+
+def test_fixture_replay_ignores_api_key(tmp_path):
+    with StandinServer(fixtures=tmp_path) as server:
+        params = {"get": "NAME", "for": "state:19"}
+        fixture = server.fixture_path("/data/2021/acs/acs5", params, "")
+        fixture.write_text(
+            json.dumps(
+                {
+                    "status": 200,
+                    "content_type": "application/json",
+                    "body": json.dumps([["NAME", "state"], ["Iowa", "19"]]),
+                }
+            )
+        )
+
+        response = requests.get(
+            f"{server.url}/data/2021/acs/acs5", params={**params, "key": "secret"}
+        )
+    assert response.json() == [["NAME", "state"], ["Iowa", "19"]]
@@ -0,0 +1,71 @@
+"""Tests for the national all-counties backfill."""
+
+import pandas as pd
+
+from scripts import backfill_counties as backfill
+
+
+def fake_fetch(dataset_names, year, for_geo, in_geo=None):
+    """Answer with two counties per state, or three nationally."""
+    rows = (
+        [("19", "163"), ("19", "013")]
+        if in_geo
+        else [("01", "001"), ("19", "013"), ("19", "163")]
+    )
+    return {
+        name: pd.DataFrame(
+            {
+                "NAME": [f"County {county}" for _, county in rows],
+                "state": [state for state, _ in rows],
+                "county": [county for _, county in rows],
+                "year": year,
+            }
+        )
+        for name in dataset_names
+    }
+
+
+def test_plan_skips_partitions_on_disk(tmp_path):
+    """Test that only requests with a missing partition are planned."""
+    backfill.partition_path(tmp_path, "income", 2020, "us").parent.mkdir(parents=True)
+    backfill.partition_path(tmp_path, "income", 2020, "us").write_text("x")
+
+    plan = backfill.plan_backfill(["income", "housing"], [2020, 2021], ["us"], tmp_path)
+
+    assert plan == {(2020, "us"): ["housing"], (2021, "us"): ["income", "housing"]}
+
+
+def test_run_backfill_writes_one_partition_per_response(tmp_path, monkeypatch):
+    """Test that each response lands in its dataset/year/part file."""
+    monkeypatch.setattr(backfill, "fetch_year_datasets", fake_fetch)
+    plan = backfill.plan_backfill(["housing"], [2020, 2021], ["19", "17"], tmp_path)
+
+    summary = backfill.run_backfill(plan, tmp_path, concurrency=2)
+
+    assert summary == {"requests": 4, "rows": 8, "failed": []}
+    part = pd.read_csv(
+        backfill.partition_path(tmp_path, "housing", 2021, "19"), dtype={"county": str}
+    )
+    assert list(part["county"]) == ["013", "163"]
+    assert (
+        backfill.plan_backfill(["housing"], [2020, 2021], ["19", "17"], tmp_path) == {}
+    )
+
+
+def test_failed_requests_are_reported_and_retried(tmp_path, monkeypatch):
+    """Test that a failed year is reported and left for the next run."""
+
+    def flaky_fetch(dataset_names, year, *geography):
+        return None if year == 2021 else fake_fetch(dataset_names, year, *geography)
+
+    monkeypatch.setattr(backfill, "fetch_year_datasets", flaky_fetch)
+    plan = backfill.plan_backfill(["income"], [2020, 2021], ["us"], tmp_path)
+
+    summary = backfill.run_backfill(plan, tmp_path)
+
+    assert summary["failed"] == [(2021, "us")]
+    assert list(backfill.plan_backfill(["income"], [2020, 2021], ["us"], tmp_path)) == [
+        (2021, "us")
+    ]
+    frames = list(backfill.iter_partitions("income", tmp_path))
+    assert len(frames) == 1 and len(frames[0]) == 3
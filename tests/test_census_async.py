@@ -0,0 +1,162 @@
+"""Tests for the asyncio Census fetch engine."""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+import requests
+
+from scripts import fetch_scott_county_historical as historical
+from scripts.census_async import run_concurrently
+
+
+def test_run_concurrently_returns_results_by_key():
+    """Test that every call's result comes back under its key."""
+    calls = {year: (lambda y=year: y * 2) for year in range(2009, 2022)}
+
+    results = run_concurrently(calls, concurrency=4, rate=1000)
+
+    assert results == {year: year * 2 for year in range(2009, 2022)}
+
+
+def test_run_concurrently_captures_exceptions():
+    """Test that one failing call does not sink the others."""
+
+    def fail():
+        raise ValueError("boom")
+
+    results = run_concurrently({"ok": lambda: 1, "bad": fail}, rate=1000)
+
+    assert results["ok"] == 1
+    assert isinstance(results["bad"], ValueError)
+
+
+def test_run_concurrently_respects_concurrency_cap():
+    """Test that no more than `concurrency` calls run at once."""
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def call():
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+
+    run_concurrently({i: call for i in range(12)}, concurrency=3, rate=1000)
+
+    assert 1 < active["peak"] <= 3
+
+
+def test_run_concurrently_applies_rate_limit():
+    """Test that request starts are spaced by the global rate limit."""
+    started = time.perf_counter()
+
+    run_concurrently({i: (lambda: None) for i in range(5)}, concurrency=5, rate=50)
+
+    # Five starts at 50/s need at least four 20ms gaps
+    assert time.perf_counter() - started >= 0.075
+
+
+def test_fetch_historical_datasets_matches_serial_shape(monkeypatch):
+    """Test that concurrent mode returns one combined frame per dataset."""
+
+    def fake_fetch(dataset_names, year, *geography):
+        if year == 2010:
+            return None
+        frames = {}
+        for name in dataset_names:
+            labels = historical.CENSUS_DATASETS[name]["variables"].values()
+            columns = {label: [100.0] for label in labels}
+            frames[name] = pd.DataFrame(
+                {"NAME": ["Scott County, Iowa"], "year": [year], **columns}
+            )
+        return frames
+
+    monkeypatch.setattr(historical, "fetch_year_datasets", fake_fetch)
+
+    results = historical.fetch_historical_datasets(
+        ["education", "income"], 2009, 2012, concurrency=4
+    )
+
+    assert set(results) == {"education", "income"}
+    assert list(results["education"]["year"]) == [2009, 2011, 2012]
+    assert "Bachelor's degree or higher (%)" in results["education"].columns
+
+
+def test_fetch_historical_datasets_passes_geography(monkeypatch):
+    """Test that all-counties mode asks for every county in one request."""
+    requested = []
+
+    def fake_fetch(dataset_names, year, *geography):
+        requested.append(geography)
+        return {
+            name: pd.DataFrame(
+                {
+                    "NAME": ["Scott County, Iowa", "Black Hawk County, Iowa"],
+                    "state": ["19", "19"],
+                    "county": ["163", "013"],
+                    "year": [year] * 2,
+                }
+            )
+            for name in dataset_names
+        }
+
+    monkeypatch.setattr(historical, "fetch_year_datasets", fake_fetch)
+
+    results = historical.fetch_historical_datasets(
+        ["housing"], 2020, 2021, geography=("county:*", "state:19")
+    )
+    table = historical.tidy_counties_table(results["housing"])
+
+    assert requested == [("county:*", "state:19")] * 2
+    assert list(table["county"]) == ["013", "013", "163", "163"]
+    assert list(table["year"]) == [2020, 2021, 2020, 2021]
+
+
+def test_run_concurrently_hands_results_to_callback():
+    """Test that on_result sees every success and the results are not kept."""
+    seen = {}
+
+    def fail():
+        raise ValueError("boom")
+
+    results = run_concurrently(
+        {"a": lambda: 1, "b": lambda: 2, "bad": fail},
+        on_result=seen.__setitem__,
+    )
+
+    assert seen == {"a": 1, "b": 2}
+    assert results["a"] is None and results["b"] is None
+    assert isinstance(results["bad"], ValueError)
+
+
+def test_fetch_year_datasets_only_swallows_request_errors(monkeypatch):
+    """Test that request errors fail the year and other errors propagate."""
+
+    class FakeClient:
+        def __init__(self, error):
+            self.error = error
+
+        def get_packed(self, *args, **kwargs):
+            raise self.error
+
+        def ensure_pool_size(self, size):
+            pass
+
+    monkeypatch.setattr(
+        historical,
+        "get_census_client",
+        lambda: FakeClient(requests.exceptions.HTTPError("503")),
+    )
+    assert historical.fetch_year_datasets(["income"], 2020) is None
+
+    monkeypatch.setattr(
+        historical, "get_census_client", lambda: FakeClient(KeyError("B19013"))
+    )
+    with pytest.raises(KeyError):
+        historical.fetch_year_datasets(["income"], 2020)
+    with pytest.raises(KeyError):
+        historical.fetch_historical_datasets(["income"], 2020, 2021, concurrency=2)
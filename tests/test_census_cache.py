@@ -0,0 +1,103 @@
+"""Tests for the on-disk Census response cache."""
+
+from datetime import date
+
+import pytest
+
+from scripts.census_cache import ResponseCache, is_published_vintage, make_key
+from scripts.census_client import CensusClient
+from tests.conftest import FakeResponse
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """ResponseCache rooted in a temporary directory."""
+    return ResponseCache(directory=tmp_path, ttl_hours=1)
+
+
+def test_is_published_vintage():
+    """Test that only vintages older than last year are final."""
+    today = date(2026, 10, 17)
+    assert is_published_vintage(2021, today)
+    assert is_published_vintage(2024, today)
+    assert not is_published_vintage(2025, today)
+    assert not is_published_vintage(2026, today)
+
+
+def test_key_is_content_addressed(cache):
+    """Test that identical requests share a file and different ones do not."""
+    key = make_key("https://x/2021/acs/acs5", 2021, ["NAME"], "state:19", None)
+    same = make_key("https://x/2021/acs/acs5", 2021, ["NAME"], "state:19", None)
+    other = make_key("https://x/2021/acs/acs5", 2021, ["NAME"], "state:17", None)
+
+    assert cache.path_for(key) == cache.path_for(same)
+    assert cache.path_for(key) != cache.path_for(other)
+
+
+def test_published_entries_never_expire(tmp_path):
+    """Test that a final vintage is served even with a zero TTL."""
+    cache = ResponseCache(directory=tmp_path, ttl_hours=0)
+    key = make_key("https://x/2015/acs/acs5", 2015, ["NAME"], "state:19", None)
+    cache.put(key, [["NAME"], ["Iowa"]])
+
+    assert cache.get(key) == [["NAME"], ["Iowa"]]
+
+
+def test_recent_entries_expire_after_ttl(tmp_path):
+    """Test that an unsettled vintage is refetched once the TTL passes."""
+    year = date.today().year
+    key = make_key(f"https://x/{year}/acs/acs5", year, ["NAME"], "state:19", None)
+
+    fresh = ResponseCache(directory=tmp_path, ttl_hours=1)
+    fresh.put(key, [["NAME"], ["Iowa"]])
+    assert fresh.get(key) is not None
+
+    expired = ResponseCache(directory=tmp_path, ttl_hours=0)
+    assert expired.get(key) is None
+
+
+def test_client_serves_repeat_requests_from_cache(cache, monkeypatch):
+    """Test that a second identical request makes no network call."""
+    client = CensusClient(api_key="k" * 40, cache=cache)
+    monkeypatch.setattr(
+        client.session,
+        "get",
+        lambda *args, **kwargs: FakeResponse([["NAME", "state"], ["Iowa", "19"]]),
+    )
+
+    first = client.get(2015, ["NAME"], "state:19")
+    second = client.get(2015, ["NAME"], "state:19")
+
+    assert first == second
+    assert (client.network_calls, client.cache_hits) == (1, 1)
+
+    client.refresh = True
+    client.get(2015, ["NAME"], "state:19")
+    assert client.network_calls == 2
+
+
+def test_stale_entry_is_revalidated_with_etag(tmp_path, monkeypatch):
+    """Test that a 304 for a stale entry is a cache hit that renews it."""
+    year = date.today().year
+    cache = ResponseCache(directory=tmp_path, ttl_hours=0)
+    client = CensusClient(api_key="k" * 40, cache=cache)
+    sent = []
+
+    def fake_get(url, params=None, timeout=None, headers=None):
+        sent.append(headers or {})
+        response = FakeResponse([["NAME", "state"], ["Iowa", "19"]])
+        response.headers = {"ETag": '"v1"'}
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            response.status_code = 304
+            response.text = ""
+        return response
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+
+    first = client.get(year, ["NAME"], "state:19")
+    second = client.get(year, ["NAME"], "state:19")
+
+    assert first == second
+    assert sent == [{}, {"If-None-Match": '"v1"'}]
+    assert (client.network_calls, client.cache_hits, client.not_modified) == (2, 1, 1)
+    assert "revalidated" in client.describe_usage()
@@ -0,0 +1,161 @@
+"""Tests for the shared Census API client."""
+
+import pytest
+import requests
+
+from scripts.census_client import (
+    MAX_VARIABLES,
+    CensusAPIError,
+    CensusClient,
+    pack_variables,
+)
+from tests.conftest import FakeResponse
+
+
+@pytest.fixture
+def client():
+    """CensusClient with a fixed key and no network access."""
+    with CensusClient(api_key="k" * 40) as census:
+        yield census
+
+
+def test_get_builds_census_query(client, monkeypatch):
+    """Test that get() sends the get/for/in/key parameters."""
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append((url, params, timeout))
+        return FakeResponse([["NAME", "B01003_001E"], ["Scott County", "174669"]])
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+    rows = client.get(2021, ["NAME", "B01003_001E"], "county:163", "state:19")
+
+    assert rows[1] == ["Scott County", "174669"]
+    url, params, _ = calls[0]
+    assert url == "https://api.census.gov/data/2021/acs/acs5"
+    assert params == {
+        "get": "NAME,B01003_001E",
+        "for": "county:163",
+        "in": "state:19",
+        "key": "k" * 40,
+    }
+
+
+def test_get_reuses_one_session(client, monkeypatch):
+    """Test that repeated calls go through the same pooled session."""
+    sessions = set()
+
+    def fake_get(url, params=None, timeout=None):
+        sessions.add(id(client.session))
+        return FakeResponse([["NAME"], ["Iowa"]])
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+    for year in (2019, 2020, 2021):
+        client.get(year, ["NAME"], "state:19")
+
+    assert len(sessions) == 1
+
+
+def test_get_raises_on_html_response(client, monkeypatch):
+    """Test that an HTML error page surfaces as a RequestException."""
+    monkeypatch.setattr(
+        client.session,
+        "get",
+        lambda *args, **kwargs: FakeResponse(text="<html>Invalid Key</html>"),
+    )
+
+    with pytest.raises(CensusAPIError):
+        client.get(2021, ["NAME"], "state:19")
+
+    assert issubclass(CensusAPIError, requests.exceptions.RequestException)
+
+
+def test_get_dataframe_uses_header_row(client, monkeypatch):
+    """Test that get_dataframe turns the header row into columns."""
+    monkeypatch.setattr(
+        client.session,
+        "get",
+        lambda *args, **kwargs: FakeResponse([["NAME", "state"], ["Iowa", "19"]]),
+    )
+
+    df = client.get_dataframe(2021, ["NAME"], "state:19")
+
+    assert list(df.columns) == ["NAME", "state"]
+    assert df.iloc[0]["NAME"] == "Iowa"
+
+
+def test_short_api_key_is_ignored(monkeypatch, capsys):
+    """Test that a malformed key from the environment is not sent."""
+    monkeypatch.setenv("CENSUS_API_KEY", "short")
+
+    census = CensusClient()
+
+    assert census.api_key is None
+    assert "looks invalid" in capsys.readouterr().out
+
+
+def test_pack_variables_uses_fewest_requests():
+    """Test that codes are packed up to the limit and deduplicated."""
+    codes = [f"B01001_{i:03d}E" for i in range(1, 106)]
+
+    batches = pack_variables(codes + codes[:5], capacity=49)
+
+    assert [len(batch) for batch in batches] == [49, 49, 7]
+    assert [code for batch in batches for code in batch] == codes
+
+
+def test_get_packed_splits_groups_back_out(client, monkeypatch):
+    """Test that packed requests are merged and split per dataset group."""
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        variables = params["get"].split(",")
+        calls.append(variables)
+        header = [*variables, "state", "county"]
+        return FakeResponse(
+            [header, [f"v:{code}" for code in variables] + ["19", "163"]]
+        )
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+    groups = {
+        "income": [f"B19001_{i:03d}E" for i in range(1, 31)],
+        "housing": [f"B25024_{i:03d}E" for i in range(1, 31)],
+    }
+
+    frames = client.get_packed(2021, groups, "county:163", "state:19")
+
+    # 60 codes plus NAME in each request need two calls, not one per group
+    assert len(calls) == 2
+    assert all(len(variables) <= MAX_VARIABLES for variables in calls)
+    housing = frames["housing"]
+    assert list(housing.columns) == ["NAME", *groups["housing"], "state", "county"]
+    assert housing.iloc[0]["B25024_030E"] == "v:B25024_030E"
+
+
+def test_get_tables_fetches_one_group_per_table(client, monkeypatch):
+    """Test that codes are fetched by table and projected locally."""
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(params["get"])
+        table = params["get"][len("group(") : -1]
+        header = [f"{table}_001E", f"{table}_001M", f"{table}_002E", "GEO_ID"]
+        return FakeResponse(
+            [[*header, "NAME", "state"], ["5", "1", "7", "x", "Iowa", "19"]]
+        )
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+
+    df = client.get_tables(
+        2021, ["B15003_002E", "B01003_001E", "B15003_001E"], "state:19"
+    )
+
+    assert calls == ["group(B15003)", "group(B01003)"]
+    assert list(df.columns) == [
+        "NAME",
+        "B15003_002E",
+        "B01003_001E",
+        "B15003_001E",
+        "state",
+    ]
+    assert df.iloc[0]["B15003_002E"] == "7"
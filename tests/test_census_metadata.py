@@ -0,0 +1,144 @@
+"""Tests for the offline Census variable metadata index."""
+
+from datetime import date
+
+import pytest
+import requests
+
+from scripts.census_client import CensusClient
+from scripts.census_metadata import MetadataStore, VariableIndex, compact_variables
+from tests.conftest import FakeResponse
+
+VARIABLES_JSON = {
+    "variables": {
+        "NAME": {"label": "Geographic Area Name", "concept": ""},
+        "B15003_001E": {
+            "label": "Estimate!!Total:",
+            "concept": "EDUCATIONAL ATTAINMENT",
+            "predicateType": "int",
+        },
+        "B15003_022E": {
+            "label": "Estimate!!Total:!!Bachelor's degree",
+            "concept": "EDUCATIONAL ATTAINMENT",
+        },
+    }
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    """MetadataStore rooted in a temporary directory."""
+    return MetadataStore(directory=tmp_path)
+
+
+def test_compact_index_round_trips(store):
+    """Test that only label and concept are kept and survive a reload."""
+    variables = compact_variables(VARIABLES_JSON)
+    store.save("https://example/2021/acs/acs5", variables)
+
+    index = store.load("https://example/2021/acs/acs5")
+
+    assert index.variables["B15003_001E"] == [
+        "Estimate!!Total:",
+        "EDUCATIONAL ATTAINMENT",
+    ]
+    assert store.path_for("https://example/2021/acs/acs5").suffix == ".gz"
+
+
+def test_index_splits_and_searches():
+    """Test code membership and case-insensitive label search."""
+    index = VariableIndex("x", compact_variables(VARIABLES_JSON))
+
+    known, missing = index.split(["B15003_022E", "B99999_001E", "group(B15003)"])
+
+    assert known == ["B15003_022E", "group(B15003)"]
+    assert missing == ["B99999_001E"]
+    assert [code for code, _, _ in index.search("bachelor")] == ["B15003_022E"]
+
+
+def test_get_merged_drops_codes_missing_from_vintage(store, monkeypatch):
+    """Test that unknown codes are not sent and come back as empty columns."""
+    calls = []
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(url)
+        if url.endswith("variables.json"):
+            return FakeResponse(VARIABLES_JSON)
+        variables = params["get"].split(",")
+        return FakeResponse([[*variables, "state"], ["1"] * len(variables) + ["19"]])
+
+    with CensusClient(api_key="k" * 40, metadata=store) as client:
+        monkeypatch.setattr(client.session, "get", fake_get)
+        df = client.get_merged(2009, ["B15003_001E", "B15003_999E"], "state:19")
+        client.get_merged(2009, ["B15003_022E"], "state:19")
+
+    assert list(df.columns) == ["NAME", "B15003_001E", "B15003_999E", "state"]
+    assert df.iloc[0]["B15003_001E"] == "1"
+    assert df.iloc[0]["B15003_999E"] is None
+    # Metadata is downloaded once per vintage, then reused
+    assert sum(url.endswith("variables.json") for url in calls) == 1
+    assert store.load("https://api.census.gov/data/2009/acs/acs5") is not None
+
+
+def test_get_packed_leaves_out_groups_the_vintage_lacks(store, monkeypatch):
+    """Test that a group with no served code is missing, not all nulls."""
+    requested = []
+
+    def fake_get(url, params=None, timeout=None):
+        if url.endswith("variables.json"):
+            return FakeResponse(VARIABLES_JSON)
+        variables = params["get"].split(",")
+        requested.extend(variables)
+        return FakeResponse([[*variables, "state"], ["1"] * len(variables) + ["19"]])
+
+    groups = {
+        "education": ["B15003_001E", "B15003_999E"],
+        "income": ["B19013_001E", "B19301_001E"],
+    }
+    with CensusClient(api_key="k" * 40, metadata=store) as client:
+        monkeypatch.setattr(client.session, "get", fake_get)
+        frames = client.get_packed(2009, groups, "state:19")
+        assert client.get_packed(2009, {"income": groups["income"]}, "state:19") == {}
+
+    assert list(frames) == ["education"]
+    assert frames["education"].iloc[0]["B15003_999E"] is None
+    assert requested == ["NAME", "B15003_001E"]
+
+
+def test_unavailable_metadata_sends_codes_unchecked(store, monkeypatch):
+    """Test that a metadata failure does not block the data request."""
+
+    def fake_get(url, params=None, timeout=None):
+        if url.endswith("variables.json"):
+            raise requests.exceptions.ConnectionError("offline")
+        return FakeResponse([["NAME", "B15003_999E", "state"], ["Iowa", "5", "19"]])
+
+    with CensusClient(api_key="k" * 40, metadata=store, max_retries=0) as client:
+        monkeypatch.setattr(client.session, "get", fake_get)
+        df = client.get_merged(2009, ["B15003_999E"], "state:19")
+
+    assert df.iloc[0]["B15003_999E"] == "5"
+
+
+def test_stale_index_of_recent_vintage_is_revalidated(tmp_path, monkeypatch):
+    """Test that a 304 keeps the stored index of a vintage still in flux."""
+    year = date.today().year
+    store = MetadataStore(directory=tmp_path, ttl_hours=0)
+    sent = []
+
+    def fake_get(url, params=None, timeout=None, headers=None):
+        sent.append(headers or {})
+        response = FakeResponse(VARIABLES_JSON)
+        response.headers = {"Last-Modified": "Tue, 01 Sep 2026 00:00:00 GMT"}
+        if headers:
+            response.status_code = 304
+        return response
+
+    for _ in range(2):
+        with CensusClient(api_key="k" * 40, metadata=store) as client:
+            monkeypatch.setattr(client.session, "get", fake_get)
+            index = client.variable_index(year)
+
+    assert "B15003_022E" in index
+    assert sent[1] == {"If-Modified-Since": "Tue, 01 Sep 2026 00:00:00 GMT"}
+    assert client.not_modified == 1
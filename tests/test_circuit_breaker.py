@@ -0,0 +1,136 @@
+"""Tests for the per-host circuit breaker and run deadline."""
+
+import pytest
+import requests
+
+from scripts import census_client
+from scripts.census_client import CensusClient
+from scripts.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+)
+from scripts.rate_limiter import TokenBucket
+from tests.conftest import FakeResponse
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Client with a fast limiter and no backoff sleeps."""
+    monkeypatch.setattr(census_client, "backoff_delay", lambda *args: 0)
+    census = CensusClient(
+        api_key="k" * 40,
+        limiter=TokenBucket(1000, 1000),
+        breaker=CircuitBreaker(threshold=3, cooldown=60),
+    )
+    yield census
+    census.close()
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_failure("a")
+    breaker.before_call("a")
+
+    breaker.record_failure("a")
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("a")
+
+    # Other hosts are unaffected
+    breaker.before_call("b")
+    assert breaker.open_hosts() == ["a"]
+
+
+def test_breaker_success_resets_count():
+    breaker = CircuitBreaker(threshold=2)
+    breaker.record_failure("a")
+    breaker.record_success("a")
+    breaker.record_failure("a")
+    assert not breaker.is_open("a")
+
+
+def test_breaker_lets_one_probe_through_after_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=0)
+    breaker.record_failure("a")
+
+    breaker.before_call("a")  # the probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call("a")  # no second probe while one is in flight
+
+    breaker.record_success("a")
+    assert not breaker.is_open("a")
+
+
+def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker(threshold=3, cooldown=0)
+    for _ in range(3):
+        breaker.record_failure("a")
+    breaker.before_call("a")
+    breaker.record_failure("a")
+
+    assert breaker.is_open("a")
+
+
+def test_deadline_caps_timeout():
+    deadline = Deadline(5)
+    assert deadline.timeout(30) <= 5
+    assert deadline.timeout(1) == 1
+
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0).timeout(30)
+
+
+def test_client_fails_fast_once_circuit_opens(client, monkeypatch):
+    """After the threshold, later calls fail without touching the network."""
+    calls = []
+
+    def down(url, params=None, timeout=None):
+        calls.append(url)
+        raise requests.exceptions.ConnectTimeout("timed out")
+
+    monkeypatch.setattr(client.session, "get", down)
+
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        client.get(2021, ["NAME"], "state:19")
+    assert len(calls) == 3  # stopped retrying when the circuit opened
+
+    for year in range(2009, 2021):
+        with pytest.raises(CircuitOpenError):
+            client.get(year, ["NAME"], "state:19")
+    assert len(calls) == 3
+    assert "circuit open" in client.describe_usage()
+
+
+def test_client_retry_statuses_count_as_failures(client, monkeypatch):
+    monkeypatch.setattr(
+        client.session, "get", lambda *a, **k: FakeResponse(status_code=503)
+    )
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get(2021, ["NAME"], "state:19")
+    assert client.breaker.is_open("api.census.gov")
+
+
+def test_client_passes_remaining_time_as_timeout(client, monkeypatch):
+    timeouts = []
+
+    def fake_get(url, params=None, timeout=None):
+        timeouts.append(timeout)
+        return FakeResponse([["NAME"], ["Iowa"]])
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+    client.deadline = Deadline(2)
+    client.get(2021, ["NAME"], "state:19", timeout=15)
+
+    assert 0 < timeouts[0] <= 2
+
+
+def test_client_stops_after_deadline(client, monkeypatch):
+    monkeypatch.setattr(
+        client.session, "get", lambda *a, **k: pytest.fail("request was sent")
+    )
+    client.deadline = Deadline(0)
+
+    with pytest.raises(DeadlineExceeded):
+        client.get(2021, ["NAME"], "state:19")
+    assert client.network_calls == 0
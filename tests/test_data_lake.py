@@ -0,0 +1,194 @@
+"""Tests for the partitioned Parquet data lake."""
+
+import pandas as pd
+import pytest
+
+from scripts.data_lake import (
+    OVERWRITE,
+    LakeTable,
+    find_tables,
+    load_latest,
+    read_table,
+    write_table,
+)
+from scripts.fetch_manifest import FetchManifest
+
+
+def counties(years, value=1.0):
+    """Build a small county x year table with zero-padded FIPS."""
+    return pd.DataFrame(
+        {
+            "state": "19",
+            "county": ["001", "163"] * len(years),
+            "year": [year for year in years for _ in range(2)],
+            "value": value,
+        }
+    )
+
+
+def test_round_trip_keeps_types_and_partitions_by_year(tmp_path):
+    """Test that tables read back typed, one partition per year."""
+    table = write_table(counties([2020, 2021]), "census", "income", root=tmp_path)
+
+    df = table.read()
+    assert list(df["county"]) == ["001", "163", "001", "163"]
+    assert df["year"].dtype == "int64"
+    assert df["value"].dtype == "float64"
+    assert table.years() == [2020, 2021]
+    assert table.rows() == 4
+    assert [path.parent.name for path in table.files()] == ["year=2020", "year=2021"]
+    assert all(path.suffix == ".parquet" for path in table.files())
+
+
+def test_write_replaces_only_years_written(tmp_path):
+    """Test that a new year is added without rewriting the others."""
+    table = write_table(counties([2020, 2021]), "census", "income", root=tmp_path)
+    kept = table.files()[0]
+
+    table.write(counties([2021, 2022], value=2.0))
+
+    assert table.years() == [2020, 2021, 2022]
+    assert table.files()[0] == kept
+    df = table.read(years=[2021])
+    assert list(df["value"]) == [2.0, 2.0]
+    # Superseded files are gone and nothing is left half-written
+    parts = list(table.path.rglob("*.parquet"))
+    assert sorted(parts) == table.files()
+    assert not list(table.path.rglob("*.tmp"))
+
+
+def test_overwrite_and_rows_without_year(tmp_path):
+    """Test that overwriting replaces every partition, year or not."""
+    write_table(counties([2020]), "socrata", "abcd-1234", root=tmp_path)
+
+    table = write_table(
+        pd.DataFrame({"id": [1, 2], "mixed": [1, "x"]}),
+        "socrata",
+        "abcd-1234",
+        mode=OVERWRITE,
+        root=tmp_path,
+    )
+
+    assert table.years() == []
+    assert table.files()[0].parent.name == "year=__HIVE_DEFAULT_PARTITION__"
+    df = read_table("socrata", "abcd-1234", root=tmp_path)
+    assert list(df["mixed"]) == ["1", "x"]
+
+
+def test_read_unions_changing_columns(tmp_path):
+    """Test that years with different columns are read as one table."""
+    table = LakeTable("census", "income", tmp_path)
+    table.write(pd.DataFrame({"year": [2009], "a": [1.0]}))
+    table.write(pd.DataFrame({"year": [2010], "a": [2.0], "b": [3.0]}))
+
+    df = table.read()
+
+    assert list(df.columns) == ["year", "a", "b"]
+    assert pd.isna(df.loc[0, "b"])
+
+
+def test_read_widens_int_and_float_years(tmp_path):
+    """Test that an int year and a float year with NaN read back together."""
+    table = LakeTable("census", "income", tmp_path)
+    table.write(pd.DataFrame({"year": [2020], "v": [1]}))
+    table.write(pd.DataFrame({"year": [2021, 2021], "v": [2.5, None]}))
+
+    df = table.read()
+
+    assert df["v"].dtype == "float64"
+    assert df["v"].tolist()[:2] == [1.0, 2.5]
+    assert pd.isna(df["v"].iloc[2])
+
+
+def test_manifest_append_with_changed_dtype_reads_back(tmp_path):
+    """Test that an incremental run adding a year with NaNs can be read."""
+    manifest = FetchManifest(tmp_path / "manifest.json")
+    table = LakeTable("census", "income_historical", tmp_path / "lake")
+    manifest.append_to_table(
+        "state:19", "income", pd.DataFrame({"year": [2020], "v": [1]}), table
+    )
+    manifest.append_to_table(
+        "state:19", "income", pd.DataFrame({"year": [2021], "v": [None]}), table
+    )
+
+    df = table.read()
+
+    assert df["year"].tolist() == [2020, 2021]
+    assert df["v"].dtype == "float64"
+
+
+def test_year_that_is_not_a_whole_number_is_rejected_or_kept_as_field(tmp_path):
+    """Test that text or fractional years never pick a wrong partition."""
+    table = LakeTable("socrata", "abcd-1234", tmp_path)
+    for years in (["2019-2020", "2021"], [2019.5, 2020.0]):
+        with pytest.raises(ValueError):
+            table.write(pd.DataFrame({"year": years, "v": [1, 2]}))
+    assert not table.exists()
+
+    table.write(pd.DataFrame({"year": ["2019-2020", "2021"]}), by_year=False)
+
+    assert table.years() == []
+    assert table.read()["year"].tolist() == ["2019-2020", "2021"]
+
+
+def test_failed_write_leaves_table_unchanged(tmp_path, monkeypatch):
+    """Test that a write that fails part-way commits nothing."""
+    table = write_table(counties([2020]), "census", "income", root=tmp_path)
+    before = table.manifest()
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(table, "_commit", fail)
+    with pytest.raises(OSError):
+        table.write(counties([2020, 2021], value=9.0))
+
+    assert table.manifest() == before
+    assert list(table.read()["value"]) == [1.0, 1.0]
+    assert sorted(table.path.rglob("*.parquet")) == table.files()
+
+
+def test_load_latest_prefers_table_and_falls_back_to_csv(tmp_path):
+    """Test that loaders find tables by their old file pattern."""
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    pd.DataFrame({"year": [2019], "value": [0.5]}).to_csv(
+        raw / "iowa_state_income_historical_20240101_000000.csv", index=False
+    )
+    lake = tmp_path / "lake"
+
+    old = load_latest("iowa_state_income_historical_*.csv", raw, lake)
+    assert list(old["year"]) == [2019]
+
+    write_table(counties([2021]), "census", "iowa_state_income_historical", root=lake)
+    new = load_latest("iowa_state_income_historical_*.csv", raw, lake)
+    assert list(new["year"]) == [2021, 2021]
+
+    assert load_latest("iowa_state_housing_historical_*.csv", raw, lake) is None
+    assert [t.dataset for t in find_tables("iowa_state_*_historical_*.csv", lake)] == [
+        "iowa_state_income_historical"
+    ]
+
+
+def test_manifest_moves_legacy_csv_into_table(tmp_path):
+    """Test that appending to a dataset stored as CSV keeps its old years."""
+    (tmp_path / "raw").mkdir()
+    # A manifest written before the lake, pointing at a CSV in data/raw
+    counties([2019, 2020]).to_csv(tmp_path / "raw" / "a.csv", index=False)
+    manifest = FetchManifest(
+        tmp_path / "raw" / "manifest.json",
+        {"county:19*/income": {"file": "a.csv", "years": [2019, 2020]}},
+    )
+    table = LakeTable("census", "income_historical", tmp_path / "lake")
+
+    manifest.append_to_table("county:19*", "income", counties([2020, 2021], 2.0), table)
+    manifest.save()
+
+    assert table.years() == [2019, 2020, 2021]
+    assert table.read(years=[2019])["county"].tolist() == ["001", "163"]
+    assert table.read(years=[2020])["value"].tolist() == [2.0, 2.0]
+
+    reloaded = FetchManifest.load(tmp_path / "raw" / "manifest.json")
+    stored = reloaded.stored_file("county:19*", "income")
+    assert stored.resolve() == table.path.resolve()
+    assert reloaded.missing_years("county:19*", "income", range(2019, 2023)) == [2022]
@@ -0,0 +1,71 @@
+"""Tests for the streaming tract mode of the education fetcher."""
+
+import pandas as pd
+import pytest
+import requests
+
+from scripts import fetch_census_education as education
+from tests.conftest import FakeCensusClient
+
+
+class FakeClient(FakeCensusClient):
+    """Census client stand-in that answers group() requests, three tracts a state."""
+
+    def __init__(self):
+        super().__init__(api_key="k" * 40)
+
+    def rows(self, year, variables, for_geo, in_geo):
+        state = in_geo.split(":")[1]
+        if state == "02":
+            raise requests.exceptions.HTTPError("503 error")
+        table = variables[0][len("group(") : -1]
+        estimates = [f"{table}_{i:03d}E" for i in range(1, 36)]
+        margins = [code[:-1] + "M" for code in estimates]
+        header = [*estimates, *margins, "GEO_ID", "NAME", "state", "county", "tract"]
+        rows = [
+            ["100"] * 70 + ["1400000US", f"Tract {i}", state, "001", f"00{i}00"]
+            for i in range(3)
+        ]
+        return [header, *rows]
+
+
+def test_stream_by_state_appends_each_state(tmp_path, monkeypatch):
+    """Test that states stream into one Parquet file and failures are reported."""
+    monkeypatch.chdir(tmp_path)
+    client = FakeClient()
+    monkeypatch.setattr(education, "get_census_client", lambda: client)
+
+    output_file, rows, failed = education.stream_by_state(
+        "tract", ["01", "02", "19"], concurrency=2
+    )
+
+    assert failed == ["02"]
+    assert rows == 6
+    df = pd.read_parquet(output_file)
+    assert sorted(df["state"].unique()) == ["01", "19"]
+    assert df["tract"].iloc[0] == "00000"
+    assert df["Total population 25 years and over"].dtype == "float64"
+    assert "Male: Bachelor's degree (%)" in df.columns
+    assert not list(tmp_path.glob("data/raw/*.tmp"))
+    # One compact group() request per state, margins projected away
+    assert [call[1] for call in client.calls] == [["group(B15002)"]] * 3
+    assert not any(col.endswith("M") for col in df.columns)
+
+
+def test_interrupted_stream_leaves_no_partial_file(tmp_path, monkeypatch):
+    """Test that Ctrl-C after some states were written removes the temp file."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(education, "get_census_client", FakeClient)
+
+    def interrupted(calls, concurrency, on_result):
+        state = next(iter(calls))
+        on_result(state, calls[state]())
+        assert list(tmp_path.glob("data/raw/*.tmp"))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(education, "run_concurrently", interrupted)
+
+    with pytest.raises(KeyboardInterrupt):
+        education.stream_by_state("tract", ["01", "19"])
+
+    assert not list(tmp_path.glob("data/raw/*"))
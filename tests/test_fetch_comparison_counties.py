@@ -0,0 +1,80 @@
+"""Tests for the batched comparison-county fetcher."""
+
+import pytest
+
+from scripts import fetch_comparison_counties as comparison
+from scripts.job_checkpoint import JobCheckpoint
+from tests.conftest import FakeCensusClient
+
+
+class FakeClient(FakeCensusClient):
+    """Census client stand-in that answers with one row per county."""
+
+    def rows(self, year, variables, for_geo, in_geo):
+        state = in_geo.split(":")[1]
+        counties = for_geo.split(":")[1].split(",")
+        header = [*variables, "state", "county"]
+        rows = [
+            [str(int(fips) * 10)] * len(variables) + [state, fips] for fips in counties
+        ]
+        return [header, *rows]
+
+
+def test_plan_groups_counties_by_state():
+    """Test that counties sharing a state end up in one request."""
+    counties = {
+        "linn": {"fips": "113"},
+        "dubuque": {"fips": "061"},
+        "rock_island": {"fips": "161", "state": "17"},
+    }
+
+    plan = comparison.plan_county_requests(counties)
+
+    assert plan == {"19": ["113", "061"], "17": ["161"]}
+
+
+def test_fetch_counties_data_batches_and_splits(monkeypatch):
+    """Test one packed request per year and state, with rows split per county."""
+    client = FakeClient()
+    monkeypatch.setattr(comparison, "get_census_client", lambda: client)
+    monkeypatch.setattr(comparison, "YEARS", [2020, 2021])
+
+    results = comparison.fetch_counties_data(comparison.COUNTIES)
+
+    # All five categories fit in one request, so each year is one call
+    assert len(client.calls) == 2
+    assert client.calls[0][2] == "county:113,013,061"
+
+    linn = results["linn"]["demographics"]
+    assert set(results["linn"]) == set(comparison.VARIABLE_GROUPS)
+    assert list(linn["year"]) == [2020, 2021]
+    assert linn["total_population"].iloc[0] == 1130.0
+    assert results["dubuque"]["demographics"]["total_population"].iloc[0] == 610.0
+
+
+def test_fetch_counties_data_resumes_from_checkpoint(monkeypatch, tmp_path):
+    """Test that an interrupted run resumes without refetching finished years."""
+    checkpoint_path = tmp_path / "comparison.jsonl"
+    monkeypatch.setattr(comparison, "YEARS", [2020, 2021])
+
+    class InterruptingClient(FakeClient):
+        def get(self, year, *args, **kwargs):
+            if year == 2021:
+                raise KeyboardInterrupt
+            return super().get(year, *args, **kwargs)
+
+    monkeypatch.setattr(comparison, "get_census_client", InterruptingClient)
+    with pytest.raises(KeyboardInterrupt):
+        comparison.fetch_counties_data(
+            comparison.COUNTIES, JobCheckpoint(checkpoint_path)
+        )
+
+    client = FakeClient()
+    monkeypatch.setattr(comparison, "get_census_client", lambda: client)
+    checkpoint = JobCheckpoint(checkpoint_path)
+    results = comparison.fetch_counties_data(comparison.COUNTIES, checkpoint)
+
+    # 2020 came from the checkpoint; only 2021 went to the API
+    assert [call[0] for call in client.calls] == [2021]
+    assert list(results["linn"]["income"]["year"]) == [2020, 2021]
+    assert len(checkpoint) == len(comparison.COUNTIES) * 5 * 2
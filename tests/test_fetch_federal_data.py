@@ -0,0 +1,73 @@
+"""Tests for catalog-driven parallel category fetches."""
+
+import time
+
+import pytest
+
+from scripts import fetch_federal_data
+from scripts.socrata_client import domain_concurrency
+
+CATEGORY = {
+    f"bench-{n}": {
+        "id": f"cat-000{n}",
+        "domain": "data.example.gov" if n < 3 else "data.other.gov",
+        "name": f"Dataset {n}",
+        "description": "Synthetic dataset",
+        "size": "1K",
+    }
+    for n in range(4)
+}
+
+
+pytestmark = pytest.mark.standin(latency=0.2, socrata_rows=200)
+
+
+@pytest.fixture(autouse=True)
+def bench_category(monkeypatch):
+    monkeypatch.setitem(fetch_federal_data.FEDERAL_DATASETS, "bench", CATEGORY)
+
+
+def test_domain_concurrency_follows_token_tier():
+    assert domain_concurrency("token") > domain_concurrency(None) >= 1
+
+
+def test_category_datasets_run_in_parallel(standin, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_GOV_APP_TOKEN", "token")
+    results = fetch_federal_data.fetch_category("bench", limit=0, output_dir=tmp_path)
+
+    assert sorted(results) == sorted(CATEGORY)
+    assert all(summary["rows"] == 200 for summary in results.values())
+    assert all(summary["file"].exists() for summary in results.values())
+    assert all(summary["bytes"] > 0 for summary in results.values())
+    assert all(summary["transferred"] > 0 for summary in results.values())
+
+
+def test_category_wall_time_is_the_slowest_dataset(standin, tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_GOV_APP_TOKEN", "token")
+    started = time.perf_counter()
+    results = fetch_federal_data.fetch_category("bench", limit=0, output_dir=tmp_path)
+    elapsed = time.perf_counter() - started
+
+    total = sum(summary["seconds"] for summary in results.values())
+    assert elapsed < 0.6 * total
+
+
+def test_category_concurrency_caps_each_domain(standin, tmp_path, monkeypatch):
+    monkeypatch.delenv("DATA_GOV_APP_TOKEN", raising=False)
+    started = time.perf_counter()
+    fetch_federal_data.fetch_category(
+        "bench", limit=0, output_dir=tmp_path, concurrency=1
+    )
+    elapsed = time.perf_counter() - started
+
+    # Three datasets on one domain, one at a time, two 0.2s requests each
+    assert elapsed >= 3 * 2 * 0.2
+
+
+def test_list_datasets_shows_presets_without_where(monkeypatch, capsys):
+    entry = {**CATEGORY["bench-0"], "presets": {"names": {"select": "name"}}}
+    monkeypatch.setitem(fetch_federal_data.FEDERAL_DATASETS, "bench", {"b": entry})
+
+    fetch_federal_data.list_datasets()
+
+    assert "Preset names:" in capsys.readouterr().out
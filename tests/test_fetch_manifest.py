@@ -0,0 +1,89 @@
+"""Tests for the historical fetch manifest."""
+
+import shutil
+
+import pandas as pd
+
+from scripts import fetch_scott_county_historical as historical
+from scripts.data_lake import LakeTable
+from scripts.fetch_manifest import FetchManifest
+
+
+def frame(years, value=1.0):
+    """Build a minimal per-year dataset frame."""
+    return pd.DataFrame({"year": list(years), "value": [value] * len(years)})
+
+
+def test_empty_manifest_is_missing_everything(tmp_path):
+    """Test that a fresh manifest reports every year as missing."""
+    manifest = FetchManifest.load(tmp_path / "manifest.json")
+
+    assert manifest.missing_years("state:19", "income", range(2019, 2022)) == [
+        2019,
+        2020,
+        2021,
+    ]
+
+
+def test_append_to_table_extends_stored_table(tmp_path):
+    """Test that new years are committed to the same table and recorded."""
+    manifest = FetchManifest(tmp_path / "manifest.json")
+    table = LakeTable("census", "income_historical", tmp_path / "lake")
+    manifest.append_to_table("state:19", "income", frame(range(2009, 2022)), table)
+
+    manifest.append_to_table("state:19", "income", frame([2021, 2022], 2.0), table)
+    manifest.save()
+
+    stored = table.read()
+    assert list(stored["year"]) == list(range(2009, 2023))
+    assert stored.loc[stored["year"] == 2021, "value"].item() == 2.0
+
+    reloaded = FetchManifest.load(tmp_path / "manifest.json")
+    assert reloaded.stored_file("state:19", "income").resolve() == table.path.resolve()
+    assert reloaded.missing_years("state:19", "income", range(2009, 2024)) == [2023]
+
+
+def test_deleted_table_counts_as_missing(tmp_path):
+    """Test that years are refetched if their table has been removed."""
+    manifest = FetchManifest(tmp_path / "manifest.json")
+    table = LakeTable("census", "income_historical", tmp_path / "lake")
+    manifest.append_to_table("state:19", "income", frame([2020]), table)
+    shutil.rmtree(table.path)
+
+    assert manifest.missing_years("state:19", "income", [2020]) == [2020]
+
+
+def test_plan_requests_only_missing_cells(tmp_path):
+    """Test that a new ACS year is the only one planned for fetching."""
+    manifest = FetchManifest(tmp_path / "manifest.json")
+    for name in historical.CENSUS_DATASETS:
+        manifest.append_to_table(
+            historical.GEOGRAPHY,
+            name,
+            frame(range(2009, 2022)),
+            LakeTable("census", f"{name}_historical", tmp_path / "lake"),
+        )
+
+    plan = historical.plan_missing_years(
+        list(historical.CENSUS_DATASETS), 2009, 2022, manifest
+    )
+
+    assert plan == {2022: list(historical.CENSUS_DATASETS)}
+
+
+def test_append_to_table_keeps_county_fips_and_order(tmp_path):
+    """Test that multi-county tables keep zero-padded FIPS and county order."""
+    manifest = FetchManifest(tmp_path / "manifest.json")
+    table = LakeTable("census", "income_historical", tmp_path / "lake")
+
+    def counties(year):
+        return pd.DataFrame(
+            {"state": "19", "county": ["001", "163"], "year": year, "value": 1.0}
+        )
+
+    manifest.append_to_table("county:19*", "income", counties(2020), table)
+    manifest.append_to_table("county:19*", "income", counties(2021), table)
+
+    stored = table.read()
+    assert list(stored["county"]) == ["001", "163", "001", "163"]
+    assert list(stored["year"]) == [2020, 2020, 2021, 2021]
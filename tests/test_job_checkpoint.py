@@ -0,0 +1,45 @@
+"""Tests for resumable job checkpoints."""
+
+from scripts.job_checkpoint import JobCheckpoint
+
+
+def test_recorded_units_survive_reload(tmp_path):
+    """Test that a new checkpoint object sees what an earlier run recorded."""
+    path = tmp_path / "job.jsonl"
+    JobCheckpoint(path).record("linn", "income", 2021, result={"year": 2021})
+
+    checkpoint = JobCheckpoint(path)
+
+    assert checkpoint.is_done("linn", "income", 2021)
+    assert not checkpoint.is_done("linn", "income", 2020)
+    assert checkpoint.result("linn", "income", 2021) == {"year": 2021}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    """Test that a line cut short by a crash does not break loading."""
+    path = tmp_path / "job.jsonl"
+    JobCheckpoint(path).record("linn", "income", 2020)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"unit": ["linn", "inc')
+
+    checkpoint = JobCheckpoint(path)
+
+    assert len(checkpoint) == 1
+    assert checkpoint.is_done("linn", "income", 2020)
+
+    # The next record is not glued onto the torn line
+    checkpoint.record("linn", "income", 2021, result={"value": 2})
+    reloaded = JobCheckpoint(path)
+    assert reloaded.result("linn", "income", 2021) == {"value": 2}
+    assert len(reloaded) == 2
+
+
+def test_clear_removes_file(tmp_path):
+    """Test that clearing forgets every unit and deletes the file."""
+    checkpoint = JobCheckpoint.for_job("demo", directory=tmp_path)
+    checkpoint.record("a", 1)
+
+    checkpoint.clear()
+
+    assert len(checkpoint) == 0
+    assert not (tmp_path / "demo.jsonl").exists()
@@ -0,0 +1,113 @@
+"""Tests for the adaptive token-bucket rate limiter."""
+
+import time
+
+import pytest
+import requests
+
+from scripts import census_client
+from scripts.census_client import BACKOFF_MAX, CensusClient, backoff_delay
+from scripts.rate_limiter import (
+    ANONYMOUS_RATE,
+    KEYED_RATE,
+    TokenBucket,
+    census_rate_limiter,
+)
+from tests.conftest import FakeResponse
+
+
+def test_bucket_allows_burst_then_refills():
+    """Test that a full bucket serves a burst and then paces at its rate."""
+    bucket = TokenBucket(rate=100, capacity=5)
+    started = time.perf_counter()
+
+    for _ in range(5):
+        bucket.acquire()
+    burst = time.perf_counter() - started
+    for _ in range(5):
+        bucket.acquire()
+
+    assert burst < 0.02
+    # Five more tokens at 100/s take about 50ms
+    assert time.perf_counter() - started >= 0.04
+
+
+def test_throttle_halves_rate_and_success_recovers():
+    """Test that throttling slows the bucket and successes restore it."""
+    bucket = TokenBucket(rate=10)
+
+    bucket.on_throttle()
+    bucket.on_throttle()
+    assert bucket.rate == pytest.approx(2.5)
+
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == pytest.approx(10)
+
+
+def test_throttle_respects_minimum_rate():
+    """Test that repeated throttling never stops the bucket entirely."""
+    bucket = TokenBucket(rate=16, min_rate=1)
+
+    for _ in range(10):
+        bucket.on_throttle()
+
+    assert bucket.rate == 1
+
+
+def test_census_rate_limiter_depends_on_key():
+    """Test that keyed clients get the larger allowance."""
+    assert census_rate_limiter("k" * 40).base_rate == KEYED_RATE
+    assert census_rate_limiter(None).base_rate == ANONYMOUS_RATE
+
+
+def test_backoff_delay_grows_and_honours_retry_after():
+    """Test exponential backoff and the server's Retry-After hint."""
+    assert backoff_delay(0, "7") == 7.0
+    assert 1.0 <= backoff_delay(0) < 2.0
+    assert 8.0 <= backoff_delay(3) < 9.0
+    assert backoff_delay(20) <= BACKOFF_MAX + 1.0
+
+
+def test_client_retries_throttled_requests(monkeypatch):
+    """Test that 429/503 responses are retried with backoff and slow the bucket."""
+    responses = [
+        FakeResponse(status_code=429, headers={"Retry-After": "3"}),
+        FakeResponse(status_code=503),
+        FakeResponse([["NAME"], ["Iowa"]]),
+    ]
+    retries = []
+
+    def fake_backoff(attempt, retry_after=None):
+        retries.append((attempt, retry_after))
+        return 0
+
+    monkeypatch.setattr(census_client, "backoff_delay", fake_backoff)
+
+    with CensusClient(api_key="k" * 40) as client:
+        monkeypatch.setattr(
+            client.session, "get", lambda *args, **kwargs: responses.pop(0)
+        )
+        rows = client.get(2021, ["NAME"], "state:19")
+
+        assert rows == [["NAME"], ["Iowa"]]
+        assert client.network_calls == 3
+        assert client.limiter.rate < client.limiter.base_rate
+
+    assert retries == [(0, "3"), (1, None)]
+
+
+def test_client_gives_up_after_max_retries(monkeypatch):
+    """Test that a persistent server error is raised once retries run out."""
+    monkeypatch.setattr(census_client, "backoff_delay", lambda *args: 0)
+
+    with CensusClient(api_key="k" * 40, max_retries=2) as client:
+        monkeypatch.setattr(
+            client.session,
+            "get",
+            lambda *args, **kwargs: FakeResponse(status_code=500),
+        )
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get(2021, ["NAME"], "state:19")
+
+        assert client.network_calls == 3
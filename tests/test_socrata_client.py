@@ -0,0 +1,228 @@
+"""Tests for paging Socrata datasets to disk."""
+
+import csv
+import threading
+import time
+
+import pytest
+
+from scripts import fetch_data_gov, fetch_federal_data
+from scripts.api_standin import StandinServer
+from scripts.socrata_client import (
+    CSVPageWriter,
+    dataset_columns,
+    iter_pages,
+    make_socrata_client,
+    soql_query,
+    stable_order,
+    write_pages,
+)
+
+
+class FakeSocrata:
+    """Serves ``total`` numbered records through a sodapy-like get()."""
+
+    def __init__(self, total):
+        self.total = total
+        self.calls = []
+
+    def get(self, dataset_id, limit=1000, offset=0, **query):
+        self.calls.append({"limit": limit, "offset": offset, **query})
+        stop = min(self.total, offset + limit)
+        return [{"id": str(i)} for i in range(offset, stop)]
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_iter_pages_walks_offsets_in_id_order():
+    client = FakeSocrata(total=25)
+    pages = list(iter_pages(client, "abcd-1234", page_size=10))
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert [call["offset"] for call in client.calls] == [0, 10, 20]
+    assert all(call["order"] == ":id" for call in client.calls)
+
+
+def test_iter_pages_stops_at_limit():
+    client = FakeSocrata(total=100)
+    pages = list(iter_pages(client, "abcd-1234", limit=25, page_size=10))
+
+    assert sum(len(page) for page in pages) == 25
+    assert client.calls[-1]["limit"] == 5
+
+
+def test_iter_pages_requests_one_extra_page_when_total_is_a_multiple():
+    client = FakeSocrata(total=20)
+    pages = list(iter_pages(client, "abcd-1234", page_size=10))
+
+    assert len(pages) == 2
+    assert len(client.calls) == 3
+
+
+def test_writer_widens_header_for_late_columns(tmp_path):
+    path = tmp_path / "out.csv"
+    with CSVPageWriter(path) as writer:
+        writer.write([{"a": "1"}, {"a": "2"}])
+        writer.write([{"a": "3", "b": "x,y"}])
+
+    assert read_rows(path) == [
+        {"a": "1", "b": ""},
+        {"a": "2", "b": ""},
+        {"a": "3", "b": "x,y"},
+    ]
+    assert not (tmp_path / "out.csv.tmp").exists()
+
+
+def test_writer_without_rows_leaves_target_alone(tmp_path):
+    path = tmp_path / "out.csv"
+    assert write_pages([[]], path, columns=["a"]) == 0
+    assert not path.exists()
+
+    path.write_text("a\n1\n", encoding="utf-8")
+    writer = CSVPageWriter(path)
+    writer.write([])
+
+    assert writer.close() is None
+    assert read_rows(path) == [{"a": "1"}]
+    assert not (tmp_path / "out.csv.tmp").exists()
+
+
+def test_writer_uses_given_column_order(tmp_path):
+    path = tmp_path / "out.csv"
+    write_pages([[{"b": "2", "a": "1"}]], path, columns=["a", "b"])
+
+    with open(path, encoding="utf-8") as f:
+        assert f.readline().strip() == "a,b"
+
+
+def test_failed_download_leaves_no_file(tmp_path):
+    def pages():
+        yield [{"a": "1"}]
+        raise ConnectionError("dropped")
+
+    path = tmp_path / "out.csv"
+    with pytest.raises(ConnectionError):
+        write_pages(pages(), path)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_dataset_streams_pages_from_standin(tmp_path, monkeypatch):
+    with StandinServer(socrata_rows=2500) as server:
+        monkeypatch.setenv("SOCRATA_BASE_URL", server.url)
+        output_file = fetch_data_gov.download_dataset(
+            "test-0001", 0, "data.example.gov", tmp_path, page_size=1000
+        )
+
+        client = make_socrata_client("data.example.gov")
+        columns = dataset_columns(client, "test-0001")
+        client.close()
+
+    rows = read_rows(output_file)
+    assert len(rows) == 2500
+    assert rows[-1]["id"] == "2499"
+    assert list(rows[0]) == columns
+
+
+class SlowFirstPages(FakeSocrata):
+    """Answers early pages last, and tracks how many requests overlap."""
+
+    def __init__(self, total):
+        super().__init__(total)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+
+    def get(self, dataset_id, limit=1000, offset=0, **query):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02 if offset % 20 == 0 else 0.0)
+        try:
+            return super().get(dataset_id, limit, offset, **query)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_parallel_pages_come_back_in_order():
+    client = SlowFirstPages(total=95)
+    pages = list(iter_pages(client, "abcd-1234", page_size=10, workers=4))
+
+    ids = [int(record["id"]) for page in pages for record in page]
+    assert ids == list(range(95))
+    assert 1 < client.peak <= 4
+
+
+def test_parallel_pages_respect_limit():
+    client = FakeSocrata(total=1000)
+    pages = list(iter_pages(client, "abcd-1234", limit=35, page_size=10, workers=8))
+
+    assert sum(len(page) for page in pages) == 35
+    assert sorted(call["offset"] for call in client.calls) == [0, 10, 20, 30]
+
+
+def test_parallel_page_errors_propagate():
+    class Failing(FakeSocrata):
+        def get(self, dataset_id, limit=1000, offset=0, **query):
+            if offset == 20:
+                raise ConnectionError("dropped")
+            return super().get(dataset_id, limit, offset, **query)
+
+    with pytest.raises(ConnectionError):
+        list(iter_pages(Failing(total=100), "abcd-1234", page_size=10, workers=3))
+
+
+def test_stable_order_breaks_ties_by_id():
+    assert stable_order(None) == ":id"
+    assert stable_order("year DESC") == "year DESC, :id"
+    assert stable_order(":id DESC") == ":id DESC"
+
+
+def test_soql_query_drops_unset_clauses():
+    assert soql_query(where="a = 1") == {"where": "a = 1"}
+    assert soql_query() == {}
+
+
+def test_iter_pages_passes_query_through():
+    client = FakeSocrata(total=5)
+    list(iter_pages(client, "abcd-1234", select="id", where="id > 2", order="id"))
+
+    assert client.calls[0]["select"] == "id"
+    assert client.calls[0]["where"] == "id > 2"
+    assert client.calls[0]["order"] == "id, :id"
+
+
+def test_download_dataset_pushes_select_and_where(tmp_path, monkeypatch):
+    with StandinServer(socrata_rows=2000) as server:
+        monkeypatch.setenv("SOCRATA_BASE_URL", server.url)
+        output_file = fetch_data_gov.download_dataset(
+            "test-0001",
+            0,
+            "data.example.gov",
+            tmp_path,
+            page_size=1000,
+            query=soql_query(select="id, category", where="category = 'alpha'"),
+        )
+
+    rows = read_rows(output_file)
+    assert list(rows[0]) == ["id", "category"]
+    assert {row["category"] for row in rows} == {"alpha"}
+    assert 0 < len(rows) < 2000
+
+
+def test_catalog_presets_merge_with_explicit_clauses():
+    info = fetch_federal_data.find_dataset("chronic-disease")
+
+    preset = fetch_federal_data.resolve_query(info, "iowa")
+    assert preset["where"] == "locationabbr = 'IA'"
+
+    query = fetch_federal_data.resolve_query(info, "iowa", {"order": "topic"})
+    assert query["order"] == "topic"
+    assert query["where"] == preset["where"]
+
+    assert fetch_federal_data.resolve_query(info, "no-such-preset") is None
+    assert fetch_federal_data.resolve_query(info) == {}
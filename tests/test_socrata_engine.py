@@ -0,0 +1,144 @@
+"""Tests for the shared Socrata ingestion engine."""
+
+import pandas as pd
+import pytest
+
+from scripts.socrata_engine import (
+    SocrataEngine,
+    fetch_dataset,
+    lake_table,
+    output_path,
+    read_dataset,
+    save_data,
+    save_frame,
+)
+from scripts.socrata_types import read_schema
+
+DOMAIN = "data.example.gov"
+
+pytestmark = pytest.mark.standin(socrata_rows=1200)
+
+
+@pytest.fixture
+def engine(standin):
+    with SocrataEngine(DOMAIN, page_size=500, verbose=False) as engine:
+        yield engine
+
+
+def test_fetch_reads_whole_dataset_from_export(engine):
+    df = engine.fetch("eng-0001", limit=750)
+
+    assert len(df) == 750
+    assert df["value"].dtype == "float64"
+    assert df["category"].dtype == "category"
+
+
+def test_fetch_pushes_query_down(engine):
+    df = engine.fetch("eng-0001", query={"where": "category = 'beta'"})
+
+    assert len(df) == 240
+    assert set(df["category"]) == {"beta"}
+
+
+@pytest.mark.parametrize("export", [True, False])
+def test_download_parquet_keeps_types(engine, tmp_path, export):
+    path = tmp_path / "eng.parquet"
+    summary = engine.download("eng-0001", path, export=export)
+
+    assert summary["rows"] == 1200
+    assert summary["source"] == ("export" if export else "json")
+    df = pd.read_parquet(path)
+    assert len(df) == 1200
+    assert df["value"].dtype == "float64"
+    assert df["date"].dtype.kind == "M"
+    assert df["flag"].dtype == bool
+    assert not (tmp_path / "eng.parquet.tmp").exists()
+
+
+def test_download_csv_writes_schema_sidecar(engine, tmp_path):
+    path = tmp_path / "eng.csv"
+    summary = engine.download("eng-0001", path, limit=300, export=False)
+
+    assert summary["rows"] == 300
+    assert summary["transferred"] is None
+    assert read_schema(path)["date"] == "calendar_date"
+    assert read_dataset(path)["date"].dtype.kind == "M"
+
+
+def test_save_frame_round_trips_both_formats(engine, tmp_path):
+    df = engine.fetch("eng-0001", limit=100)
+
+    for fmt in ("csv", "parquet"):
+        path = save_frame(df, output_path("eng-0001", tmp_path, fmt))
+        assert path.suffix == f".{fmt}"
+        loaded = read_dataset(path)
+        assert len(loaded) == 100
+        assert loaded["value"].dtype == "float64"
+        assert len(read_dataset(path, nrows=10)) == 10
+
+
+def test_output_path_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        output_path("eng-0001", tmp_path, "xlsx")
+
+
+def test_unchanged_export_is_reused_after_304(engine, tmp_path):
+    first = engine.download("eng-0001", tmp_path / "a.csv")
+    second = engine.download("eng-0001", tmp_path / "b.csv")
+
+    assert second["source"] == "cache"
+    assert second["file"] == first["file"]
+    assert second["rows"] == 1200
+    assert second["transferred"] == 0
+    assert not (tmp_path / "b.csv").exists()
+
+
+def test_changed_export_is_downloaded_again(standin, engine, tmp_path):
+    engine.download("eng-0001", tmp_path / "a.csv")
+    standin.touch_socrata("eng-0001", [3])
+
+    summary = engine.download("eng-0001", tmp_path / "b.csv")
+
+    assert summary["source"] == "export"
+    assert summary["file"] == tmp_path / "b.csv"
+
+
+def test_cli_helpers_fetch_and_save(standin, tmp_path):
+    df = fetch_dataset("eng-0001", limit=200, domain=DOMAIN)
+    path = save_data(df, "eng-0001", tmp_path, "parquet")
+
+    assert path.parent == tmp_path
+    assert len(read_dataset(path)) == 200
+    assert save_data(df.iloc[:0], "eng-0001", tmp_path, "csv") is None
+
+
+def test_download_to_lake_commits_and_revalidates(standin, engine, tmp_path):
+    table = lake_table("eng-0001", root=tmp_path)
+
+    first = engine.download_to_lake("eng-0001", root=tmp_path)
+    assert first["file"] == table.path
+    assert table.rows() == 1200
+    df = read_dataset(table.path)
+    assert df["value"].dtype == "float64"
+    assert len(read_dataset(table.path, nrows=10)) == 10
+
+    again = engine.download_to_lake("eng-0001", root=tmp_path)
+    assert again["source"] == "cache"
+    assert again["transferred"] == 0
+
+    standin.touch_socrata("eng-0001", [3])
+    changed = engine.download_to_lake("eng-0001", root=tmp_path)
+    assert changed["source"] == "export"
+    assert len(table.files()) == 1
+    assert sorted(table.path.rglob("*.parquet")) == table.files()
+
+
+def test_filtered_pulls_get_their_own_lake_table(engine, tmp_path):
+    whole = lake_table("eng-0001", {"order": "id"}, root=tmp_path)
+    query = {"where": "value > 10", "order": "id"}
+    filtered = engine.download_to_lake("eng-0001", 100, query, root=tmp_path)
+
+    assert whole.dataset == "eng-0001" and not whole.exists()
+    assert filtered["file"] == lake_table("eng-0001", query, root=tmp_path).path
+    assert filtered["file"].name.startswith("dataset=eng-0001_q")
+    assert lake_table("eng-0001", query, "iowa").dataset == "eng-0001_iowa"
@@ -0,0 +1,72 @@
+"""Tests for the Socrata bulk CSV export path."""
+
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+from scripts import fetch_data_gov, socrata_export
+from scripts.api_standin import synthetic_socrata
+from scripts.socrata_client import make_socrata_client
+from scripts.socrata_export import export_frame, export_frames
+from scripts.socrata_types import read_schema, read_typed_csv
+
+DOMAIN = "data.example.gov"
+
+pytestmark = pytest.mark.standin(socrata_rows=1200)
+
+
+@pytest.fixture
+def client(standin):
+    client = make_socrata_client(DOMAIN)
+    yield client
+    client.close()
+
+
+def test_export_decodes_chunks_by_field_name(client):
+    frames = list(export_frames(client, "exp-0001", chunk_rows=500))
+
+    assert [len(frame) for frame in frames] == [500, 500, 200]
+    df = frames[0]
+    assert list(df.columns) == ["id", "category", "value", "count", "date", "flag"]
+    assert df["value"].dtype == "float64"
+    assert df["date"][1] == pd.Timestamp("2020-01-02")
+    assert df["flag"].dtype == "boolean"
+
+
+def test_export_frame_stops_at_limit_and_categorizes(client):
+    df = export_frame(client, "exp-0001", limit=750)
+
+    assert len(df) == 750
+    assert df["id"].iloc[-1] == 749
+    assert df["category"].dtype == "category"
+
+
+def test_export_transfers_fewer_bytes_than_json(client):
+    stats = {}
+    list(export_frames(client, "exp-0001", stats=stats))
+    records = synthetic_socrata("exp-0001", {"$limit": "1200"}, 1200)
+
+    assert 0 < stats["bytes"] < len(json.dumps(records))
+
+
+def test_download_dataset_uses_export_without_query(standin, tmp_path):
+    output_file = fetch_data_gov.download_dataset("exp-0001", 0, DOMAIN, tmp_path)
+
+    df = read_typed_csv(output_file)
+    assert len(df) == 1200
+    assert read_schema(output_file)["date"] == "calendar_date"
+    assert df["date"].dtype.kind == "M"
+
+
+def test_download_falls_back_to_json_when_export_fails(standin, tmp_path, monkeypatch):
+    def unavailable(client, dataset_id, headers=None):
+        raise requests.HTTPError("404 Client Error")
+
+    monkeypatch.setattr(socrata_export, "open_export", unavailable)
+    output_file = fetch_data_gov.download_dataset(
+        "exp-0001", 300, DOMAIN, tmp_path, page_size=100
+    )
+
+    assert len(read_typed_csv(output_file)) == 300
@@ -0,0 +1,138 @@
+"""Tests for incremental Socrata sync."""
+
+import csv
+
+import pytest
+
+from scripts import fetch_data_gov
+from scripts.socrata_client import make_socrata_client
+from scripts.socrata_engine import SocrataEngine
+from scripts.socrata_sync import SyncState, sync_dataset, upsert_rows
+
+DOMAIN = "data.example.gov"
+DATASET = "sync-0001"
+
+pytestmark = pytest.mark.standin(socrata_rows=300)
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def sync(state, tmp_path, **kwargs):
+    client = make_socrata_client(DOMAIN)
+    try:
+        return sync_dataset(
+            client, DATASET, DOMAIN, state, tmp_path, page_size=100, **kwargs
+        )
+    finally:
+        client.close()
+
+
+def test_first_sync_downloads_everything_with_system_fields(standin, tmp_path):
+    state = SyncState(tmp_path / "sync.json")
+    summary = sync(state, tmp_path)
+
+    rows = read_rows(summary["file"])
+    assert summary["mode"] == "full"
+    assert len(rows) == 300
+    assert list(rows[0])[:3] == [":id", ":created_at", ":updated_at"]
+    assert summary["updated_at"] == max(row[":updated_at"] for row in rows)
+
+
+def test_incremental_sync_fetches_and_upserts_only_changes(standin, tmp_path):
+    state = SyncState(tmp_path / "sync.json")
+    sync(state, tmp_path)
+    state.save()
+
+    # Upstream: two rows edited, twenty rows added
+    standin.socrata_rows = 320
+    standin.touch_socrata(DATASET, [5, 250, *range(300, 320)])
+    standin.reset_log()
+
+    state = SyncState.load(tmp_path / "sync.json")
+    summary = sync(state, tmp_path)
+
+    assert summary["mode"] == "incremental"
+    assert summary["fetched"] == 22
+    assert len(standin.log) == 1
+
+    rows = read_rows(summary["file"])
+    assert len(rows) == summary["rows"] == 320
+    assert [row["id"] for row in rows] == [str(i) for i in range(320)]
+    assert rows[5][":updated_at"] > rows[4][":updated_at"]
+
+    # Nothing changed since: the rows at the mark are not merged again
+    modified = summary["file"].stat().st_mtime_ns
+    again = sync(state, tmp_path)
+    assert again["fetched"] == 0
+    assert again["rows"] == 320
+    assert again["updated_at"] == summary["updated_at"]
+    assert again["file"].stat().st_mtime_ns == modified
+    assert read_rows(again["file"]) == rows
+
+
+def test_rows_sharing_the_watermark_timestamp_are_not_lost(standin, tmp_path):
+    state = SyncState(tmp_path / "sync.json")
+    sync(state, tmp_path)
+    standin.touch_socrata(DATASET, [10])
+    first = sync(state, tmp_path)
+    assert first["fetched"] == 1
+
+    # Row 20 is edited after that sync, within the same second as row 10
+    edits = standin.socrata_edits[DATASET]
+    edits[20] = edits[10]
+
+    summary = sync(state, tmp_path)
+
+    assert summary["updated_at"] == first["updated_at"]
+    # Only row 20 is new; row 10 was already merged at this mark
+    assert summary["fetched"] == 1
+    rows = read_rows(summary["file"])
+    assert len(rows) == 300
+    assert rows[20][":updated_at"] == rows[10][":updated_at"] == first["updated_at"]
+
+
+def test_full_sync_ignores_watermark(standin, tmp_path):
+    state = SyncState(tmp_path / "sync.json")
+    sync(state, tmp_path)
+    summary = sync(state, tmp_path, full=True)
+
+    assert summary["mode"] == "full"
+    assert summary["fetched"] == 300
+
+
+def test_upsert_replaces_by_id_and_appends_new_rows(tmp_path):
+    path = tmp_path / "local.csv"
+    path.write_text(":id,value\nrow-1,a\nrow-2,b\n", encoding="utf-8")
+
+    rows = upsert_rows(path, [{":id": "row-2", "value": "B"}, {":id": "row-3"}])
+
+    assert rows == 3
+    assert read_rows(path) == [
+        {":id": "row-1", "value": "a"},
+        {":id": "row-2", "value": "B"},
+        {":id": "row-3", "value": ""},
+    ]
+
+
+def test_sync_local_copy_passes_the_token(monkeypatch):
+    seen = {}
+
+    def fake_sync(self, dataset_id, full=False, state=None):
+        seen["token"] = self.app_token
+        return {
+            "mode": "full",
+            "fetched": 1,
+            "rows": 1,
+            "file": "x.csv",
+            "updated_at": "",
+        }
+
+    monkeypatch.setattr(SocrataEngine, "sync", fake_sync)
+
+    assert (
+        fetch_data_gov.sync_local_copy(DATASET, DOMAIN, app_token="t" * 20) == "x.csv"
+    )
+    assert seen["token"] == "t" * 20
@@ -0,0 +1,95 @@
+"""Tests for typed decoding of Socrata records."""
+
+import pandas as pd
+import pytest
+
+from scripts import fetch_data_gov
+from scripts.api_standin import StandinServer
+from scripts.socrata_types import (
+    decode_records,
+    point_coordinates,
+    read_schema,
+    read_typed_csv,
+    write_schema,
+)
+
+SCHEMA = {
+    "score": "number",
+    "day": "calendar_date",
+    "stamp": "fixed_timestamp",
+    "open": "checkbox",
+    "where": "point",
+    "borough": "text",
+    "name": "text",
+}
+
+RECORDS = [
+    {
+        "score": "512",
+        "day": "2020-01-01T00:00:00.000",
+        "stamp": "2024-01-01T00:00:00.000Z",
+        "open": True,
+        "where": {"type": "Point", "coordinates": [-73.99, 40.73]},
+        "borough": "M",
+        "name": "a",
+    },
+    {"score": "n/a", "open": False, "borough": "M", "name": "b"},
+    {"score": "488.5", "borough": "M", "name": "c"},
+]
+
+
+def test_decode_records_applies_schema_types():
+    df = decode_records(RECORDS, SCHEMA)
+
+    assert df["score"].dtype == "float64"
+    assert pd.isna(df["score"][1])
+    assert df["day"].dtype.kind == "M"
+    assert str(df["stamp"].dt.tz) == "UTC"
+    assert df["open"].dtype == "boolean"
+    assert df["where_latitude"][0] == pytest.approx(40.73)
+    assert "where" not in df.columns
+    assert df["borough"].dtype == "category"
+    assert pd.api.types.is_string_dtype(df["name"])
+
+
+def test_decode_records_without_schema_keeps_strings():
+    df = decode_records(RECORDS, None)
+    assert pd.api.types.is_string_dtype(df["score"])
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"type": "Point", "coordinates": [-93.5, 41.6]},
+        "POINT (-93.5 41.6)",
+        "{'type': 'Point', 'coordinates': [-93.5, 41.6]}",
+    ],
+)
+def test_point_coordinates_accepts_socrata_formats(value):
+    assert point_coordinates(value) == (-93.5, 41.6)
+
+
+def test_saved_csv_reads_back_with_same_dtypes(tmp_path):
+    df = decode_records(RECORDS, SCHEMA)
+    path = tmp_path / "out.csv"
+    df.to_csv(path, index=False)
+    write_schema(path, df.attrs["socrata_schema"])
+
+    loaded = read_typed_csv(path)
+
+    assert loaded.dtypes.to_dict() == df.dtypes.to_dict()
+
+
+def test_downloaded_dataset_carries_schema(tmp_path, monkeypatch):
+    with StandinServer(socrata_rows=500) as server:
+        monkeypatch.setenv("SOCRATA_BASE_URL", server.url)
+        output_file = fetch_data_gov.download_dataset(
+            "test-0001", 0, "data.example.gov", tmp_path
+        )
+
+    assert read_schema(output_file)["date"] == "calendar_date"
+    df = read_typed_csv(output_file)
+    assert df["value"].dtype == "float64"
+    assert df["date"].dtype.kind == "M"
+    assert df["flag"].dtype == "boolean"
+    assert df["category"].dtype == "category"